@@ -0,0 +1,100 @@
+'''
+Measures the time taken by `import pondpy4tljh` in fresh interpreters and
+checks it against a budget, along with the heavy dependencies that must not
+be loaded by the import.
+
+Run from the repository root, e.g.
+
+    python -m benchmarks.import_time --budget 0.05
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from pondpy4tljh import TextColor
+
+# Default budget for `import pondpy4tljh` in seconds
+DEFAULT_BUDGET = 0.05
+HEAVY_MODULES = [
+    'ipywidgets',
+    'joistpy',
+    'matplotlib',
+    'numpy',
+    'pandas',
+    'pondpy',
+    'steelpy',
+]
+
+_MEASURE_IMPORT = f'''
+import json, sys, time
+start = time.perf_counter()
+import pondpy4tljh
+duration = time.perf_counter()-start
+print(json.dumps({{
+    'duration':duration,
+    'loaded':[module for module in {HEAVY_MODULES!r} if module in sys.modules],
+}}))
+'''
+
+def measure_import_time(repeat=5):
+    '''
+    Imports pondpy4tljh in fresh interpreters.
+
+    Parameters
+    ----------
+    repeat : int, optional
+        number of interpreters started
+
+    Returns
+    -------
+    durations : list
+        list of import durations in seconds
+    loaded : list
+        list of heavy modules loaded by the import
+    '''
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([root, env['PYTHONPATH']]) if env.get('PYTHONPATH') else root
+
+    durations = []
+    loaded = set()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', _MEASURE_IMPORT], env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        durations.append(result['duration'])
+        loaded.update(result['loaded'])
+
+    return durations, sorted(loaded)
+
+def main(argv=None):
+    '''
+    Command line entry point of the import-time benchmark.
+    '''
+    parser = argparse.ArgumentParser(description='Benchmark the import time of pondpy4tljh.')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='import time budget in seconds')
+    parser.add_argument('--repeat', type=int, default=5, help='number of fresh interpreters')
+    args = parser.parse_args(argv)
+
+    durations, loaded = measure_import_time(repeat=args.repeat)
+    median = statistics.median(durations)
+    print(f'import pondpy4tljh: median {median*1000:.1f} ms, min {min(durations)*1000:.1f} ms over {len(durations)} runs')
+
+    passed = True
+    if median > args.budget:
+        passed = False
+        print(TextColor.RED+TextColor.BOLD+f"Import time exceeds the budget of {args.budget*1000:.1f} ms"+TextColor.END)
+    if loaded:
+        passed = False
+        print(TextColor.RED+TextColor.BOLD+f"Import loaded heavy dependencies: {', '.join(loaded)}"+TextColor.END)
+    if passed:
+        print(TextColor.GREEN+TextColor.BOLD+"Import time is within the budget"+TextColor.END)
+
+    return 0 if passed else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
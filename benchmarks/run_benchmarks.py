@@ -0,0 +1,320 @@
+'''
+Benchmarks the analysis, summary, and plot widget paths on synthetic roof
+layouts of increasing size, and optionally compares the timings, peak
+memory, and results against a saved baseline run.
+
+Run from the repository root, e.g.
+
+    python -m benchmarks.run_benchmarks --cases small medium --save-baseline baseline.json
+    python -m benchmarks.run_benchmarks --cases small medium --compare baseline.json
+'''
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from importlib.metadata import version
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+
+from pondpy4tljh import (
+    TextColor,
+    analyze_roof_bays,
+    create_plot_widget,
+    create_rain_plot_widget,
+    show_analysis_summary,
+)
+
+from .synthetic_inputs import (
+    BENCHMARK_CASES,
+    create_synthetic_input,
+    get_benchmark_case,
+)
+
+BASELINE_FORMAT = 1
+STEPS = ['analysis', 'summary', 'widgets']
+
+def click_plot_widgets(analysis_summary, models):
+    '''
+    Creates both plot widgets and renders each plot type once for the first
+    roof bay and member. Outside of a notebook the widget output is printed,
+    so it is discarded.
+    '''
+    with redirect_stdout(io.StringIO()):
+        _click_plot_widgets(analysis_summary, models)
+
+def _click_plot_widgets(analysis_summary, models):
+    plot_widget = create_plot_widget(analysis_summary, models)
+    plot_selectW, plot_buttonW = plot_widget.children[0].children[2:4]
+    for option in plot_selectW.options:
+        plot_selectW.value = option
+        plot_buttonW.click()
+
+    rain_plot_widget = create_rain_plot_widget(analysis_summary, models)
+    rain_plot_widget.children[0].children[1].click()
+
+def run_steps(user_input, workers):
+    '''
+    Runs the analysis, summary, and widget steps once.
+
+    Returns
+    -------
+    durations : dict
+        dictionary of step durations in seconds
+    analysis_summary : pandas.DataFrame
+        analysis summary of the run
+    '''
+    durations = {}
+
+    start = time.perf_counter()
+    models = analyze_roof_bays(workers=workers, progress=False, **user_input)
+    durations['analysis'] = time.perf_counter()-start
+
+    start = time.perf_counter()
+    analysis_summary = show_analysis_summary(models, **user_input)
+    durations['summary'] = time.perf_counter()-start
+
+    start = time.perf_counter()
+    click_plot_widgets(analysis_summary, models)
+    durations['widgets'] = time.perf_counter()-start
+
+    return durations, analysis_summary
+
+def measure_peak_memory(user_input, workers):
+    '''
+    Runs the analysis, summary, and widget steps once with tracemalloc and
+    returns the peak traced memory of each step in MiB. Memory allocated in
+    worker processes is not traced.
+    '''
+    peak_memory = {}
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        models = analyze_roof_bays(workers=workers, progress=False, **user_input)
+        peak_memory['analysis'] = tracemalloc.get_traced_memory()[1]/2**20
+
+        tracemalloc.reset_peak()
+        analysis_summary = show_analysis_summary(models, **user_input)
+        peak_memory['summary'] = tracemalloc.get_traced_memory()[1]/2**20
+
+        tracemalloc.reset_peak()
+        click_plot_widgets(analysis_summary, models)
+        peak_memory['widgets'] = tracemalloc.get_traced_memory()[1]/2**20
+    finally:
+        tracemalloc.stop()
+
+    return peak_memory
+
+def run_case(user_input, repeat=3, workers=None, memory=True):
+    '''
+    Benchmarks a single synthetic roof layout.
+
+    Parameters
+    ----------
+    user_input : dict
+        synthetic input created by create_synthetic_input
+    repeat : int, optional
+        number of timed runs; the fastest run of each step is reported
+    workers : int, optional
+        number of worker processes passed to analyze_roof_bays
+    memory : bool, optional
+        indicates whether an extra run is made to trace the peak memory
+
+    Returns
+    -------
+    case_result : dict
+        dictionary containing the size of the layout, the timings in seconds,
+        the peak memory in MiB, and the analysis summary
+    '''
+    timings = {step:[] for step in STEPS}
+    analysis_summary = None
+    for _ in range(repeat):
+        durations, analysis_summary = run_steps(user_input, workers)
+        for step in STEPS:
+            timings[step].append(durations[step])
+
+    return {
+        'n_roof_bays':user_input['n_roof_bays'],
+        'n_members':len(analysis_summary),
+        'timings':{step:min(timings[step]) for step in STEPS},
+        'peak_memory':measure_peak_memory(user_input, workers) if memory else {},
+        'summary':analysis_summary.to_dict(orient='list'),
+    }
+
+def compare_summaries(summary, baseline_summary, tolerance=0):
+    '''
+    Compares an analysis summary against the baseline summary.
+
+    Returns
+    -------
+    differences : list
+        list of strings describing each column that does not match
+    '''
+    current = pd.DataFrame(summary)
+    baseline = pd.DataFrame(baseline_summary)
+
+    if current.shape != baseline.shape or list(current.columns) != list(baseline.columns):
+        return [f'summary shape {current.shape} does not match baseline shape {baseline.shape}']
+
+    differences = []
+    for column in baseline.columns:
+        if pd.api.types.is_numeric_dtype(baseline[column]):
+            matches = np.isclose(current[column], baseline[column], rtol=tolerance, atol=0)
+        else:
+            matches = (current[column] == baseline[column]).to_numpy()
+        if not matches.all():
+            differences.append(f'{column}: {int((~matches).sum())} of {len(matches)} rows differ')
+
+    return differences
+
+def compare_to_baseline(results, baseline, time_tolerance=0.25, result_tolerance=0):
+    '''
+    Compares benchmark results against a baseline run and prints a report.
+
+    Parameters
+    ----------
+    results : dict
+        dictionary of case results created by run_case, keyed by case name
+    baseline : dict
+        baseline run loaded from a file written with --save-baseline
+    time_tolerance : float, optional
+        fraction by which a step may be slower than the baseline before it is
+        reported as a regression
+    result_tolerance : float, optional
+        relative tolerance when comparing the analysis summaries
+
+    Returns
+    -------
+    passed : bool
+        indicates whether no regressions or result differences were found
+    '''
+    passed = True
+    rows = []
+
+    for name, result in results.items():
+        if name not in baseline['cases']:
+            print(TextColor.YELLOW+f"{name}: not in the baseline, skipped"+TextColor.END)
+            continue
+        base = baseline['cases'][name]
+
+        for step in STEPS:
+            ratio = result['timings'][step]/base['timings'][step] if base['timings'][step] > 0 else np.nan
+            regression = ratio > 1+time_tolerance
+            passed = passed and not regression
+            rows.append((
+                name,
+                step,
+                base['timings'][step],
+                result['timings'][step],
+                ratio,
+                base['peak_memory'].get(step, np.nan),
+                result['peak_memory'].get(step, np.nan),
+                'REGRESSION' if regression else '',
+            ))
+
+        differences = compare_summaries(result['summary'], base['summary'], tolerance=result_tolerance)
+        if differences:
+            passed = False
+            print(TextColor.RED+TextColor.BOLD+f"{name}: results differ from the baseline"+TextColor.END)
+            for difference in differences:
+                print(TextColor.RED+f"  {difference}"+TextColor.END)
+        else:
+            print(TextColor.GREEN+f"{name}: results match the baseline"+TextColor.END)
+
+    columns = [
+        'Case',
+        'Step',
+        'Baseline (s)',
+        'Current (s)',
+        'Ratio',
+        'Baseline Peak (MiB)',
+        'Current Peak (MiB)',
+        'Status',
+    ]
+    print(pd.DataFrame(rows, columns=columns).round(4).to_string(index=False))
+
+    return passed
+
+def print_results(results):
+    '''
+    Prints the timings and peak memory of each benchmark case.
+    '''
+    rows = [
+        (
+            name,
+            result['n_roof_bays'],
+            result['n_members'],
+            step,
+            result['timings'][step],
+            result['peak_memory'].get(step, np.nan),
+        )
+        for name, result in results.items() for step in STEPS
+    ]
+    columns = ['Case', 'Roof Bays', 'Members', 'Step', 'Time (s)', 'Peak Memory (MiB)']
+    print(pd.DataFrame(rows, columns=columns).round(4).to_string(index=False))
+
+def main(argv=None):
+    '''
+    Command line entry point of the benchmark suite.
+    '''
+    parser = argparse.ArgumentParser(description='Benchmark pondpy4tljh on synthetic roof layouts.')
+    parser.add_argument('--cases', nargs='+', default=['small', 'medium'], choices=list(BENCHMARK_CASES),
+                        help='named benchmark cases to run')
+    parser.add_argument('--bays', type=int, help='number of roof bays of a custom case')
+    parser.add_argument('--secondary', type=int, nargs='+', default=[5, 80],
+                        help='number, or minimum and maximum number, of secondary members per bay of a custom case')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic layouts')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs per case')
+    parser.add_argument('--workers', type=int, help='number of worker processes for the analysis')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory run')
+    parser.add_argument('--save-baseline', metavar='PATH', help='save the results as a baseline JSON file')
+    parser.add_argument('--compare', metavar='PATH', help='compare the results against a baseline JSON file')
+    parser.add_argument('--time-tolerance', type=float, default=0.25,
+                        help='allowed fractional slowdown against the baseline')
+    parser.add_argument('--result-tolerance', type=float, default=0,
+                        help='relative tolerance when comparing results against the baseline')
+    args = parser.parse_args(argv)
+
+    if args.bays is not None:
+        cases = {f'custom-{args.bays}':create_synthetic_input(args.bays, tuple(args.secondary), seed=args.seed)}
+    else:
+        cases = {name:get_benchmark_case(name, seed=args.seed) for name in args.cases}
+
+    results = {}
+    for name, user_input in cases.items():
+        print(TextColor.DARKCYAN+TextColor.BOLD+f"Running {name} ({user_input['n_roof_bays']} roof bays)..."+TextColor.END)
+        results[name] = run_case(user_input, repeat=args.repeat, workers=args.workers, memory=not args.no_memory)
+
+    print_results(results)
+
+    if args.save_baseline:
+        baseline = {
+            'format':BASELINE_FORMAT,
+            'python':platform.python_version(),
+            'pondpy':version('pondpy'),
+            'seed':args.seed,
+            'cases':results,
+        }
+        with open(args.save_baseline, 'w') as f:
+            json.dump(baseline, f)
+        print(TextColor.GREEN+TextColor.BOLD+f"Baseline saved to {args.save_baseline}"+TextColor.END)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('format') != BASELINE_FORMAT:
+            raise ValueError(f'{args.compare} is not a compatible baseline file')
+        if not compare_to_baseline(results, baseline, args.time_tolerance, args.result_tolerance):
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
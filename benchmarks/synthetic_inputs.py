@@ -0,0 +1,126 @@
+import numpy as np
+
+# Member sizes used to build the synthetic roof layouts. Every joist size is
+# valid over the full range of secondary spans.
+SYNTHETIC_BEAMS = ['W12X16', 'W14X22', 'W16X26', 'W18X35']
+SYNTHETIC_GIRDERS = ['W24X68', 'W27X84', 'W30X99', 'W33X118']
+SYNTHETIC_JOISTS = ['16K4', '18K5', '20K5', '22K6', '24K7', '20KCS3', '24KCS4']
+SYNTHETIC_SPANS = [20, 25, 30]
+
+# Largest primary member length; wider secondary layouts are packed tighter.
+# Spacings are whole multiples of 6 in so that the secondary member locations
+# are exact in floating point and never fall just off a primary model node.
+MAX_PRIMARY_LENGTH = 40
+MAX_SECONDARY_SPACING = 5
+SPACING_STEP = 0.5
+
+# Named benchmark cases as (number of roof bays, secondary members per bay)
+BENCHMARK_CASES = {
+    'small':(1, 5),
+    'medium':(10, 20),
+    'large':(100, 40),
+    'xlarge':(300, 80),
+}
+
+def create_synthetic_input(n_roof_bays, n_secondary, seed=0):
+    '''
+    Creates a synthetic roof layout in the package_input schema with a mix
+    of W-shape and K/KCS-series joist secondary members.
+
+    Parameters
+    ----------
+    n_roof_bays : int
+        number of roof bays
+    n_secondary : int or tuple
+        number of secondary members in each roof bay, or a (minimum, maximum)
+        pair from which the number is drawn for each roof bay
+    seed : int, optional
+        seed of the random number generator, so that the same arguments
+        always create the same layout
+
+    Returns
+    -------
+    user_input : dict
+        dictionary of keyword arguments for analyze_roof_bays and
+        show_analysis_summary
+    '''
+    rng = np.random.default_rng(seed)
+
+    if isinstance(n_secondary, int):
+        n_secondary = (n_secondary, n_secondary)
+    if n_secondary[0] < 2:
+        raise ValueError('each roof bay must have at least 2 secondary members')
+
+    user_input = {
+        'project_name':'Synthetic Benchmark',
+        'project_number':'',
+        'calc_description':[],
+        'beam_sizes':SYNTHETIC_BEAMS+SYNTHETIC_GIRDERS,
+        'joist_sizes':list(SYNTHETIC_JOISTS),
+        'n_roof_bays':n_roof_bays,
+        'primary_members_size':[],
+        'primary_members_length':[],
+        'primary_members_support':[],
+        'secondary_members_size':[],
+        'secondary_members_length':[],
+        'secondary_members_support':[],
+        'roof_bay_mirrored':[],
+        'roof_slope':[],
+        'dead_load_input':[],
+        'rain_load_input':[],
+        'include_self_weight':True,
+    }
+
+    for bay in range(n_roof_bays):
+        cur_n_secondary = int(rng.integers(n_secondary[0], n_secondary[1]+1))
+        spacing = min(MAX_SECONDARY_SPACING, MAX_PRIMARY_LENGTH/(cur_n_secondary-1))
+        spacing = max(SPACING_STEP, SPACING_STEP*int(spacing/SPACING_STEP))
+        primary_length = spacing*(cur_n_secondary-1)
+        secondary_length = int(rng.choice(SYNTHETIC_SPANS))
+
+        girder = str(rng.choice(SYNTHETIC_GIRDERS))
+        secondary_sizes = [
+            str(rng.choice(SYNTHETIC_BEAMS)) if rng.random() < 0.3 else str(rng.choice(SYNTHETIC_JOISTS))
+            for _ in range(cur_n_secondary)
+        ]
+
+        user_input['calc_description'].append(f'Synthetic Bay {bay+1}')
+        user_input['primary_members_size'].append([girder, girder])
+        user_input['primary_members_length'].append([primary_length, primary_length])
+        user_input['primary_members_support'].append([[(0, 'pinned'), (primary_length, 'pinned')]]*2)
+        user_input['secondary_members_size'].append(secondary_sizes)
+        user_input['secondary_members_length'].append([secondary_length]*cur_n_secondary)
+        user_input['secondary_members_support'].append([[(0, 'pinned'), (secondary_length, 'pinned')]]*cur_n_secondary)
+        user_input['roof_bay_mirrored'].append((bool(rng.random() < 0.5), bool(rng.random() < 0.5)))
+        user_input['roof_slope'].append(float(rng.choice([0.125, 0.25, 0.5])))
+        user_input['dead_load_input'].append(int(rng.integers(15, 26)))
+        user_input['rain_load_input'].append((
+            round(float(rng.uniform(1, 3)), 2),
+            round(float(rng.uniform(0.5, 2)), 2),
+        ))
+
+    return user_input
+
+def get_benchmark_case(name, seed=0):
+    '''
+    Creates the synthetic input of a named benchmark case.
+
+    Parameters
+    ----------
+    name : str
+        name of the benchmark case, one of the keys of BENCHMARK_CASES
+    seed : int, optional
+        seed of the random number generator
+
+    Returns
+    -------
+    user_input : dict
+        dictionary of keyword arguments for analyze_roof_bays and
+        show_analysis_summary
+    '''
+    if name not in BENCHMARK_CASES:
+        raise KeyError(f'{name} is not a benchmark case; expected one of {list(BENCHMARK_CASES)}')
+
+    n_roof_bays, n_secondary = BENCHMARK_CASES[name]
+
+    return create_synthetic_input(n_roof_bays, n_secondary, seed=seed)
@@ -1,22 +1,201 @@
-from pondpy4tljh.helpers.helpers import (
-    create_and_analyze_pondpy_models,
-    package_input,
-    validate_input,
-)
-
-from pondpy4tljh.helpers.widget_helpers import (
-    create_plot_widget,
-    create_rain_plot_widget,
-)
+import importlib
+import sys
+import types
 
+# Importing pondpy4tljh is kept cheap: the exports below are only imported
+# from their modules when first accessed, so pondpy, steelpy, joistpy,
+# pandas, matplotlib, and ipywidgets are loaded on first use instead of at
+# kernel start. The exceptions and TextColor have no dependencies and are
+# imported directly.
 from pondpy4tljh.helpers.exceptions import (
     BeamSizeError,
     JoistSizeError,
+    InputValidationError,
     InvalidSupportError,
+    print_validation_error,
 )
 
 from pondpy4tljh.helpers.text_colors import TextColor
 
-from .analyze_roof_bay import analyze_roof_bays
+_LAZY_EXPORTS = {
+    'pondpy4tljh.helpers.event_log':[
+        'EventLog',
+    ],
+    'pondpy4tljh.helpers.profiler':[
+        'Profiler',
+        'get_profiler',
+    ],
+    'pondpy4tljh.helpers.helpers':[
+        'AVAILABLE_BEAMS',
+        'AVAILABLE_JOISTS',
+        'analyze_bay',
+        'create_active_sizes',
+        'create_and_analyze_pondpy_models',
+        'create_bay_framing',
+        'create_loading',
+        'create_pondpy_model',
+        'create_supports',
+        'get_available_beams',
+        'get_available_joists',
+        'get_bay_description',
+        'get_bay_input',
+        'package_input',
+        'reset_framing_loads',
+    ],
+    'pondpy4tljh.helpers.convergence':[
+        'CONVERGENCE_COLUMNS',
+        'get_convergence',
+        'get_convergence_table',
+        'get_impounded_depth',
+        'perform_iterative_analysis',
+    ],
+    'pondpy4tljh.helpers.interning':[
+        'clear_interned',
+        'get_interned_counts',
+        'intern_object',
+        'perform_shared_analysis',
+        'share_bay_solutions',
+    ],
+    'pondpy4tljh.helpers.validation':[
+        'collect_input_errors',
+        'collect_load_errors',
+        'validate_candidate_sizes',
+        'validate_input',
+        'validate_load_input',
+    ],
+    'pondpy4tljh.helpers.section_index':[
+        'build_section_index',
+        'get_section_index',
+        'lookup_section',
+        'normalize_designation',
+        'suggest_sections',
+    ],
+    'pondpy4tljh.helpers.capacity_helpers':[
+        'clear_capacity_table',
+        'get_capacity',
+        'get_capacity_table',
+        'get_member_capacity',
+        'precompute_capacities',
+    ],
+    'pondpy4tljh.helpers.result_cache':[
+        'ResultCache',
+        'get_bay_key',
+        'store_in_cache',
+    ],
+    'pondpy4tljh.helpers.result_store':[
+        'BayResults',
+        'RoofBayResults',
+        'compact_model',
+    ],
+    'pondpy4tljh.helpers.result_helpers':[
+        'DEFAULT_L_OVER_D_LIMIT',
+        'SUMMARY_COLUMNS',
+        'UTILIZATION_COLUMNS',
+        'add_utilization_columns',
+        'create_summary_table',
+        'get_demand_ratios',
+        'get_diagram_results',
+        'get_member_diagrams',
+        'get_member_pass',
+        'get_member_results',
+        'get_model_results',
+        'get_summary_rollup',
+        'round_summary_row',
+        'summarize_model',
+    ],
+    'pondpy4tljh.helpers.roof_layout':[
+        'load_roof_layout',
+        'save_roof_layout',
+    ],
+    'pondpy4tljh.helpers.project_io':[
+        'load_project_file',
+        'normalize_project_input',
+        'save_project_file',
+    ],
+    'pondpy4tljh.helpers.project_archive':[
+        'load_project_archive',
+        'save_project_archive',
+    ],
+    'pondpy4tljh.helpers.rain_depth':[
+        'get_rain_depth_grid',
+        'get_roof_mosaic',
+        'plot_rain_depth_grid',
+        'plot_roof_mosaic',
+    ],
+    'pondpy4tljh.helpers.plot_renderer':[
+        'MemberPlotRenderer',
+        'RainPlotRenderer',
+    ],
+    'pondpy4tljh.helpers.job_queue':[
+        'JobQueue',
+        'run_job_service',
+    ],
+    'pondpy4tljh.helpers.analysis_handle':[
+        'AnalysisHandle',
+    ],
+    'pondpy4tljh.helpers.report':[
+        'render_bay_figures',
+        'write_report',
+    ],
+    'pondpy4tljh.helpers.widget_helpers':[
+        'create_plot_widget',
+        'create_rain_plot_widget',
+    ],
+    'pondpy4tljh.analyze_roof_bay':[
+        'analyze_roof_bays',
+    ],
+    'pondpy4tljh.analyze_roof_bays_async':[
+        'analyze_roof_bays_async',
+    ],
+    'pondpy4tljh.submit_roof_bays':[
+        'submit_roof_bays',
+    ],
+    'pondpy4tljh.export_report':[
+        'export_report',
+    ],
+    'pondpy4tljh.show_analysis_summary':[
+        'show_analysis_summary',
+    ],
+    'pondpy4tljh.sweep_roof_bays':[
+        'sweep_roof_bays',
+    ],
+    'pondpy4tljh.optimize_roof_bays':[
+        'optimize_roof_bays',
+    ],
+}
+
+_EXPORT_MODULES = {
+    name:module for module, names in _LAZY_EXPORTS.items() for name in names
+}
+
+__all__ = [
+    'BeamSizeError',
+    'JoistSizeError',
+    'InputValidationError',
+    'InvalidSupportError',
+    'print_validation_error',
+    'TextColor',
+] + list(_EXPORT_MODULES)
+
+class _LazyModule(types.ModuleType):
+    '''
+    Module type of the pondpy4tljh package. Importing a submodule binds it
+    as an attribute of the package, which would shadow the function of the
+    same name (e.g. show_analysis_summary), so those bindings are skipped.
+    '''
+    def __setattr__(self, name, value):
+        if isinstance(value, types.ModuleType) and name in _EXPORT_MODULES:
+            return
+        super().__setattr__(name, value)
+
+sys.modules[__name__].__class__ = _LazyModule
+
+def __getattr__(name):
+    if name in _EXPORT_MODULES:
+        value = getattr(importlib.import_module(_EXPORT_MODULES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-from .show_analysis_summary import show_analysis_summary
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORT_MODULES))
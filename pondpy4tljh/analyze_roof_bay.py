@@ -1,49 +1,115 @@
+from contextlib import nullcontext
+
 from pondpy4tljh import (
-    BeamSizeError,
-    JoistSizeError,
-    InvalidSupportError,
-    TextColor,
+    EventLog,
+    InputValidationError,
     create_and_analyze_pondpy_models,
+    get_profiler,
     package_input,
+    print_validation_error,
     validate_input,
 )
 
-def analyze_roof_bays(**kwargs):
+def analyze_roof_bays(workers=None, cache=None, progress=True, log_path=None, event_log=None, profile=None, compact=False, compact_dtype='float64', previous_models=None, warm_start=False, **kwargs):
     '''
     Performs the analysis of all roof bays specified by the user.
 
     Parameters
     ----------
+    workers : int, optional
+        number of worker processes used to analyze the roof bays in parallel.
+        If None or 1, the roof bays are analyzed sequentially.
+    cache : ResultCache or bool, optional
+        on-disk cache of analyzed roof bays. Unchanged roof bays are loaded
+        from the cache and only new or edited roof bays are reanalyzed. If
+        True, a ResultCache with the default location and size cap is used.
+        Cached roof bays are returned as BayResults objects.
+    progress : bool, optional
+        indicates whether a live progress bar is shown in notebooks
+    log_path : str, optional
+        path of a JSON lines file that each analysis event is appended to
+    event_log : EventLog, optional
+        event log that records the events and per-stage durations of the run
+        (packaging, validation, model build, and analysis). Pass an EventLog
+        to inspect the durations afterwards with get_stage_durations(). If
+        provided, progress and log_path are ignored.
+    profile : Profiler or bool, optional
+        Profiler that records the wall time, function call count, and peak
+        memory of each stage and a cProfile profile of the run. If True, a
+        new Profiler is used and its timing report is printed at the end of
+        the run. When profiling, the roof bays are analyzed sequentially so
+        that all of the work is captured, and event_log is ignored.
+    compact : bool, optional
+        indicates whether a RoofBayResults object holding only the node
+        locations, member diagrams, and impounded rain depths in contiguous
+        arrays is returned instead of the full pondpy.PondPyModel objects. It
+        can be passed to show_analysis_summary and the plot widgets in place
+        of the models, and saved with its save() method.
+    compact_dtype : str or numpy.dtype, optional
+        floating point type of the compact result arrays. 'float32' halves
+        their memory at the cost of precision.
+    previous_models : list or RoofBayResults, optional
+        results returned by a previous call to analyze_roof_bays. The input
+        of each roof bay is compared with the roof bays of the previous run,
+        and only new or edited roof bays are rebuilt and reanalyzed; the
+        others are reused. The reused and reanalyzed roof bays are printed
+        when progress is True and recorded as a bays_reanalyzed event.
+    warm_start : bool, optional
+        indicates whether the reanalyzed roof bays start their ponding
+        iteration from the impounded rain depth of the same roof bay in
+        previous_models, which cuts the number of iterations after a small
+        load or size change. The iteration counts, residuals, and solve times
+        of each roof bay are returned by get_convergence_table.
     kwargs : key, value pair
         key, value pair to be entered into the dictionary
         
     Returns
     -------
-    pondpy_models : list
-        list of pondpy.PondPyModel objects representing each roof bay
+    pondpy_models : list or RoofBayResults
+        list of pondpy.PondPyModel objects representing each roof bay, in
+        input order, or their compact results if compact is True. Roof bays
+        that failed to analyze are left as None.
+    '''
+    profiler = get_profiler(profile, progress=progress, log_path=log_path)
+    if profiler is not None:
+        event_log = profiler
+        workers = None
+    elif event_log is None:
+        event_log = EventLog(progress=progress, log_path=log_path)
+
+    with profiler.profiling() if profiler is not None else nullcontext():
+        pondpy_models = _analyze_roof_bays(
+            event_log=event_log, workers=workers, cache=cache, compact=compact, compact_dtype=compact_dtype, previous_models=previous_models,
+            warm_start=warm_start, **kwargs,
+        )
+
+    if profile is True:
+        profiler.print_report()
+
+    return pondpy_models
+
+def _analyze_roof_bays(event_log, workers, cache, compact, compact_dtype, previous_models, warm_start, **kwargs):
+    '''
+    Packages, validates, and analyzes the roof bays, recording each stage in
+    the event log.
     '''
     # Package up input from the user using the package_input() helper function
-    print(TextColor.DARKCYAN+TextColor.BOLD+"Packing up the user input..."+TextColor.END)
-    user_input = package_input(**kwargs)
+    with event_log.stage('packaging'):
+        user_input = package_input(**kwargs)
 
     # Validate the user input using the validate_input() helper function
-    print(TextColor.DARKCYAN+TextColor.BOLD+"Validating the input..."+TextColor.END)
     try:
-        validate_input(user_input)
-        print(TextColor.GREEN+TextColor.BOLD+"Input successfully validated!"+TextColor.END)
+        with event_log.stage('validation'):
+            validate_input(user_input)
         
         # Create the pondpy models
-        pondpy_models = create_and_analyze_pondpy_models(user_input=user_input)
+        pondpy_models = create_and_analyze_pondpy_models(
+            user_input=user_input, workers=workers, cache=cache, event_log=event_log,
+            compact=compact, compact_dtype=compact_dtype, previous_models=previous_models,
+            warm_start=warm_start,
+        )
 
         return pondpy_models
 
-    except KeyError as e:
-        print(TextColor.RED+TextColor.BOLD+f"Validation failed!\nExpected {e} as input key but did not receive it. Please check your inputs.")
-    except TypeError as e:
-        print(TextColor.RED+TextColor.BOLD+f"Validation failed!\nAn error occurred: {e}.\nPlease check your inputs."+TextColor.END)
-    except BeamSizeError as e:
-        print(TextColor.RED+TextColor.BOLD+f"Validation failed!\nBeam size {e} is not a valid size.\nIt is either not yet available, or does not exist."+TextColor.END)
-    except JoistSizeError as e:
-        print(TextColor.RED+TextColor.BOLD+f"Validation failed!\nJoist size {e} is not a valid size.\nIt is either not yet available, or does not exist."+TextColor.END)
-    except InvalidSupportError as e:
-        print(TextColor.RED+TextColor.BOLD+f"Validation failed!\n{e} is not a valid support type."+TextColor.END)        
+    except (InputValidationError, KeyError) as e:
+        print_validation_error(e)
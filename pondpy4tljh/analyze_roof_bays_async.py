@@ -0,0 +1,86 @@
+from pondpy4tljh import (
+    AnalysisHandle,
+    EventLog,
+    InputValidationError,
+    package_input,
+    print_validation_error,
+    validate_input,
+)
+
+def analyze_roof_bays_async(workers=None, cache=None, progress=True, log_path=None, event_log=None, compact=False, compact_dtype='float64', previous_models=None, warm_start=False, **kwargs):
+    '''
+    Starts the analysis of all roof bays specified by the user in the
+    background and returns immediately, so that the notebook stays
+    responsive while the roof bays are analyzed.
+
+    The returned AnalysisHandle holds each roof bay as soon as it is
+    analyzed. Its create_summary_widget(), create_plot_widget(), and
+    create_rain_plot_widget() functions create widgets that are updated as
+    the roof bays complete, cancel() stops the roof bays that have not
+    started yet, and result() waits for the analysis and returns the roof
+    bays in the format returned by analyze_roof_bays.
+
+    Parameters
+    ----------
+    workers : int, optional
+        number of worker processes used to analyze the roof bays in parallel.
+        If None or 1, the roof bays are analyzed one after another in a
+        background thread.
+    cache : ResultCache or bool, optional
+        on-disk cache of analyzed roof bays. Unchanged roof bays are loaded
+        from the cache and only new or edited roof bays are reanalyzed. If
+        True, a ResultCache with the default location and size cap is used.
+    progress : bool, optional
+        indicates whether a live progress bar is shown in notebooks
+    log_path : str, optional
+        path of a JSON lines file that each analysis event is appended to
+    event_log : EventLog, optional
+        event log that records the events and per-stage durations of the
+        run. If provided, progress and log_path are ignored.
+    compact : bool, optional
+        indicates whether each roof bay is reduced to its compact results as
+        soon as it is analyzed
+    compact_dtype : str or numpy.dtype, optional
+        floating point type of the compact result arrays
+    previous_models : list or RoofBayResults, optional
+        results returned by a previous call to analyze_roof_bays or
+        AnalysisHandle.result(). Roof bays with unchanged inputs are reused
+        instead of being reanalyzed.
+    warm_start : bool, optional
+        indicates whether the reanalyzed roof bays start their ponding
+        iteration from the impounded rain depth of the same roof bay in
+        previous_models
+    kwargs : key, value pair
+        key, value pair to be entered into the dictionary
+
+    Returns
+    -------
+    handle : AnalysisHandle
+        handle of the analysis running in the background, or None if the
+        input failed validation
+    '''
+    if event_log is None:
+        event_log = EventLog(progress=progress, log_path=log_path)
+
+    # Package up input from the user using the package_input() helper function
+    with event_log.stage('packaging'):
+        user_input = package_input(**kwargs)
+
+    # Validate the user input using the validate_input() helper function.
+    # Validation runs before returning, so input errors are reported
+    # immediately instead of from the background analysis.
+    try:
+        with event_log.stage('validation'):
+            validate_input(user_input)
+
+        # Submit the roof bays to the executor
+        handle = AnalysisHandle(
+            user_input=user_input, workers=workers, cache=cache, event_log=event_log,
+            compact=compact, compact_dtype=compact_dtype, previous_models=previous_models,
+            warm_start=warm_start,
+        )
+
+        return handle
+
+    except (InputValidationError, KeyError) as e:
+        print_validation_error(e)
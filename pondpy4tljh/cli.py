@@ -0,0 +1,268 @@
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack, redirect_stderr, redirect_stdout
+
+from pondpy4tljh import (
+    InputValidationError,
+    TextColor,
+    analyze_bay,
+    create_active_sizes,
+    create_summary_table,
+    get_bay_description,
+    get_bay_input,
+    load_project_file,
+    package_input,
+    print_validation_error,
+    run_job_service,
+    summarize_model,
+    validate_input,
+)
+
+OUTPUT_FORMATS = ['csv', 'parquet']
+# Escape sequences of the TextColor styles
+_ANSI_PATTERN = re.compile(r'\033\[[0-9;]*m')
+
+class _PlainTextStream:
+    '''
+    Wraps an output stream and removes the TextColor escape sequences from
+    everything written to it. Used for output that does not go to a
+    terminal, e.g. the log of a headless run.
+    '''
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        return self.stream.write(_ANSI_PATTERN.sub('', text))
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def _is_terminal(stream):
+    '''
+    Determines whether an output stream is a terminal.
+    '''
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+def analyze_and_summarize_bay(bay_input, active_sizes):
+    '''
+    Analyzes a single roof bay and returns its summary rows. Defined at module
+    level so that it can be sent to worker processes; only the summary rows
+    are sent back instead of the analyzed model.
+
+    Parameters
+    ----------
+    bay_input : dict
+        dictionary containing the input for the roof bay created by the
+        get_bay_input helper function
+    active_sizes : dict
+        dictionary of pondpy.SteelBeamSize and pondpy.SteelJoistSize objects
+        created by the create_active_sizes helper function
+
+    Returns
+    -------
+    rows : list
+        list of summary rows created by the summarize_model helper function
+    '''
+    return summarize_model(analyze_bay(bay_input, active_sizes))
+
+def load_project(path):
+    '''
+    Reads and validates a project file.
+
+    Parameters
+    ----------
+    path : str
+        path of the project file
+
+    Returns
+    -------
+    user_input : dict
+        dictionary containing the validated user input, or None if the
+        project file could not be read or is not valid
+    '''
+    try:
+        user_input = package_input(**load_project_file(path))
+        validate_input(user_input)
+    except OSError as e:
+        print(TextColor.RED+TextColor.BOLD+f"{path}: could not read the project file.\n{e}"+TextColor.END, file=sys.stderr)
+    except (InputValidationError, KeyError) as e:
+        print_validation_error(e, path=path, file=sys.stderr)
+    except (ValueError, TypeError, ImportError) as e:
+        # Unsupported or malformed project files, or files that do not hold
+        # a table of input keys
+        print(TextColor.RED+TextColor.BOLD+f"{path}: {e}"+TextColor.END, file=sys.stderr)
+    else:
+        return user_input
+
+def get_output_path(path, output_dir=None, output_format='csv'):
+    '''
+    Returns the path of the summary file written for a project file.
+    '''
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if output_dir is None:
+        output_dir = os.path.dirname(os.path.abspath(path))
+
+    return os.path.join(output_dir, f'{stem}_summary.{output_format}')
+
+def write_summary(analysis_summary, path, output_format='csv'):
+    '''
+    Writes an analysis summary to a CSV or Parquet file.
+    '''
+    if output_format == 'csv':
+        analysis_summary.to_csv(path, index=False)
+    elif output_format == 'parquet':
+        try:
+            analysis_summary.to_parquet(path, index=False)
+        except ImportError:
+            raise ImportError('writing Parquet files requires the pyarrow or fastparquet package')
+    else:
+        raise ValueError(f'output_format must be one of {OUTPUT_FORMATS}')
+
+def run_projects(paths, workers=None):
+    '''
+    Analyzes the roof bays of one or more project files and creates the
+    analysis summary of each project. The roof bays of all projects are
+    analyzed in a single pool of worker processes.
+
+    Parameters
+    ----------
+    paths : list
+        list of project file paths
+    workers : int, optional
+        number of worker processes used to analyze the roof bays. If None or
+        1, the roof bays are analyzed sequentially.
+
+    Returns
+    -------
+    summaries : dict
+        dictionary of analysis summaries keyed by project file path. Projects
+        that could not be read or validated are left out.
+    failures : dict
+        dictionary of {roof bay index:exception} dictionaries for the roof
+        bays that failed to analyze, keyed by project file path
+    '''
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise TypeError('workers must be a positive integer or None')
+
+    projects = {}
+    tasks = []
+    for path in paths:
+        user_input = load_project(path)
+        if user_input is None:
+            continue
+
+        active_sizes = create_active_sizes(user_input)
+        bay_inputs = [get_bay_input(user_input, bay) for bay in range(user_input['n_roof_bays'])]
+        projects[path] = user_input
+        tasks.extend((path, bay, bay_input, active_sizes) for bay, bay_input in enumerate(bay_inputs))
+
+    results = {}
+    failures = {path:{} for path in projects}
+
+    if workers is None or workers == 1 or len(tasks) <= 1:
+        for path, bay, bay_input, active_sizes in tasks:
+            try:
+                results[(path, bay)] = analyze_and_summarize_bay(bay_input, active_sizes)
+            except Exception as e:
+                failures[path][bay] = e
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(analyze_and_summarize_bay, bay_input, active_sizes):(path, bay)
+                for path, bay, bay_input, active_sizes in tasks
+            }
+            for future in as_completed(futures):
+                path, bay = futures[future]
+                try:
+                    results[(path, bay)] = future.result()
+                except Exception as e:
+                    failures[path][bay] = e
+
+    summaries = {}
+    for path, user_input in projects.items():
+        bays = [bay for bay in range(user_input['n_roof_bays']) if (path, bay) in results]
+        summaries[path] = create_summary_table(
+            [results[(path, bay)] for bay in bays],
+            [get_bay_description(user_input, bay) for bay in bays],
+        )
+
+    return summaries, failures
+
+def main(argv=None):
+    '''
+    Command-line entry point for running project files without a notebook,
+    or for running the job service of the hub's shared job queue.
+
+    Returns
+    -------
+    exit_code : int
+        0 if every project and roof bay was analyzed (or the job service
+        stopped), otherwise 1
+    '''
+    # Messages are only colored on a terminal
+    with ExitStack() as stack:
+        if not _is_terminal(sys.stdout):
+            stack.enter_context(redirect_stdout(_PlainTextStream(sys.stdout)))
+        if not _is_terminal(sys.stderr):
+            stack.enter_context(redirect_stderr(_PlainTextStream(sys.stderr)))
+
+        return _main(argv)
+
+def _main(argv):
+    '''
+    Parses the command-line arguments and runs the command.
+    '''
+    parser = argparse.ArgumentParser(
+        prog='pondpy4tljh',
+        description='Run pondpy roof bay analyses from project files without a notebook.',
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='analyze project files and write their summaries')
+    run_parser.add_argument('projects', nargs='+', help='project files in the package_input schema (.json, .toml, .yaml) or roof layout spreadsheets (.csv, .xlsx)')
+    run_parser.add_argument('-o', '--output-dir', help='directory for the summary files (default: next to each project file)')
+    run_parser.add_argument('-f', '--format', default='csv', choices=OUTPUT_FORMATS, help='summary file format')
+    run_parser.add_argument('-w', '--workers', type=int, help='number of worker processes for the roof bays of all projects')
+
+    serve_parser = subparsers.add_parser('serve', help='run the job service that analyzes the roof bays submitted to the job queue')
+    serve_parser.add_argument('-q', '--queue', help='path of the job queue database (default: $PONDPY4TLJH_QUEUE or the shared temporary directory)')
+    serve_parser.add_argument('-w', '--workers', type=int, help='number of worker processes (default: number of CPUs)')
+    serve_parser.add_argument('--idle-timeout', type=float, help='stop after this many seconds without jobs')
+
+    args = parser.parse_args(argv)
+
+    # pondpy imports pyplot, so make sure no interactive backend is used
+    import matplotlib
+    matplotlib.use('Agg')
+
+    if args.command == 'serve':
+        run_job_service(args.queue, workers=args.workers, idle_timeout=args.idle_timeout)
+        return 0
+
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    summaries, failures = run_projects(args.projects, workers=args.workers)
+    exit_code = 0 if len(summaries) == len(args.projects) else 1
+
+    for path, analysis_summary in summaries.items():
+        output_path = get_output_path(path, args.output_dir, args.format)
+        write_summary(analysis_summary, output_path, args.format)
+
+        if failures[path]:
+            exit_code = 1
+            print(TextColor.RED+TextColor.BOLD+f"{path}: {len(failures[path])} roof bays failed to analyze:"+TextColor.END, file=sys.stderr)
+            for bay in sorted(failures[path]):
+                print(TextColor.RED+f"Roof bay {bay+1}: {failures[path][bay]}"+TextColor.END, file=sys.stderr)
+        print(TextColor.GREEN+TextColor.BOLD+f"{path}: summary written to {output_path}"+TextColor.END)
+
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
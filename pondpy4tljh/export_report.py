@@ -0,0 +1,64 @@
+from pondpy4tljh import (
+    DEFAULT_L_OVER_D_LIMIT,
+    InputValidationError,
+    TextColor,
+    package_input,
+    print_validation_error,
+    validate_input,
+    write_report,
+)
+
+def export_report(path, models, workers=None, kind='heatmap', members_per_page=6, dpi=150, l_over_d_limit=DEFAULT_L_OVER_D_LIMIT, **kwargs):
+    '''
+    Exports a calculation report of the analyzed roof bays to a PDF or HTML
+    file, with the governing member of each roof bay and, for each roof bay,
+    the summary table, the ponding iteration log, the member diagrams, and
+    the impounded rain depth plot. The report is written page by page, so
+    large projects can be exported without running out of memory.
+
+    Parameters
+    ----------
+    path : str
+        path of the report file, ending in .pdf or .html
+    models : list or RoofBayResults
+        list of analyzed pondpy.PondPyModel objects returned by
+        analyze_roof_bays, or their compact results. The iteration log is
+        only available for full models.
+    workers : int, optional
+        number of worker processes rendering the plots in parallel. If None
+        or 1, the plots are rendered in the current process.
+    kind : str, optional
+        'heatmap', 'contour', 'surface', or 'scatter' impounded rain depth
+        plots
+    members_per_page : int, optional
+        number of members drawn on each member diagram page
+    dpi : int, optional
+        resolution of the plot images
+    l_over_d_limit : int or float, optional
+        minimum span to deflection ratio for a member to pass
+    kwargs : key, value pair
+        key, value pair to be entered into the dictionary
+
+    Returns
+    -------
+    analysis_summary : pandas.DataFrame
+        analysis summary of the roof bays in the report, or None if the
+        input failed validation
+    '''
+    # Package up input from the user using the package_input() helper function
+    user_input = package_input(**kwargs)
+
+    # Validate the user input using the validate_input() helper function
+    try:
+        validate_input(user_input)
+
+        analysis_summary = write_report(
+            path, user_input, models, workers=workers, kind=kind,
+            members_per_page=members_per_page, dpi=dpi, l_over_d_limit=l_over_d_limit,
+        )
+        print(TextColor.GREEN+TextColor.BOLD+f"Report written to {path}"+TextColor.END)
+
+        return analysis_summary
+
+    except (InputValidationError, KeyError) as e:
+        print_validation_error(e)
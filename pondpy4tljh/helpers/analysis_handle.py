@@ -0,0 +1,440 @@
+import threading
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+
+from .convergence import get_impounded_depth
+from .event_log import EventLog
+from .helpers import (
+    analyze_bay,
+    create_active_sizes,
+    get_bay_description,
+    get_bay_input,
+    get_models_by_key,
+)
+from .result_cache import (
+    ResultCache,
+    get_bay_key,
+    store_in_cache,
+)
+from .result_store import (
+    BayResults,
+    RoofBayResults,
+    compact_model,
+)
+
+class AnalysisHandle:
+    '''
+    A class to represent an analysis of the roof bays running in the
+    background. The roof bays are analyzed on an executor while the notebook
+    stays responsive; each roof bay is stored in the handle as soon as it is
+    analyzed, and the summary and plot widgets created from the handle are
+    updated as the roof bays complete.
+
+    ...
+
+    Attributes
+    ----------
+    user_input : dict
+        dictionary containing the user input created by the package_input
+        helper function
+    models : list
+        pondpy.PondPyModel objects (or BayResults if compact) of each roof
+        bay, in input order. Roof bays that have not completed yet, failed,
+        or were cancelled are None.
+    failed : dict
+        exceptions of the roof bays that failed to analyze, keyed by roof bay
+        index
+    cancelled : list
+        indices of the roof bays that were cancelled before they ran
+    event_log : EventLog
+        event log that records the progress and stage durations of each roof
+        bay
+
+    Methods
+    -------
+    add_listener(listener):
+        Calls listener(handle) each time a roof bay completes.
+    cancel():
+        Cancels the roof bays that have not started yet.
+    create_plot_widget(**kwargs):
+        Creates a member plot widget that is updated as roof bays complete.
+    create_rain_plot_widget(**kwargs):
+        Creates a rain depth plot widget that is updated as roof bays
+        complete.
+    create_summary_widget():
+        Creates a widget showing the analysis summary of the completed roof
+        bays.
+    done():
+        Returns True if every roof bay has completed, failed, or been
+        cancelled.
+    get_summary():
+        Returns the analysis summary of the completed roof bays.
+    result(timeout=None):
+        Waits for the analysis to finish and returns the roof bays.
+    wait(timeout=None):
+        Waits for the analysis to finish.
+    '''
+    def __init__(self, user_input, workers=None, cache=None, event_log=None, compact=False, compact_dtype='float64', previous_models=None, warm_start=False):
+        '''
+        Constructs the required attributes for the AnalysisHandle object and
+        submits the roof bays to the executor.
+
+        Parameters
+        ----------
+        user_input : dict
+            dictionary containing the validated user input created by the
+            package_input helper function
+        workers : int, optional
+            number of worker processes used to analyze the roof bays. If None
+            or 1, the roof bays are analyzed one after another in a
+            background thread.
+        cache : ResultCache or bool, optional
+            on-disk cache of analyzed roof bays. If True, a ResultCache with
+            the default location and size cap is used.
+        event_log : EventLog, optional
+            event log that records the progress of each roof bay. A new
+            EventLog is created if not provided.
+        compact : bool, optional
+            indicates whether each roof bay is reduced to its compact results
+            as soon as it is analyzed
+        compact_dtype : str or numpy.dtype, optional
+            floating point type of the compact result arrays
+        previous_models : list or RoofBayResults, optional
+            results of a previous run. Roof bays whose inputs are unchanged
+            are reused instead of being reanalyzed.
+        warm_start : bool, optional
+            indicates whether the reanalyzed roof bays start their ponding
+            iteration from the impounded rain depth of the same roof bay in
+            previous_models
+        '''
+        if workers is not None and (not isinstance(workers, int) or workers < 1):
+            raise TypeError('workers must be a positive integer or None')
+        if not isinstance(warm_start, bool):
+            raise TypeError('warm_start must be either True or False')
+        if cache is True:
+            cache = ResultCache()
+        elif cache is False:
+            cache = None
+        elif cache is not None and not isinstance(cache, ResultCache):
+            raise TypeError('cache must be a ResultCache object, True, False, or None')
+        if event_log is None:
+            event_log = EventLog()
+
+        self.user_input = user_input
+        self.event_log = event_log
+        self.compact = compact
+        self.compact_dtype = compact_dtype
+        self.cache = cache
+
+        n_roof_bays = user_input['n_roof_bays']
+        bay_inputs = [get_bay_input(user_input, bay) for bay in range(n_roof_bays)]
+        self.bay_keys = [get_bay_key(bay_input) for bay_input in bay_inputs]
+
+        self.models = [None]*n_roof_bays
+        self.failed = {}
+        self.cancelled = []
+
+        # The roof bays complete in executor threads, so the results, the
+        # listeners, and the event log are only touched while holding the lock
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._summary_rows = {}
+        self._futures = {}
+        self._finished = threading.Event()
+
+        event_log.start_progress(total=n_roof_bays, description='Analyzing roof bays')
+
+        # Reuse the roof bays with unchanged inputs from the previous run or
+        # the cache before anything is submitted
+        previous_by_key = {}
+        if previous_models is not None:
+            previous_by_key = get_models_by_key(previous_models, compact=compact)
+        for bay in range(n_roof_bays):
+            if self.bay_keys[bay] in previous_by_key:
+                self._store_model(bay, previous_by_key[self.bay_keys[bay]], event='bay_reused')
+            elif cache is not None:
+                with event_log.stage('cache lookup', bay=bay):
+                    model = cache.get(self.bay_keys[bay])
+                if model is not None:
+                    self._store_model(bay, model, event='bay_cached')
+        pending_bays = [bay for bay in range(n_roof_bays) if self.models[bay] is None]
+        self._n_pending = len(pending_bays)
+        if previous_models is not None:
+            event_log.emit('bays_reanalyzed', reused=sum(key in previous_by_key for key in self.bay_keys), bays=pending_bays)
+
+        if not pending_bays:
+            self.executor = None
+            self._finished.set()
+            return
+
+        # A single worker runs in a thread so that the notebook kernel stays
+        # responsive without the cost of starting a worker process
+        active_sizes = create_active_sizes(user_input)
+        previous_depths = {}
+        if warm_start and previous_models is not None:
+            previous_depths = {
+                bay:get_impounded_depth(previous_models[bay])
+                for bay in pending_bays if bay < len(previous_models)
+            }
+        if workers is None or workers == 1:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            event_log.emit('pool_start', workers=workers, n_bays=len(pending_bays))
+
+        for bay in pending_bays:
+            future = self.executor.submit(analyze_bay, bay_inputs[bay], active_sizes, True, previous_depths.get(bay))
+            self._futures[future] = bay
+        for future, bay in list(self._futures.items()):
+            future.add_done_callback(self._on_done)
+
+    def __repr__(self):
+        progress = self.progress
+        state = 'done' if self.done() else 'running'
+        return f"AnalysisHandle({state}, {progress['Completed']}/{progress['Total']} roof bays completed, {progress['Failed']} failed, {progress['Cancelled']} cancelled)"
+
+    def _store_model(self, bay, model, event):
+        '''
+        Stores a completed roof bay and creates its summary rows.
+        '''
+        if self.compact and not isinstance(model, BayResults):
+            if not isinstance(model, dict):
+                model = compact_model(model)
+            model = RoofBayResults.from_models([model], dtype=self.compact_dtype)[0]
+
+        if isinstance(model, BayResults):
+            cur_rows = model.summarize()
+        else:
+            from .result_helpers import summarize_model
+            cur_rows = summarize_model(model)
+
+        with self._lock:
+            self.models[bay] = model
+            self._summary_rows[bay] = cur_rows
+            self.event_log.emit(event, bay=bay)
+            self.event_log.advance()
+
+    def _on_done(self, future):
+        '''
+        Stores the result of a roof bay when its future completes.
+        '''
+        bay = self._futures[future]
+        event_log = self.event_log
+
+        if future.cancelled():
+            with self._lock:
+                self.cancelled.append(bay)
+                event_log.emit('bay_cancelled', bay=bay)
+                event_log.advance(failed=True)
+        else:
+            try:
+                model, durations = future.result()
+                with self._lock:
+                    for stage, duration in durations.items():
+                        event_log.record_stage(stage, duration, bay=bay)
+                    if self.cache is not None:
+                        store_in_cache(self.cache, self.bay_keys[bay], model, event_log, bay=bay)
+                model.bay_key = self.bay_keys[bay]
+                self._store_model(bay, model, event='bay_complete')
+            except Exception as e:
+                with self._lock:
+                    self.failed[bay] = e
+                    event_log.emit('bay_failed', bay=bay, error=repr(e))
+                    event_log.advance(failed=True)
+
+        with self._lock:
+            self._n_pending -= 1
+            finished = self._n_pending == 0
+            listeners = list(self._listeners)
+
+        # A failing listener (e.g. a closed widget) must not stop the
+        # remaining roof bays from being recorded
+        for listener in listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                with self._lock:
+                    event_log.emit('listener_failed', bay=bay, error=repr(e))
+
+        if finished:
+            self.executor.shutdown(wait=False)
+            self._finished.set()
+
+    @property
+    def progress(self):
+        '''
+        Returns the number of roof bays that are completed, failed,
+        cancelled, and still pending.
+        '''
+        with self._lock:
+            return {
+                'Total':len(self.models),
+                'Completed':sum(model is not None for model in self.models),
+                'Failed':len(self.failed),
+                'Cancelled':len(self.cancelled),
+                'Pending':self._n_pending,
+            }
+
+    def add_listener(self, listener):
+        '''
+        Calls listener(handle) each time a roof bay completes, fails, or is
+        cancelled. Listeners are called from the executor's thread.
+
+        Parameters
+        ----------
+        listener : callable
+            function called with the AnalysisHandle object
+        '''
+        with self._lock:
+            self._listeners.append(listener)
+
+    def cancel(self):
+        '''
+        Cancels the roof bays that have not started yet. Roof bays that are
+        already being analyzed run to completion and are kept.
+
+        Returns
+        -------
+        n_cancelled : int
+            number of roof bays that were cancelled
+        '''
+        n_cancelled = sum(future.cancel() for future in list(self._futures))
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+        return n_cancelled
+
+    def done(self):
+        '''
+        Returns True if every roof bay has completed, failed, or been
+        cancelled.
+        '''
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        '''
+        Waits for the analysis to finish.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            maximum number of seconds to wait
+
+        Returns
+        -------
+        done : bool
+            indicates whether the analysis finished before the timeout
+        '''
+        return self._finished.wait(timeout)
+
+    def result(self, timeout=None):
+        '''
+        Waits for the analysis to finish and returns the roof bays, in the
+        format returned by analyze_roof_bays.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            maximum number of seconds to wait
+
+        Returns
+        -------
+        pondpy_models : list or RoofBayResults
+            list of pondpy.PondPyModel objects for each roof bay, or their
+            compact results if compact is True. Roof bays that failed or were
+            cancelled are left as None.
+        '''
+        if not self.wait(timeout):
+            raise TimeoutError('the analysis did not finish before the timeout')
+
+        if self.compact:
+            return RoofBayResults.from_models(
+                [None if model is None else model.to_dict() for model in self.models], dtype=self.compact_dtype,
+            )
+
+        return list(self.models)
+
+    def get_summary(self):
+        '''
+        Returns the analysis summary of the roof bays completed so far, in
+        the format of show_analysis_summary.
+
+        Returns
+        -------
+        analysis_summary : pandas.DataFrame
+        '''
+        from .result_helpers import create_summary_table
+
+        with self._lock:
+            bays = sorted(self._summary_rows)
+            descriptions = [get_bay_description(self.user_input, bay) for bay in bays]
+            bay_rows = [self._summary_rows[bay] for bay in bays]
+
+        return create_summary_table(bay_rows, descriptions)
+
+    def _create_updating_widget(self, create_widget, **kwargs):
+        '''
+        Creates a plot widget from the completed roof bays and registers a
+        listener that adds the roof bays as they complete.
+        '''
+        with self._lock:
+            widget = create_widget(self.get_summary(), list(self.models), **kwargs)
+            self.add_listener(lambda handle: widget.update(handle.get_summary(), list(handle.models)))
+
+        return widget
+
+    def create_plot_widget(self, **kwargs):
+        '''
+        Creates the member plot widget of create_plot_widget, whose roof bay
+        and member dropdowns are updated as the roof bays complete.
+
+        Parameters
+        ----------
+        kwargs : key, value pair
+            keyword arguments passed to create_plot_widget
+        '''
+        from .widget_helpers import create_plot_widget
+
+        return self._create_updating_widget(create_plot_widget, **kwargs)
+
+    def create_rain_plot_widget(self, **kwargs):
+        '''
+        Creates the rain depth plot widget of create_rain_plot_widget, whose
+        roof bay dropdown is updated as the roof bays complete.
+
+        Parameters
+        ----------
+        kwargs : key, value pair
+            keyword arguments passed to create_rain_plot_widget
+        '''
+        from .widget_helpers import create_rain_plot_widget
+
+        return self._create_updating_widget(create_rain_plot_widget, **kwargs)
+
+    def create_summary_widget(self):
+        '''
+        Creates a widget showing the analysis summary of the completed roof
+        bays, which is redrawn each time a roof bay completes.
+
+        Returns
+        -------
+        summaryW : ipywidgets.Output
+        '''
+        from ipywidgets import Output
+
+        summaryW = Output()
+
+        def show_summary(handle):
+            # Output widgets cannot capture display() calls made from other
+            # threads, so the summary is appended as display data
+            summary = handle.get_summary()
+            summaryW.clear_output(wait=True)
+            summaryW.append_display_data(summary)
+
+        with self._lock:
+            show_summary(self)
+            self.add_listener(show_summary)
+
+        return summaryW
@@ -0,0 +1,190 @@
+import pandas as pd
+from joistpy import sji
+from steelpy import aisc
+
+from pondpy import (
+    SteelBeamDesign,
+    SteelJoistDesign,
+)
+
+from .helpers import (
+    get_available_beams,
+    get_available_joists,
+)
+
+# Session-wide table of member capacities keyed by the capacity key
+_CAPACITY_TABLE = {}
+
+def get_capacity_key(section_type, name, span, unbraced_length=0):
+    '''
+    Creates the key used to look up a member capacity in the capacity table.
+    AISC beam capacities do not depend on the span and SJI joist capacities
+    do not depend on the unbraced length, so those entries are left out of
+    the key to share capacities between members.
+
+    Parameters
+    ----------
+    section_type : str
+        section type of the member, either 'AISC' or 'SJI'
+    name : str
+        name of the member size (e.g. 'W12X16' or '14K1')
+    span : int or float
+        span of the member in inches
+    unbraced_length : int or float, optional
+        unbraced length of the member
+
+    Returns
+    -------
+    capacity_key : tuple
+        (section type, name, span, unbraced length) key
+    '''
+    if section_type == 'AISC':
+        return (section_type, name.upper(), None, float(unbraced_length))
+    elif section_type == 'SJI':
+        return (section_type, name.upper(), float(span), None)
+    else:
+        raise TypeError(f'section_type {section_type} is not a valid section type')
+
+def _compute_capacity(section_type, properties, span, unbraced_length):
+    '''
+    Computes the ASD moment and shear capacity of a member using the pondpy
+    design classes.
+    '''
+    if section_type == 'AISC':
+        design = SteelBeamDesign(section=properties, unbraced_length=unbraced_length)
+        return {
+            'Moment':design.get_moment_capacity(),
+            'Shear':design.get_shear_capacity(),
+        }
+    elif section_type == 'SJI':
+        design = SteelJoistDesign(designation=properties, span=span)
+        return {
+            'Moment':design.get_moment_capacity(),
+            'Shear':design.get_shear_capacity()[1],
+        }
+
+def get_capacity(size, span, unbraced_length=0):
+    '''
+    Returns the moment and shear capacity of a member size, computing it
+    only the first time each (section, span, unbraced length) combination is
+    requested in the session.
+
+    Parameters
+    ----------
+    size : pondpy.SteelBeamSize or pondpy.SteelJoistSize
+        size of the member
+    span : int or float
+        span of the member in inches
+    unbraced_length : int or float, optional
+        unbraced length of the member
+
+    Returns
+    -------
+    capacity : dict
+        dictionary containing the ASD moment capacity in k-ft ('Moment') and
+        shear capacity in k ('Shear')
+    '''
+    key = get_capacity_key(size.section_type, size.name, span, unbraced_length)
+    if key not in _CAPACITY_TABLE:
+        _CAPACITY_TABLE[key] = _compute_capacity(size.section_type, size.properties, span, unbraced_length)
+
+    return dict(_CAPACITY_TABLE[key])
+
+def get_member_capacity(beam_model, unbraced_length=0):
+    '''
+    Returns the moment and shear capacity of the member of an analyzed
+    pondpy.BeamModel object.
+
+    Parameters
+    ----------
+    beam_model : pondpy.BeamModel
+        pondpy.BeamModel object for a primary or secondary member
+    unbraced_length : int or float, optional
+        unbraced length of the member
+
+    Returns
+    -------
+    capacity : dict
+        dictionary containing the ASD moment capacity in k-ft ('Moment') and
+        shear capacity in k ('Shear')
+    '''
+    return get_capacity(beam_model.beam.size, beam_model.beam.length, unbraced_length=unbraced_length)
+
+def precompute_capacities(spans=(), unbraced_lengths=(0,)):
+    '''
+    Fills the capacity table in bulk for all available beams and joists.
+    Joist spans outside of the SJI load tables are skipped.
+
+    Parameters
+    ----------
+    spans : list, optional
+        list of joist spans in inches for which to compute the joist
+        capacities
+    unbraced_lengths : list, optional
+        list of unbraced lengths for which to compute the beam capacities
+
+    Returns
+    -------
+    n_computed : int
+        number of capacities added to the table
+    '''
+    n_computed = 0
+
+    for beam in get_available_beams():
+        for unbraced_length in unbraced_lengths:
+            key = get_capacity_key('AISC', beam, None, unbraced_length)
+            if key in _CAPACITY_TABLE:
+                continue
+            _CAPACITY_TABLE[key] = _compute_capacity('AISC', aisc.W_shapes.sections[beam], None, unbraced_length)
+            n_computed += 1
+
+    for joist in get_available_joists():
+        if joist.startswith('KCS_'):
+            properties = sji.KCS_Series.designations[joist]
+        else:
+            properties = sji.K_Series.designations[joist]
+        name = joist.split('_', 1)[1]
+
+        for span in spans:
+            key = get_capacity_key('SJI', name, span)
+            if key in _CAPACITY_TABLE:
+                continue
+            try:
+                _CAPACITY_TABLE[key] = _compute_capacity('SJI', properties, span, None)
+            except (IndexError, ValueError):
+                # Span exceeds the allowable span for the joist or the load
+                # table has no data for the joist
+                continue
+            n_computed += 1
+
+    return n_computed
+
+def get_capacity_table():
+    '''
+    Returns the capacities computed so far in the session.
+
+    Returns
+    -------
+    capacity_table : pandas.DataFrame
+        DataFrame with one row per (section, span, unbraced length)
+        combination
+    '''
+    columns = [
+        'Section Type',
+        'Member Size',
+        'Span (in)',
+        'Unbraced Length',
+        'Moment Capacity (k-ft)',
+        'Shear Capacity (k)',
+    ]
+    rows = [
+        (*key, capacity['Moment'], capacity['Shear']) for key, capacity in _CAPACITY_TABLE.items()
+    ]
+
+    return pd.DataFrame(rows, columns=columns)
+
+def clear_capacity_table():
+    '''
+    Removes all entries from the capacity table.
+    '''
+    _CAPACITY_TABLE.clear()
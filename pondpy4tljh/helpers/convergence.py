@@ -0,0 +1,335 @@
+import time
+
+import numpy as np
+
+CONVERGENCE_COLUMNS = [
+    'Roof Bay',
+    'Iterations',
+    'Converged',
+    'Warm Start',
+    'Final Weight (k)',
+    'Final Residual',
+    'Time (s)',
+]
+
+def get_static_head(pondpy_model):
+    '''
+    Returns the depth in inches of the static rain head at the low end of the
+    secondary members of a pondpy.PondPyModel object, i.e. the depth the
+    ponding iteration starts from.
+    '''
+    return float(pondpy_model.roof_bay_model.initial_impounded_depth['Secondary'][0][0])
+
+def _get_static_depth(nodes, static_head, roof_slope):
+    '''
+    Returns the impounded depth of the static rain head at the nodes of a
+    secondary member, computed the same way as pondpy.
+    '''
+    if roof_slope == 0:
+        return np.full(len(nodes), static_head)
+    return np.where(nodes <= static_head/roof_slope, static_head - roof_slope*nodes, 0.0)
+
+def get_impounded_depth(model):
+    '''
+    Returns the impounded rain depth of each secondary member of an analyzed
+    roof bay, e.g. to warm start the analysis of the same roof bay after a
+    small change.
+
+    Parameters
+    ----------
+    model : pondpy.PondPyModel or BayResults
+        analyzed roof bay
+
+    Returns
+    -------
+    previous_depth : dict
+        dictionary containing the static rain head in inches ('Static Head')
+        and lists of the node locations ('Nodes') and impounded depth
+        ('Depth') in inches of each secondary member, or None if the model is
+        None or its static rain head was not recorded
+    '''
+    if model is None:
+        return None
+    if hasattr(model, 'get_secondary_depths'):
+        convergence = model.get_convergence()
+        if convergence is None:
+            return None
+        static_head = convergence['Static Head']
+        nodes, depths = model.get_secondary_depths()
+    else:
+        s_models = model.roof_bay_model.secondary_models
+        static_head = get_static_head(model)
+        nodes = [s_model.model_nodes for s_model in s_models]
+        depths = [model.impounded_depth['Secondary'][i_smodel] for i_smodel in range(len(s_models))]
+
+    return {
+        'Static Head':static_head,
+        'Nodes':[np.array(cur_nodes, dtype=float) for cur_nodes in nodes],
+        'Depth':[np.array(cur_depth, dtype=float) for cur_depth in depths],
+    }
+
+def get_initial_depth(pondpy_model, previous_depth):
+    '''
+    Converts the impounded rain depth of a previous run into the initial
+    impounded depth of an unanalyzed pondpy.PondPyModel object.
+
+    The previous depth is split into its static rain head and the ponding
+    caused by the deflection of the members. Only the ponding is carried
+    over, on top of the static rain head of the new model, so that a change
+    of the rain load does not seed the iteration with the old head. The
+    previous depth can only be used if the secondary members have the same
+    node locations, i.e. the roof bay geometry is unchanged.
+
+    Parameters
+    ----------
+    pondpy_model : pondpy.PondPyModel
+        unanalyzed pondpy.PondPyModel object
+    previous_depth : dict
+        dictionary created by the get_impounded_depth helper function
+
+    Returns
+    -------
+    impounded_depth : dict
+        impounded depth in the format of pondpy.PondPyModel.impounded_depth,
+        or None if the node locations differ
+    '''
+    s_models = pondpy_model.roof_bay_model.secondary_models
+    if previous_depth is None or len(previous_depth['Nodes']) != len(s_models):
+        return None
+
+    roof_slope = pondpy_model.roof_bay.secondary_framing.slope/12
+    static_head = get_static_head(pondpy_model)
+
+    impounded_depth = {}
+    for i_smodel, s_model in enumerate(s_models):
+        nodes = previous_depth['Nodes'][i_smodel]
+        if not np.array_equal(nodes, np.asarray(s_model.model_nodes, dtype=float)):
+            return None
+
+        ponding = previous_depth['Depth'][i_smodel] - _get_static_depth(nodes, previous_depth['Static Head'], roof_slope)
+        depth = np.maximum(_get_static_depth(nodes, static_head, roof_slope) + ponding, 0.0)
+        impounded_depth[i_smodel] = depth.tolist()
+
+    return {'Secondary':impounded_depth}
+
+def format_iteration_log(weight, time_elapsed):
+    '''
+    Formats the impounded water weight of each iteration and the solve time
+    as the iteration log of pondpy.PondPyModel (its out_str attribute).
+
+    Parameters
+    ----------
+    weight : list
+        impounded water weight in kips of each iteration
+    time_elapsed : float
+        solve time in seconds
+
+    Returns
+    -------
+    out_str : str
+        iteration log
+    '''
+    out_str = 'Iteration\t|\tWater Weight (k)\t|\tDifference\n'
+    for iteration, cur_weight in enumerate(weight):
+        cur_weight = float(cur_weight)
+        if iteration > 0:
+            diff = (cur_weight - float(weight[iteration-1]))/float(weight[iteration-1])
+            out_str += f'{iteration}\t\t|\t{round(cur_weight,2)}\t\t\t|\t{round(diff,5)}\n'
+        else:
+            out_str += f'{iteration}\t\t|\t{round(cur_weight,2)}\t\t\t|\t----\n'
+    out_str += f'Analysis finished in {round(time_elapsed, 2)} s.'
+
+    return out_str
+
+def perform_iterative_analysis(pondpy_model, previous_depth=None):
+    '''
+    Performs the iterative ponding analysis of a pondpy.PondPyModel object,
+    recording the convergence of each iteration.
+
+    The iterations are the same as the ones of
+    pondpy.PondPyModel.perform_analysis, so a cold start gives identical
+    results. In addition to the impounded water weight ('Weight'), number of
+    iterations ('Iterations'), and solve time ('Time') returned by pondpy,
+    the relative change of the water weight ('Residual'), the duration of
+    each iteration ('Iteration Time'), whether the stop criterion was met
+    ('Converged'), and the static rain head in inches ('Static Head') are
+    stored in the iter_results attribute of the model.
+
+    A warm start seeds the first iteration with the impounded depth of a
+    previous run instead of the initial depth, which cuts the number of
+    iterations after a small load or size change. The water weight can then
+    decrease towards the solution, so the stop criterion is applied to the
+    absolute residual.
+
+    Parameters
+    ----------
+    pondpy_model : pondpy.PondPyModel
+        unanalyzed pondpy.PondPyModel object
+    previous_depth : dict, optional
+        impounded rain depth of a previous run of the roof bay created by the
+        get_impounded_depth helper function. Ignored if the roof bay
+        geometry changed.
+
+    Returns
+    -------
+    output : dict
+        dictionary of output variables, also stored as the iter_results
+        attribute of the model
+    '''
+    roof_bay_model = pondpy_model.roof_bay_model
+
+    initial_depth = None
+    if previous_depth is not None:
+        initial_depth = get_initial_depth(pondpy_model, previous_depth)
+    warm_start = initial_depth is not None
+    if warm_start:
+        pondpy_model.impounded_depth = initial_depth
+
+    iteration = 0
+    impounded_weight = []
+    residuals = []
+    iteration_times = []
+    start = time.perf_counter()
+    while True:
+        iteration_start = time.perf_counter()
+        rain_load = roof_bay_model._get_secondary_rl(pondpy_model.impounded_depth)
+        roof_bay_model.analyze_roof_bay(rain_load=rain_load)
+        cur_impounded_weight = pondpy_model._calculate_impounded_weight(pondpy_model.impounded_depth)
+        impounded_weight.append(cur_impounded_weight)
+
+        if iteration > 0:
+            diff = (impounded_weight[iteration] - impounded_weight[iteration-1])/impounded_weight[iteration-1]
+            residuals.append(diff)
+        else:
+            diff = 1
+            residuals.append(np.nan)
+
+        # pondpy stops on the signed residual, which is kept for a cold start
+        # so that the results are unchanged
+        converged = (abs(diff) if warm_start else diff) <= pondpy_model.stop_criterion
+        if converged or iteration >= pondpy_model.max_iter:
+            iteration_times.append(time.perf_counter() - iteration_start)
+            time_elapsed = time.perf_counter() - start
+            pondpy_model.out_str = format_iteration_log(impounded_weight, time_elapsed)
+            if pondpy_model.show_results:
+                print(pondpy_model.out_str)
+
+            output = {
+                'Weight':impounded_weight,
+                'Iterations':iteration,
+                'Time':time_elapsed,
+                'Residual':residuals,
+                'Iteration Time':iteration_times,
+                'Converged':bool(converged),
+                'Warm Start':warm_start,
+                'Static Head':get_static_head(pondpy_model),
+            }
+
+            pondpy_model.analysis_complete = True
+            pondpy_model.iter_results = output
+
+            return output
+
+        pondpy_model.impounded_depth = pondpy_model._calculate_next_impounded_depth()
+        iteration_times.append(time.perf_counter() - iteration_start)
+        iteration += 1
+
+def get_residuals(weight):
+    '''
+    Returns the relative change of the impounded water weight in each
+    iteration, as computed by pondpy. The first iteration has no residual
+    and is NaN.
+    '''
+    weight = np.asarray(weight, dtype=float)
+    residuals = np.full(len(weight), np.nan)
+    residuals[1:] = (weight[1:] - weight[:-1])/weight[:-1]
+
+    return residuals
+
+def get_convergence(model):
+    '''
+    Returns the convergence diagnostics of an analyzed roof bay.
+
+    Parameters
+    ----------
+    model : pondpy.PondPyModel or BayResults
+        analyzed roof bay
+
+    Returns
+    -------
+    convergence : dict
+        dictionary containing the number of iterations ('Iterations'),
+        whether the stop criterion was met ('Converged'), whether the
+        analysis was warm started ('Warm Start'), the solve time in seconds
+        ('Time'), the static rain head in inches ('Static Head'), and the impounded water weight in kips ('Weight'), its
+        relative change ('Residual'), and the duration in seconds
+        ('Iteration Time') of each iteration. None if the model is None or
+        its convergence was not recorded. The iteration times are NaN for
+        models analyzed by pondpy.PondPyModel.perform_analysis.
+    '''
+    if model is None:
+        return None
+    if hasattr(model, 'get_convergence'):
+        return model.get_convergence()
+
+    iter_results = getattr(model, 'iter_results', None)
+    if not iter_results:
+        return None
+
+    weight = np.asarray(iter_results['Weight'], dtype=float)
+    residuals = get_residuals(weight)
+    if 'Converged' in iter_results:
+        converged = iter_results['Converged']
+    else:
+        # pondpy's own stopping test: the iteration stops before max_iter
+        # only when the stop criterion is met, and the first iteration has a
+        # difference of 1 instead of a residual
+        last_diff = residuals[-1] if len(weight) > 1 else 1
+        converged = iter_results['Iterations'] < model.max_iter or last_diff <= model.stop_criterion
+
+    return {
+        'Iterations':int(iter_results['Iterations']),
+        'Converged':bool(converged),
+        'Warm Start':bool(iter_results.get('Warm Start', False)),
+        'Time':float(iter_results['Time']),
+        'Static Head':get_static_head(model),
+        'Weight':weight,
+        'Residual':residuals,
+        'Iteration Time':np.asarray(iter_results.get('Iteration Time', np.full(len(weight), np.nan)), dtype=float),
+    }
+
+def get_convergence_table(models):
+    '''
+    Creates a table of the convergence diagnostics of each analyzed roof bay,
+    e.g. to find the roof bays that needed the most iterations.
+
+    Parameters
+    ----------
+    models : list or RoofBayResults
+        analyzed roof bays returned by analyze_roof_bays
+
+    Returns
+    -------
+    table : pandas.DataFrame
+        one row per roof bay with the columns in CONVERGENCE_COLUMNS. Roof
+        bays that failed to analyze or have no recorded convergence are
+        omitted.
+    '''
+    import pandas as pd
+
+    rows = []
+    for bay, model in enumerate(models):
+        convergence = get_convergence(model)
+        if convergence is None:
+            continue
+        rows.append((
+            bay+1,
+            convergence['Iterations'],
+            convergence['Converged'],
+            convergence['Warm Start'],
+            round(float(convergence['Weight'][-1]), 3),
+            float(convergence['Residual'][-1]),
+            round(convergence['Time'], 3),
+        ))
+
+    return pd.DataFrame(rows, columns=CONVERGENCE_COLUMNS)
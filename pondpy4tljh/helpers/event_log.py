@@ -0,0 +1,225 @@
+import json
+import time
+from contextlib import contextmanager
+
+STAGES = [
+    'packaging',
+    'validation',
+    'model build',
+    'analysis',
+    'summary',
+]
+
+def _in_notebook():
+    '''
+    Determines whether the code is running in a Jupyter kernel.
+    '''
+    try:
+        from IPython import get_ipython
+    except ImportError:
+        return False
+
+    shell = get_ipython()
+    return shell is not None and shell.__class__.__name__ == 'ZMQInteractiveShell'
+
+class EventLog:
+    '''
+    A class to represent the structured event log of an analysis run.
+
+    Every event is stored as a dictionary holding the event name, a
+    timestamp, and any extra fields (e.g. the roof bay and stage). Stages
+    are timed with the stage() context manager or recorded directly with
+    record_stage() when they were timed elsewhere (e.g. in a worker
+    process).
+
+    ...
+
+    Attributes
+    ----------
+    events : list
+        list of event dictionaries in the order they were emitted
+    log_path : str
+        path of the JSON lines file that each event is appended to, or None
+    progress : bool
+        indicates whether a live progress bar is shown in notebooks
+
+    Methods
+    -------
+    advance(n=1, failed=False):
+        Advances the progress bar by n roof bays.
+    emit(event, **fields):
+        Records an event.
+    get_stage_durations():
+        Returns the duration of each stage for each roof bay.
+    record_stage(stage, duration, bay=None):
+        Records a stage that was timed elsewhere.
+    stage(stage, bay=None):
+        Context manager that times a stage.
+    start_progress(total, description):
+        Starts a new progress bar.
+    '''
+    def __init__(self, progress=True, log_path=None):
+        '''
+        Constructs the required attributes for the EventLog object.
+
+        Parameters
+        ----------
+        progress : bool, optional
+            indicates whether a live progress bar is shown in notebooks
+        log_path : str, optional
+            path of a JSON lines file that each event is appended to
+        '''
+        if not isinstance(progress, bool):
+            raise TypeError('progress must be either True or False')
+
+        self.events = []
+        self.log_path = log_path
+        self.progress = progress
+
+        self._progress_bar = None
+        self._progress_label = None
+        self._progress_description = ''
+        self._n_failed = 0
+
+    def _update_label(self):
+        '''
+        Updates the text next to the progress bar.
+        '''
+        text = f'{self._progress_description} {self._progress_bar.value}/{self._progress_bar.max}'
+        if self._n_failed > 0:
+            text += f' ({self._n_failed} failed)'
+        self._progress_label.value = text
+
+    def advance(self, n=1, failed=False):
+        '''
+        Advances the progress bar by n roof bays.
+
+        Parameters
+        ----------
+        n : int, optional
+            number of roof bays completed
+        failed : bool, optional
+            indicates whether the completed roof bays failed
+        '''
+        if failed:
+            self._n_failed += n
+        if self._progress_bar is None:
+            return
+
+        self._progress_bar.value += n
+        if failed:
+            self._progress_bar.bar_style = 'danger'
+        elif self._progress_bar.value >= self._progress_bar.max and self._n_failed == 0:
+            self._progress_bar.bar_style = 'success'
+        self._update_label()
+
+    def emit(self, event, **fields):
+        '''
+        Records an event and appends it to the JSON lines log file.
+
+        Parameters
+        ----------
+        event : str
+            name of the event
+        fields : key, value pair
+            extra fields stored with the event
+        '''
+        record = {'event':event, 'time':time.time()}
+        record.update(fields)
+        self.events.append(record)
+
+        if self.log_path is not None:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(record, default=str)+'\n')
+
+        return record
+
+    def get_stage_durations(self):
+        '''
+        Returns the duration of each stage for each roof bay.
+
+        Returns
+        -------
+        stage_durations : pandas.DataFrame
+            DataFrame indexed by roof bay with one column per stage holding
+            the duration in seconds. Stages that are not specific to a roof
+            bay are reported under 'All'.
+        '''
+        import pandas as pd
+
+        rows = [
+            (event['bay']+1 if event.get('bay') is not None else 'All', event['stage'], event['duration'])
+            for event in self.events if event['event'] == 'stage_end'
+        ]
+        durations = pd.DataFrame(rows, columns=['Roof Bay', 'Stage', 'Duration (s)'])
+        stage_durations = durations.pivot_table(
+            index='Roof Bay', columns='Stage', values='Duration (s)', aggfunc='sum', sort=False,
+        )
+        stage_order = [stage for stage in STAGES if stage in stage_durations.columns]
+        stage_order += [stage for stage in stage_durations.columns if stage not in stage_order]
+
+        return stage_durations[stage_order]
+
+    def record_stage(self, stage, duration, bay=None):
+        '''
+        Records a stage that was timed elsewhere.
+
+        Parameters
+        ----------
+        stage : str
+            name of the stage
+        duration : float
+            duration of the stage in seconds
+        bay : int, optional
+            index of the roof bay the stage belongs to
+        '''
+        return self.emit('stage_end', stage=stage, bay=bay, duration=duration)
+
+    @contextmanager
+    def stage(self, stage, bay=None):
+        '''
+        Context manager that times a stage and records its start and end.
+
+        Parameters
+        ----------
+        stage : str
+            name of the stage
+        bay : int, optional
+            index of the roof bay the stage belongs to
+        '''
+        self.emit('stage_start', stage=stage, bay=bay)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.emit('stage_error', stage=stage, bay=bay, duration=time.perf_counter()-start, error=repr(e))
+            raise
+        self.record_stage(stage, time.perf_counter()-start, bay=bay)
+
+    def start_progress(self, total, description):
+        '''
+        Starts a new progress bar. The progress bar is only shown when the
+        progress attribute is True and the code is running in a notebook.
+
+        Parameters
+        ----------
+        total : int
+            number of roof bays to be completed
+        description : str
+            text shown next to the progress bar
+        '''
+        self._progress_description = description
+        self._n_failed = 0
+        self.emit('progress_start', total=total, description=description)
+
+        if not self.progress or not _in_notebook():
+            self._progress_bar = None
+            return
+
+        from IPython.display import display
+        from ipywidgets import HBox, IntProgress, Label
+
+        self._progress_bar = IntProgress(value=0, min=0, max=max(total, 1))
+        self._progress_label = Label()
+        self._update_label()
+        display(HBox([self._progress_bar, self._progress_label]))
@@ -1,3 +1,6 @@
+import sys
+
+from .text_colors import TextColor
 
 class BeamSizeError(Exception):
     pass
@@ -7,3 +10,58 @@ class JoistSizeError(Exception):
 
 class InvalidSupportError(Exception):
     pass
+
+class InputValidationError(ValueError):
+    '''
+    Raised when the user input is not valid. Every error found in the input
+    is kept in the errors attribute as a dictionary with the input key, roof
+    bay number, member label, and message of the error.
+    '''
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__(self.format_errors())
+
+    def format_errors(self):
+        '''
+        Returns the errors formatted one per line with their roof bay and
+        member coordinates.
+        '''
+        lines = [f'{len(self.errors)} input errors found:']
+        for error in self.errors:
+            location = [error['Key']]
+            if error['Roof Bay'] is not None:
+                location.append(f"roof bay {error['Roof Bay']}")
+            if error['Member'] is not None:
+                location.append(f"member {error['Member']}")
+            lines.append(f"{', '.join(location)}: {error['Message']}")
+        return '\n'.join(lines)
+
+    def get_error_table(self):
+        '''
+        Returns the errors as a pandas.DataFrame.
+        '''
+        import pandas as pd
+
+        return pd.DataFrame(self.errors, columns=['Key', 'Roof Bay', 'Member', 'Message'])
+
+def print_validation_error(error, path=None, file=None):
+    '''
+    Prints the message of an error raised while validating the user input.
+
+    Parameters
+    ----------
+    error : InputValidationError or KeyError
+        error raised by package_input or validate_input
+    path : str, optional
+        path of the project file the input was read from, used as the prefix
+        of the message
+    file : file-like object, optional
+        stream the message is printed to. Defaults to sys.stdout.
+    '''
+    header = f"{path}: validation failed!" if path is not None else "Validation failed!"
+    if isinstance(error, KeyError):
+        message = f"Expected {error} as input key but did not receive it."
+    else:
+        message = str(error)
+
+    print(TextColor.RED+TextColor.BOLD+f"{header}\n{message}\nPlease check your inputs."+TextColor.END, file=file if file is not None else sys.stdout)
@@ -1,6 +1,12 @@
+import copyreg
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 from joistpy import sji
+from joistpy.joistpy import Designation
 from steelpy import aisc
+from steelpy.steelpy import Section
 
 from pondpy import (
     Loading,
@@ -13,25 +19,117 @@ from pondpy import (
     SteelJoistSize,
 )
 
-from .exceptions import (
-    BeamSizeError,
-    JoistSizeError,
-    InvalidSupportError,
+from .convergence import get_impounded_depth
+from .event_log import EventLog
+
+from .interning import (
+    intern_object,
+    perform_shared_analysis,
+)
+
+from .section_index import (
+    get_section_index,
+    lookup_section,
+)
+
+from .result_cache import (
+    ResultCache,
+    get_bay_key,
+    store_in_cache,
+)
+
+from .result_store import (
+    BayResults,
+    RoofBayResults,
+    compact_model,
 )
 
 from .text_colors import (
     TextColor,
 )
 
-AVAILABLE_BEAMS = list(aisc.profiles['W_shapes'].sections.keys())
-AVAILABLE_JOISTS = list(sji.joist_type['K_Series'].designations.keys())
-AVAILABLE_JOISTS.extend(list(sji.joist_type['KCS_Series'].designations.keys()))
 CONV_PSF_TO_KSI = 1/144/1000
 VALID_SUPPORTS = {
     'ROLLER':(0, 1, 0),
     'PINNED':(1, 1, 0),
     'FIXED':(1, 1, 1),
 }
+BAY_INPUT_KEYS = [
+    'primary_members_size',
+    'primary_members_length',
+    'primary_members_support',
+    'secondary_members_size',
+    'secondary_members_length',
+    'secondary_members_support',
+    'roof_bay_mirrored',
+    'roof_slope',
+    'dead_load_input',
+    'rain_load_input',
+]
+
+def get_available_beams():
+    '''
+    Returns the names of the AISC W-shapes that can be used as beams, from
+    the section index.
+
+    Returns
+    -------
+    available_beams : list
+        list of W-shape names (e.g. 'W12X16')
+    '''
+    return [name for name, section in get_section_index().items() if section['type'] == 'AISC']
+
+def get_available_joists():
+    '''
+    Returns the names of the SJI K-series and KCS-series joist designations
+    that can be used as joists, from the section index.
+
+    Returns
+    -------
+    available_joists : list
+        list of joist designation names prefixed with the series (e.g.
+        'K_14K1' or 'KCS_20KCS3')
+    '''
+    return [section['table_key'] for section in get_section_index().values() if section['type'] == 'SJI']
+
+def __getattr__(name):
+    # AVAILABLE_BEAMS and AVAILABLE_JOISTS are kept as module attributes for
+    # backwards compatibility but are only built when first accessed. They
+    # are then stored as module globals, so later accesses do not rebuild
+    # them.
+    if name == 'AVAILABLE_BEAMS':
+        value = get_available_beams()
+    elif name == 'AVAILABLE_JOISTS':
+        value = get_available_joists()
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    globals()[name] = value
+    return value
+
+def _load_beam_section(name):
+    '''
+    Retrieves the steelpy section object for the given W-shape name. Used to
+    rebuild section objects when unpickling models in worker processes.
+    '''
+    return aisc.W_shapes.sections[name]
+
+def _load_joist_designation(name):
+    '''
+    Retrieves the joistpy designation object for the given designation name.
+    Used to rebuild designation objects when unpickling models in worker
+    processes.
+    '''
+    if name.startswith('KCS_'):
+        return sji.KCS_Series.designations[name]
+    else:
+        return sji.K_Series.designations[name]
+
+# steelpy and joistpy section objects cannot be unpickled as-is (their
+# __getattr__ recurses before the properties attribute is restored), so they
+# are pickled by name and looked up in the section tables on load instead.
+copyreg.pickle(Section, lambda section: (_load_beam_section, (section.name,)))
+copyreg.pickle(Designation, lambda designation: (_load_joist_designation, (designation.name,)))
 
 def package_input(**kwargs):
     '''
@@ -55,207 +153,493 @@ def package_input(**kwargs):
 
     return user_input
 
-def validate_input(user_input):
+def get_bay_description(user_input, bay):
     '''
-    Validates the input from the user and raises exceptions as necessary.
+    Returns the description of a roof bay used in the analysis summary.
 
     Parameters
     ----------
     user_input : dict
-        dictionary of all user input to be validated
+        dictionary containing the user input created by the package_input
+        helper function
+    bay : int
+        index of the roof bay
 
     Returns
     -------
-    input_valid : bool
-        bool indicating whether or not the user input is valid
-    '''
-    # Validate the input types
-    if not isinstance(user_input['project_name'], str):
-        raise TypeError('project_name must be a string')
-    if not isinstance(user_input['project_number'], str):
-        raise TypeError('project_number must be a string')
-    if not isinstance(user_input['calc_description'], list):
-        raise TypeError('calc_description must be a list')
-    if not all(isinstance(desc, str) for desc in user_input['calc_description']):
-        raise TypeError('each description in calc_description must be a string')
-    if not isinstance(user_input['beam_sizes'], list):
-        raise TypeError('beam_sizes must be a list')
-    if not all(isinstance(size, str) for size in user_input['beam_sizes']):
-        raise TypeError('each beam size in beam_sizes must be a string')
-    if not isinstance(user_input['joist_sizes'], list):
-        raise TypeError('joist_sizes must be a list')
-    if not all(isinstance(size, str) for size in user_input['joist_sizes']):
-        raise TypeError('each joist size in joist sizes must be a string')
-    if not isinstance(user_input['n_roof_bays'], int) or user_input['n_roof_bays'] < 0:
-        raise TypeError('n_roof_bays must be a non-negative integer')
-    if not isinstance(user_input['primary_members_size'], list):
-        raise TypeError('primary_members_size must be a list')
-    if not isinstance(user_input['primary_members_length'], list):
-        raise TypeError('primary_members_length msut be a list')
-    if not isinstance(user_input['primary_members_support'], list):
-        raise TypeError('primary_members_support must be a list')
-    if not isinstance(user_input['secondary_members_size'], list):
-        raise TypeError('secondary_members_size must be a list')
-    if not isinstance(user_input['secondary_members_length'], list):
-        raise TypeError('secondary_members_length must be a list')
-    if not isinstance(user_input['secondary_members_support'], list):
-        raise TypeError('secondary_members_support msut be a list')
-    if not isinstance(user_input['roof_bay_mirrored'], list):
-        raise TypeError('roof_bay_mirrored must be a list')
-    if not isinstance(user_input['roof_slope'], list):
-        raise TypeError('roof_slope must be a list')
-    if not isinstance(user_input['dead_load_input'], list):
-        raise TypeError('dead_load_input must be a list')
-    if not all(isinstance(dl, (int, float)) for dl in user_input['dead_load_input']):
-        raise TypeError('the surface dead load for each bay must be an integer or float')
-    if not isinstance(user_input['rain_load_input'], list):
-        raise TypeError('rain_load_input must be a list')
-    if not all(isinstance(rl, tuple) for rl in user_input['rain_load_input']):
-        raise TypeError('the rain load for each bay must be entered in a (static head, hydraulic head) pair')
-    if not isinstance(user_input['include_self_weight'], bool):
-        raise TypeError('include_self_weight must be either True or False')
-    
-    # Check that all input beam sizes are available
-    for size in user_input['beam_sizes']:
-        if size.upper() not in AVAILABLE_BEAMS:
-            raise BeamSizeError(f'{size}')
-        
-    # Check that all input joist sizes are available
-    for size in user_input['joist_sizes']:
-        if ('K_'+size.upper()) not in AVAILABLE_JOISTS and ('KCS_'+size.upper()) not in AVAILABLE_JOISTS:
-            raise JoistSizeError(f'{size}')
-        
-    # Check that all input primary support types are valid
-    for bay in user_input['primary_members_support']:
-        for mem in bay:
-            for support in mem:
-                if support[1].upper() not in VALID_SUPPORTS.keys():
-                    raise InvalidSupportError(f'{support[1]}')
-                
-    # Check that all input secondary support types are valid
-    for bay in user_input['secondary_members_support']:
-        for mem in bay:
-            for support in mem:
-                if support[1].upper() not in VALID_SUPPORTS.keys():
-                    raise InvalidSupportError(f'{support[1]}')
-                
-    # Check that the rain load input is valid
-    for bay in user_input['rain_load_input']:
-        if len(bay) != 2:
-            raise TypeError('the rain load for each bay must be entered in a (static head, hydraulic head) pair')
-        elif not all(isinstance(rl, (int, float)) or rl >= 0 for rl in bay):
-            raise TypeError('the static and hydraulic head must be non-negative int or float')
-    
-    return True
+    description : str
+        calc_description entry of the roof bay, or 'Roof Bay i' if it is
+        empty or missing
+    '''
+    try:
+        if user_input['calc_description'][bay] == '':
+            return f'Roof Bay {bay+1}'
+        else:
+            return user_input['calc_description'][bay]
+    except IndexError:
+        return f'Roof Bay {bay+1}'
         
-def create_and_analyze_pondpy_models(user_input):
+def get_bay_input(user_input, bay):
     '''
-    Creates the SteelBeamSize and SteelJoistSize objects for each beam and joist
-    size in the user input
+    Extracts the input for a single roof bay from the user input.
 
     Parameters
     ----------
     user_input : dict
         dictionary containing the user input created by the package_input
         helper function
+    bay : int
+        index of the roof bay
 
     Returns
+    -------
+    bay_input : dict
+        dictionary containing the per-bay entries of the user input along
+        with the include_self_weight flag
+    '''
+    bay_input = { key:user_input[key][bay] for key in BAY_INPUT_KEYS }
+    bay_input['include_self_weight'] = user_input['include_self_weight']
+
+    return bay_input
+
+def create_active_sizes(user_input):
+    '''
+    Creates the SteelBeamSize and SteelJoistSize objects for each beam and joist
+    size in the user input.
+
+    Parameters
     ----------
-    pondpy_models : list
-        list of pondpy.PondPyModel objects created for each roof bay in the
-        user input
+    user_input : dict
+        dictionary containing the user input created by the package_input
+        helper function
+
+    Returns
+    -------
+    active_sizes : dict
+        dictionary of pondpy.SteelBeamSize and pondpy.SteelJoistSize objects
+        keyed by the upper case size name
     '''
-    # Start by creating a dictionary of pondpy.SteelBeamSize and pondpy.SteelJoistSize
-    # objects for each beam and joist size in the user input
-    beams = { beam.upper():SteelBeamSize(name=beam.upper(), properties=aisc.W_shapes.sections[beam.upper()]) for beam in user_input['beam_sizes'] }
+    beams = {}
+    for beam in user_input['beam_sizes']:
+        section = lookup_section(beam, section_type='AISC')
+        beams[beam.upper()] = SteelBeamSize(name=beam.upper(), properties=aisc.W_shapes.sections[section['table_key']])
+
     joists = {}
     for joist in user_input['joist_sizes']:
-        if 'KCS' in joist.upper():
-            joists[joist.upper()] = SteelJoistSize(name=joist.upper(), properties=sji.KCS_Series.designations['KCS_'+joist.upper()])
-        else:
-            joists[joist.upper()] = SteelJoistSize(name=joist.upper(), properties=sji.K_Series.designations['K_'+joist.upper()])
-    active_sizes = beams | joists
-    
-    # Next create the pondpy.PrimaryMember and primary.SecondaryMember objects
-    # for each primary and secondary member in each roof bay
+        section = lookup_section(joist, section_type='SJI')
+        series = sji.joist_type[f"{section['family']}_Series"]
+        joists[joist.upper()] = SteelJoistSize(name=joist.upper(), properties=series.designations[section['table_key']])
+
+    return beams | joists
+
+def create_supports(member_support):
+    '''
+    Creates the pondpy support list for a member. pondpy only reads the
+    support lists, so identical supports are created once and shared by every
+    member and roof bay that uses them.
+
+    Parameters
+    ----------
+    member_support : list
+        list of (location in ft, support type) pairs for the member
+
+    Returns
+    -------
+    supports : list
+        shared list of [location in inches, restraint tuple] pairs
+    '''
+    key = tuple((float(support[0]), support[1].upper()) for support in member_support)
+
+    return intern_object(
+        'supports', key, lambda: [[location*12, VALID_SUPPORTS[support_type]] for location, support_type in key],
+    )
+
+def create_bay_framing(bay_input, active_sizes):
+    '''
+    Creates the load-independent pondpy.PrimaryFraming and
+    pondpy.SecondaryFraming objects for a single roof bay.
+
+    Parameters
+    ----------
+    bay_input : dict
+        dictionary containing the input for the roof bay created by the
+        get_bay_input helper function
+    active_sizes : dict
+        dictionary of pondpy.SteelBeamSize and pondpy.SteelJoistSize objects
+        created by the create_active_sizes helper function
+
+    Returns
+    -------
+    framing : tuple
+        (pondpy.PrimaryFraming, pondpy.SecondaryFraming) pair for the roof bay
+    '''
+    # Create the pondpy.PrimaryMember and primary.SecondaryMember objects
+    # for each primary and secondary member in the roof bay. The load lists
+    # are passed explicitly because the pondpy.Beam defaults are shared
+    # mutable lists, which would leak loads between members and roof bays.
+    # The members are modified by the analysis and cannot be shared, but
+    # their sizes and support lists are.
     primary_members = []
+    for mem in range(len(bay_input['primary_members_size'])):
+        cur_size = active_sizes[bay_input['primary_members_size'][mem].upper()]
+        cur_length = bay_input['primary_members_length'][mem]*12
+        cur_supports = create_supports(bay_input['primary_members_support'][mem])
+
+        primary_members.append(PrimaryMember(
+            length=cur_length,
+            size=cur_size,
+            supports=cur_supports,
+            ploads=[],
+            dloads=[],
+        ))
+
     secondary_members = []
+    for mem in range(len(bay_input['secondary_members_size'])):
+        cur_size = active_sizes[bay_input['secondary_members_size'][mem].upper()]
+        cur_length = bay_input['secondary_members_length'][mem]*12
+        cur_supports = create_supports(bay_input['secondary_members_support'][mem])
 
-    for bay in range(user_input['n_roof_bays']):
-
-        cur_primary_members = []
-        for mem in range(len(user_input['primary_members_size'][bay])):
-            cur_supports = []
-            cur_size = active_sizes[user_input['primary_members_size'][bay][mem].upper()]
-            cur_length = user_input['primary_members_length'][bay][mem]*12
-            for support in user_input['primary_members_support'][bay][mem]:
-                cur_supports.append([support[0]*12, VALID_SUPPORTS[support[1].upper()]])
-            
-            cur_primary_members.append(PrimaryMember(
-                length=cur_length,
-                size=cur_size,
-                supports=cur_supports
-            ))
-
-        cur_secondary_members = []
-        for mem in range(len(user_input['secondary_members_size'][bay])):
-            cur_supports = []
-            cur_size = active_sizes[user_input['secondary_members_size'][bay][mem].upper()]
-            cur_length = user_input['secondary_members_length'][bay][mem]*12
-            for support in user_input['secondary_members_support'][bay][mem]:
-                cur_supports.append([support[0]*12, VALID_SUPPORTS[support[1].upper()]])
-            
-            cur_secondary_members.append(SecondaryMember(
-                length=cur_length,
-                size=cur_size,
-                supports=cur_supports
-            ))
-
-        primary_members.append(cur_primary_members)
-        secondary_members.append(cur_secondary_members)
+        secondary_members.append(SecondaryMember(
+            length=cur_length,
+            size=cur_size,
+            supports=cur_supports,
+            ploads=[],
+            dloads=[],
+        ))
 
     # Next create the pondpy.PrimaryFraming and pondpy.SecondaryFraming
-    # objects for each roof bay
-    primary_framing = []
-    secondary_framing = []
-    
-    for bay in range(user_input['n_roof_bays']):
-        primary_framing.append(PrimaryFraming(primary_members=primary_members[bay]))
-        secondary_framing.append(SecondaryFraming(secondary_members=secondary_members[bay], slope=user_input['roof_slope'][bay]))
+    # objects for the roof bay
+    primary_framing = PrimaryFraming(primary_members=primary_members)
+    secondary_framing = SecondaryFraming(secondary_members=secondary_members, slope=abs(bay_input['roof_slope']))
 
-    # Next create the pondpy.Loading object for each roof bay
-    loading = []
+    return primary_framing, secondary_framing
 
-    for bay in range(user_input['n_roof_bays']):
-        dead_load = user_input['dead_load_input'][bay]*CONV_PSF_TO_KSI
-        rain_load = np.array(user_input['rain_load_input'][bay]).sum()*5.2*CONV_PSF_TO_KSI
+def reset_framing_loads(framing):
+    '''
+    Clears the loads that a previous analysis applied to the members of a
+    roof bay's framing so that the framing can be reused for another
+    pondpy.PondPyModel object.
 
-        loading.append(Loading(dead_load=dead_load, rain_load=rain_load, include_sw=user_input['include_self_weight']))
+    Parameters
+    ----------
+    framing : tuple
+        (pondpy.PrimaryFraming, pondpy.SecondaryFraming) pair created by the
+        create_bay_framing helper function
 
-    # Finally create the pondpy.PondPyModel object for each roof bay
-    pondpy_models = []
+    Returns
+    -------
+    None
+    '''
+    primary_framing, secondary_framing = framing
+    for member in primary_framing.primary_members + secondary_framing.secondary_members:
+        member.ploads = []
+        member.dloads = []
 
-    for bay in range(user_input['n_roof_bays']):
+def create_loading(dead_load_input, rain_load_input, include_self_weight):
+    '''
+    Creates the pondpy.Loading object for a single roof bay. pondpy only
+    reads the loading, so identical loadings are created once and shared by
+    every roof bay that uses them.
 
-        print(TextColor.DARKCYAN+TextColor.BOLD+f"Creating the PondPyModel objects for roof bay {bay+1}..."+TextColor.END)
-        
-        cur_model = PondPyModel(
-            primary_framing=primary_framing[bay],
-            secondary_framing=secondary_framing[bay],
-            loading=loading[bay],
-            mirrored_left=user_input['roof_bay_mirrored'][bay][0],
-            mirrored_right=user_input['roof_bay_mirrored'][bay][1],
-            show_results=False,
-        )
+    Parameters
+    ----------
+    dead_load_input : int or float
+        collateral dead load in psf
+    rain_load_input : tuple
+        (static head, hydraulic head) pair in inches
+    include_self_weight : bool
+        indicates whether the member self-weight is included
+
+    Returns
+    -------
+    loading : pondpy.Loading
+        shared pondpy.Loading object for the roof bay
+    '''
+    dead_load = dead_load_input*CONV_PSF_TO_KSI
+    rain_load = np.array(rain_load_input).sum()*5.2*CONV_PSF_TO_KSI
+
+    return intern_object(
+        'loading', (float(dead_load), float(rain_load), include_self_weight),
+        lambda: Loading(dead_load=dead_load, rain_load=rain_load, include_sw=include_self_weight),
+    )
+
+def create_pondpy_model(bay_input, active_sizes, framing=None):
+    '''
+    Creates the pondpy.PondPyModel object for a single roof bay.
+
+    Parameters
+    ----------
+    bay_input : dict
+        dictionary containing the input for the roof bay created by the
+        get_bay_input helper function
+    active_sizes : dict
+        dictionary of pondpy.SteelBeamSize and pondpy.SteelJoistSize objects
+        created by the create_active_sizes helper function
+    framing : tuple, optional
+        (pondpy.PrimaryFraming, pondpy.SecondaryFraming) pair created by the
+        create_bay_framing helper function. Created from bay_input if not
+        provided.
+
+    Returns
+    -------
+    pondpy_model : pondpy.PondPyModel
+        unanalyzed pondpy.PondPyModel object for the roof bay
+    '''
+    if framing is None:
+        framing = create_bay_framing(bay_input=bay_input, active_sizes=active_sizes)
+    primary_framing, secondary_framing = framing
+
+    loading = create_loading(
+        dead_load_input=bay_input['dead_load_input'],
+        rain_load_input=bay_input['rain_load_input'],
+        include_self_weight=bay_input['include_self_weight'],
+    )
+
+    return PondPyModel(
+        primary_framing=primary_framing,
+        secondary_framing=secondary_framing,
+        loading=loading,
+        mirrored_left=bay_input['roof_bay_mirrored'][0],
+        mirrored_right=bay_input['roof_bay_mirrored'][1],
+        show_results=False,
+    )
+
+def analyze_bay(bay_input, active_sizes, return_durations=False, previous_depth=None):
+    '''
+    Creates and analyzes the pondpy.PondPyModel object for a single roof bay.
+    Defined at module level so that it can be sent to worker processes.
+
+    Parameters
+    ----------
+    bay_input : dict
+        dictionary containing the input for the roof bay created by the
+        get_bay_input helper function
+    active_sizes : dict
+        dictionary of pondpy.SteelBeamSize and pondpy.SteelJoistSize objects
+        created by the create_active_sizes helper function
+    return_durations : bool, optional
+        indicates whether the durations of the model build and analysis
+        stages are returned along with the model
+    previous_depth : dict, optional
+        impounded rain depth of a previous run of the roof bay created by the
+        get_impounded_depth helper function, used to warm start the analysis
+
+    Returns
+    -------
+    pondpy_model : pondpy.PondPyModel
+        analyzed pondpy.PondPyModel object for the roof bay
+    durations : dict
+        dictionary of stage durations in seconds, only returned if
+        return_durations is True
+    '''
+    start = time.perf_counter()
+    pondpy_model = create_pondpy_model(bay_input=bay_input, active_sizes=active_sizes)
+    built = time.perf_counter()
+    perform_shared_analysis(pondpy_model, previous_depth=previous_depth)
+    analyzed = time.perf_counter()
+
+    if return_durations:
+        return pondpy_model, {'model build':built-start, 'analysis':analyzed-built}
+
+    return pondpy_model
+
+def get_models_by_key(models, compact=False):
+    '''
+    Maps the analyzed roof bays of a run to the hashes of their inputs.
+
+    Parameters
+    ----------
+    models : list or RoofBayResults
+        pondpy.PondPyModel objects or compact results returned by a previous
+        call to create_and_analyze_pondpy_models
+    compact : bool, optional
+        indicates whether the roof bays are reused as compact results. Full
+        models can be reduced to compact results, but compact results cannot
+        be reused as full models.
+
+    Returns
+    -------
+    models_by_key : dict
+        dictionary of reusable roof bays keyed by the hash of their inputs
+    '''
+    models_by_key = {}
+    for model in models:
+        bay_key = getattr(model, 'bay_key', None)
+        if model is None or bay_key is None or bay_key in models_by_key:
+            continue
+        if isinstance(model, BayResults):
+            if compact:
+                models_by_key[bay_key] = model.to_dict()
+        else:
+            models_by_key[bay_key] = compact_model(model) if compact else model
+
+    return models_by_key
+
+def create_and_analyze_pondpy_models(user_input, workers=None, cache=None, event_log=None, compact=False, compact_dtype='float64', previous_models=None, warm_start=False):
+    '''
+    Creates and analyzes the pondpy.PondPyModel object for each roof bay in the
+    user input, either one bay after another or in parallel across a pool of
+    worker processes.
+
+    Parameters
+    ----------
+    user_input : dict
+        dictionary containing the user input created by the package_input
+        helper function
+    workers : int, optional
+        number of worker processes used to analyze the roof bays. If None or
+        1, the roof bays are analyzed sequentially in the current process.
+    cache : ResultCache or bool, optional
+        on-disk cache of analyzed roof bays. Roof bays whose inputs are
+        already in the cache are loaded instead of being reanalyzed. If True,
+        a ResultCache with the default location and size cap is used. Cached
+        roof bays are returned as BayResults objects.
+    event_log : EventLog, optional
+        event log that records the progress and stage durations of each roof
+        bay. A new EventLog is created if not provided.
+    compact : bool, optional
+        indicates whether a RoofBayResults object is returned instead of the
+        pondpy.PondPyModel objects. Each model is reduced to its compact
+        results as soon as it is analyzed, so the full models are not kept.
+    compact_dtype : str or numpy.dtype, optional
+        floating point type of the compact result arrays, e.g. 'float32'
+    previous_models : list or RoofBayResults, optional
+        results of a previous run. Roof bays whose inputs are unchanged from
+        a roof bay of the previous run are reused instead of being rebuilt
+        and reanalyzed, and recorded as 'bay_reused' events in the event log
+        followed by a 'bays_reanalyzed' event listing the other roof bays.
+        Compact results can only be reused when compact is True.
+    warm_start : bool, optional
+        indicates whether the roof bays that are reanalyzed start their
+        ponding iteration from the impounded rain depth of the same roof bay
+        in previous_models, instead of from the initial depth. This cuts the
+        number of iterations after a small load or size change. Roof bays
+        whose geometry changed are started from the initial depth.
+
+    Returns
+    ----------
+    pondpy_models : list or RoofBayResults
+        list of pondpy.PondPyModel objects created for each roof bay in the
+        user input, in input order, or their compact results if compact is
+        True. Roof bays that failed to analyze are reported and left as None.
+    '''
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise TypeError('workers must be a positive integer or None')
+    if not isinstance(warm_start, bool):
+        raise TypeError('warm_start must be either True or False')
+    if cache is True:
+        cache = ResultCache()
+    elif cache is False:
+        cache = None
+    elif cache is not None and not isinstance(cache, ResultCache):
+        raise TypeError('cache must be a ResultCache object, True, False, or None')
+    if event_log is None:
+        event_log = EventLog()
+
+    n_roof_bays = user_input['n_roof_bays']
+    bay_inputs = [get_bay_input(user_input, bay) for bay in range(n_roof_bays)]
+
+    # Every roof bay is tagged with the hash of its input, so that the next
+    # run can tell which roof bays changed
+    bay_keys = [get_bay_key(bay_input) for bay_input in bay_inputs]
+
+    pondpy_models = [None]*n_roof_bays
+    failed_bays = {}
+
+    event_log.start_progress(total=n_roof_bays, description='Analyzing roof bays')
+
+    # Reuse the roof bays with unchanged inputs from the previous run
+    reused_bays = []
+    if previous_models is not None:
+        previous_by_key = get_models_by_key(previous_models, compact=compact)
+        for bay in range(n_roof_bays):
+            if bay_keys[bay] in previous_by_key:
+                pondpy_models[bay] = previous_by_key[bay_keys[bay]]
+                reused_bays.append(bay)
+                event_log.emit('bay_reused', bay=bay)
+                event_log.advance()
+
+    # Load any other roof bays with unchanged inputs from the cache
+    if cache is not None:
+        for bay in range(n_roof_bays):
+            if pondpy_models[bay] is not None:
+                continue
+            with event_log.stage('cache lookup', bay=bay):
+                model = cache.get(bay_keys[bay])
+            if model is not None:
+                pondpy_models[bay] = model
+                event_log.emit('bay_cached', bay=bay)
+                event_log.advance()
+    pending_bays = [bay for bay in range(n_roof_bays) if pondpy_models[bay] is None]
+
+    if previous_models is not None:
+        event_log.emit('bays_reanalyzed', reused=len(reused_bays), bays=pending_bays)
+        if event_log.progress:
+            reanalyzed = ', '.join(str(bay+1) for bay in pending_bays) or 'none'
+            print(TextColor.GREEN+TextColor.BOLD+f"Reused {len(reused_bays)} of {n_roof_bays} roof bays from the previous run. Roof bays reanalyzed: {reanalyzed}"+TextColor.END)
+
+    # Create a dictionary of pondpy.SteelBeamSize and pondpy.SteelJoistSize
+    # objects for each beam and joist size, only if any roof bay is analyzed
+    active_sizes = create_active_sizes(user_input) if pending_bays else {}
+
+    # Seed the reanalyzed roof bays with the impounded rain depth of the same
+    # roof bay in the previous run
+    previous_depths = {}
+    if warm_start and previous_models is not None:
+        previous_depths = {
+            bay:get_impounded_depth(previous_models[bay])
+            for bay in pending_bays if bay < len(previous_models)
+        }
+
+    def store_result(bay, model, durations):
+        for stage, duration in durations.items():
+            event_log.record_stage(stage, duration, bay=bay)
+        if cache is not None:
+            store_in_cache(cache, bay_keys[bay], model, event_log, bay=bay)
+        model.bay_key = bay_keys[bay]
+        pondpy_models[bay] = compact_model(model) if compact else model
+        event_log.emit('bay_complete', bay=bay)
+        event_log.advance()
+
+    def store_failure(bay, e):
+        failed_bays[bay] = e
+        event_log.emit('bay_failed', bay=bay, error=repr(e))
+        event_log.advance(failed=True)
 
-        print(TextColor.GREEN+TextColor.BOLD+f"Successfully created the PondPyModel object for roof bay {bay+1}!"+TextColor.END)
-            
-        print(TextColor.DARKCYAN+TextColor.BOLD+f"Analyzing the PondPyModel object for roof bay {bay+1}..."+TextColor.END)
+    if workers is None or workers == 1 or len(pending_bays) <= 1:
+        for bay in pending_bays:
+            event_log.emit('bay_start', bay=bay)
+            try:
+                # Time the stages through the event log so that any
+                # instrumentation it adds covers the work in this process
+                with event_log.stage('model build', bay=bay):
+                    model = create_pondpy_model(bay_input=bay_inputs[bay], active_sizes=active_sizes)
+                with event_log.stage('analysis', bay=bay):
+                    perform_shared_analysis(model, previous_depth=previous_depths.get(bay))
+                store_result(bay, model, {})
+            except Exception as e:
+                store_failure(bay, e)
+    else:
+        event_log.emit('pool_start', workers=workers, n_bays=len(pending_bays))
 
-        cur_model.perform_analysis()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(analyze_bay, bay_inputs[bay], active_sizes, True, previous_depths.get(bay)):bay
+                for bay in pending_bays
+            }
+            for future in as_completed(futures):
+                bay = futures[future]
+                try:
+                    store_result(bay, *future.result())
+                except Exception as e:
+                    store_failure(bay, e)
 
-        print(TextColor.GREEN+TextColor.BOLD+f"Successfully analyzed roof bay {bay+1}!"+TextColor.END)
+    if failed_bays:
+        print(TextColor.RED+TextColor.BOLD+f"{len(failed_bays)} of {n_roof_bays} roof bays failed to analyze:"+TextColor.END)
+        for bay in sorted(failed_bays):
+            print(TextColor.RED+f"Roof bay {bay+1}: {failed_bays[bay]}"+TextColor.END)
 
-        pondpy_models.append(cur_model)
+    if compact:
+        return RoofBayResults.from_models(pondpy_models, dtype=compact_dtype)
 
     return pondpy_models
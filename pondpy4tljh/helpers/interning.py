@@ -0,0 +1,182 @@
+from contextlib import contextmanager
+
+import numpy as np
+
+from .convergence import perform_iterative_analysis
+
+# Shared immutable objects (support lists, loadings) keyed by kind and by
+# the value they were created from
+_INTERNED = {}
+
+def intern_object(kind, key, create):
+    '''
+    Returns the shared object for a key, creating it on first use. Identical
+    member supports and loadings across roof bays are created once and
+    shared, so only objects that pondpy never modifies may be interned.
+
+    Parameters
+    ----------
+    kind : str
+        kind of the object, e.g. 'supports' or 'loading'
+    key : hashable
+        value the object is created from
+    create : callable
+        function called without arguments to create the object
+
+    Returns
+    -------
+    obj : object
+        shared object for the key
+    '''
+    objects = _INTERNED.setdefault(kind, {})
+    try:
+        return objects[key]
+    except KeyError:
+        obj = objects[key] = create()
+        return obj
+
+def get_interned_counts():
+    '''
+    Returns the number of shared objects of each kind.
+
+    Returns
+    -------
+    counts : dict
+        number of shared objects keyed by kind
+    '''
+    return {kind:len(objects) for kind, objects in _INTERNED.items()}
+
+def clear_interned():
+    '''
+    Clears the shared objects.
+
+    Returns
+    -------
+    None
+    '''
+    _INTERNED.clear()
+
+def get_stiffness_key(beam_model):
+    '''
+    Returns the key identifying the stiffness of a pondpy.BeamModel object.
+    Members with the same section properties, node locations, and restraints
+    have identical stiffness matrices.
+
+    Parameters
+    ----------
+    beam_model : pondpy.BeamModel
+        initialized pondpy.BeamModel object
+
+    Returns
+    -------
+    key : tuple
+    '''
+    beam = beam_model.beam
+    return (
+        beam.e_mod,
+        beam.area,
+        beam.mom_inertia,
+        tuple(beam_model.model_nodes),
+        tuple(map(tuple, beam_model.dof_num)),
+    )
+
+def _get_solution_key(beam_model):
+    '''
+    Returns the key identifying the solution of a pondpy.BeamModel object,
+    i.e. its stiffness and its loads.
+    '''
+    return (
+        get_stiffness_key(beam_model),
+        beam_model.nodal_load_vector.tobytes(),
+        beam_model.fef_load_vector.tobytes(),
+        np.asarray(beam_model.elem_loads, dtype=float).tobytes(),
+    )
+
+@contextmanager
+def share_bay_solutions(pondpy_model):
+    '''
+    Context manager that shares work between the identical members of a roof
+    bay while the pondpy.PondPyModel object is analyzed.
+
+    pondpy reassembles the stiffness matrix of every member each time its
+    loads change, i.e. several times per ponding iteration. Within the
+    context, each stiffness matrix is assembled once and shared by every
+    member (and every iteration) with the same section, node locations, and
+    restraints. Secondary members that also carry identical loads in an
+    iteration are solved once and share the solution.
+
+    The shared matrices and solutions are bit-for-bit identical to the ones
+    each member would compute, so the results are unchanged. The hooks are
+    removed on exit, so the model can still be pickled.
+
+    Parameters
+    ----------
+    pondpy_model : pondpy.PondPyModel
+        unanalyzed pondpy.PondPyModel object
+    '''
+    roof_bay_model = pondpy_model.roof_bay_model
+    primary_models = roof_bay_model.primary_models
+    secondary_models = roof_bay_model.secondary_models
+
+    stiffness = {}
+    solutions = {}
+
+    def share_stiffness(beam_model):
+        assemble_global_stiffness = beam_model._assemble_global_stiffness
+
+        def _assemble_global_stiffness():
+            key = get_stiffness_key(beam_model)
+            if key not in stiffness:
+                assemble_global_stiffness()
+                stiffness[key] = (beam_model.global_stiffness, beam_model.local_stiffness_matrices)
+            beam_model.global_stiffness, beam_model.local_stiffness_matrices = stiffness[key]
+
+        beam_model._assemble_global_stiffness = _assemble_global_stiffness
+
+    def share_solution(beam_model):
+        perform_analysis = beam_model.perform_analysis
+
+        def _perform_analysis():
+            key = _get_solution_key(beam_model)
+            if key not in solutions:
+                perform_analysis()
+                solutions[key] = (beam_model.global_displacement, beam_model.element_forces, beam_model.support_reactions)
+            else:
+                beam_model.global_displacement, beam_model.element_forces, beam_model.support_reactions = solutions[key]
+                beam_model.analysis_complete = True
+
+        beam_model.perform_analysis = _perform_analysis
+
+    for beam_model in primary_models + secondary_models:
+        share_stiffness(beam_model)
+    for beam_model in secondary_models:
+        share_solution(beam_model)
+
+    try:
+        yield
+    finally:
+        for beam_model in primary_models + secondary_models:
+            beam_model.__dict__.pop('_assemble_global_stiffness', None)
+            beam_model.__dict__.pop('perform_analysis', None)
+
+def perform_shared_analysis(pondpy_model, previous_depth=None):
+    '''
+    Performs the analysis of a pondpy.PondPyModel object, sharing the
+    stiffness matrices and solutions of its identical members.
+
+    Parameters
+    ----------
+    pondpy_model : pondpy.PondPyModel
+        unanalyzed pondpy.PondPyModel object
+    previous_depth : dict, optional
+        impounded rain depth of a previous run of the roof bay created by the
+        get_impounded_depth helper function, used to warm start the analysis
+
+    Returns
+    -------
+    output : dict
+        dictionary of output variables returned by the
+        perform_iterative_analysis helper function
+    '''
+    with share_bay_solutions(pondpy_model):
+        return perform_iterative_analysis(pondpy_model, previous_depth=previous_depth)
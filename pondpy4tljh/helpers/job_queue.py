@@ -0,0 +1,544 @@
+import getpass
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
+from importlib.metadata import version
+
+import numpy as np
+
+from .result_cache import get_bay_key
+from .result_store import RoofBayResults
+from .text_colors import TextColor
+
+QUEUE_PATH_ENV = 'PONDPY4TLJH_QUEUE'
+DEFAULT_QUEUE_PATH = os.path.join(tempfile.gettempdir(), 'pondpy4tljh', 'jobs.sqlite')
+JOB_STATUSES = ['queued', 'running', 'done', 'failed', 'cancelled']
+PONDPY_VERSION = version('pondpy')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    bay_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, user);
+CREATE INDEX IF NOT EXISTS jobs_bay_key ON jobs (bay_key);
+CREATE TABLE IF NOT EXISTS results (
+    bay_key TEXT PRIMARY KEY,
+    pondpy_version TEXT NOT NULL,
+    data BLOB NOT NULL,
+    created REAL NOT NULL
+);
+'''
+
+def get_queue_user():
+    '''
+    Returns the name of the hub user submitting jobs.
+    '''
+    return os.environ.get('JUPYTERHUB_USER') or getpass.getuser()
+
+def _results_to_bytes(results):
+    '''
+    Serializes compact results to the bytes of a compressed .npz archive.
+    Results are shared between hub users, so they are stored as plain arrays
+    rather than pickles, which could run code when they are loaded.
+    '''
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **results.get_arrays())
+    return buffer.getvalue()
+
+def _results_from_bytes(data):
+    '''
+    Loads compact results serialized with _results_to_bytes.
+    '''
+    with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+        arrays = {name:archive[name] for name in archive.files}
+    return RoofBayResults.from_arrays(arrays, path='job result')
+
+def run_job(payload):
+    '''
+    Analyzes the roof bay of a job and returns its compact results. Defined
+    at module level so that it can be sent to the worker processes of the
+    job service.
+
+    Parameters
+    ----------
+    payload : str
+        JSON job payload holding the roof bay input and its beam and joist
+        sizes
+
+    Returns
+    -------
+    data : bytes
+        compact results of the roof bay serialized as a .npz archive
+    '''
+    from .helpers import (
+        analyze_bay,
+        create_active_sizes,
+    )
+    from .result_store import compact_model
+
+    job = json.loads(payload)
+    active_sizes = create_active_sizes({'beam_sizes':job['beam_sizes'], 'joist_sizes':job['joist_sizes']})
+    model = analyze_bay(job['bay_input'], active_sizes)
+    model.bay_key = job['bay_key']
+
+    return _results_to_bytes(RoofBayResults.from_models([compact_model(model)]))
+
+class JobQueue:
+    '''
+    A class to represent the shared job queue of a hub. Notebooks submit the
+    roof bays of their projects to the queue, and a single job service
+    (run_job_service) analyzes them with a bounded pool of worker processes,
+    so that several users analyzing large projects at once do not
+    oversubscribe the server.
+
+    The queue is a SQLite database. Jobs are scheduled fairly across users:
+    the next job is taken from the user with the fewest running jobs, oldest
+    submission first. A roof bay whose input is identical to one that is
+    already analyzed, queued, or running is not analyzed again; all of its
+    jobs share the one result.
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        path of the SQLite database file
+
+    Methods
+    -------
+    cancel(job_ids):
+        Cancels jobs that have not started yet.
+    get_errors(job_ids):
+        Returns the error messages of failed jobs.
+    get_results(job_ids, wait=True, timeout=None):
+        Returns the compact results of jobs.
+    get_status(job_ids=None):
+        Returns the status of jobs.
+    submit(user_input, user=None):
+        Submits the roof bays of a project.
+    wait(job_ids, timeout=None):
+        Waits for jobs to finish.
+    '''
+    def __init__(self, path=None, timeout=30):
+        '''
+        Constructs the required attributes for the JobQueue object and
+        creates the database if it does not exist.
+
+        Parameters
+        ----------
+        path : str, optional
+            path of the SQLite database file. Defaults to the
+            PONDPY4TLJH_QUEUE environment variable, or jobs.sqlite in a
+            pondpy4tljh directory in the system temporary directory. Every
+            hub user must be able to write to it.
+        timeout : float, optional
+            number of seconds to wait for another process to release the
+            database
+        '''
+        if path is None:
+            path = os.environ.get(QUEUE_PATH_ENV, DEFAULT_QUEUE_PATH)
+        self.path = path
+        self.timeout = timeout
+
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            # Shared by every hub user, like the system temporary directory
+            os.chmod(directory, 0o1777)
+
+        created = not os.path.exists(path)
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+        if created:
+            os.chmod(path, 0o666)
+
+    def __repr__(self):
+        return f'JobQueue({self.path!r})'
+
+    @contextmanager
+    def _connect(self):
+        '''
+        Opens a connection to the database. Statements outside of a
+        transaction are committed immediately.
+        '''
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self):
+        '''
+        Opens a connection holding the write lock of the database, so that
+        jobs are claimed and completed atomically across processes.
+        '''
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    def submit(self, user_input, user=None):
+        '''
+        Submits the roof bays of a project as one job per roof bay. Roof bays
+        that are already analyzed are completed immediately.
+
+        Parameters
+        ----------
+        user_input : dict
+            dictionary containing the validated user input created by the
+            package_input helper function
+        user : str, optional
+            name of the user submitting the jobs. Defaults to the hub user.
+
+        Returns
+        -------
+        job_ids : list
+            job id of each roof bay, in input order
+        '''
+        from .helpers import get_bay_input
+
+        if user is None:
+            user = get_queue_user()
+
+        beam_sizes = {size.upper():size for size in user_input['beam_sizes']}
+        joist_sizes = {size.upper():size for size in user_input['joist_sizes']}
+
+        jobs = []
+        for bay in range(user_input['n_roof_bays']):
+            bay_input = get_bay_input(user_input, bay)
+            bay_key = get_bay_key(bay_input)
+            sizes = {
+                size.upper() for size in bay_input['primary_members_size']+bay_input['secondary_members_size']
+            }
+            payload = json.dumps({
+                'bay_key':bay_key,
+                'bay_input':bay_input,
+                'beam_sizes':[beam_sizes[size] for size in sizes if size in beam_sizes],
+                'joist_sizes':[joist_sizes[size] for size in sizes if size in joist_sizes],
+            })
+            jobs.append((bay_key, payload))
+
+        now = time.time()
+        job_ids = []
+        with self._transaction() as connection:
+            for bay_key, payload in jobs:
+                analyzed = connection.execute(
+                    'SELECT 1 FROM results WHERE bay_key = ? AND pondpy_version = ?', (bay_key, PONDPY_VERSION),
+                ).fetchone()
+                if analyzed:
+                    cursor = connection.execute(
+                        "INSERT INTO jobs (user, bay_key, payload, status, submitted, finished) VALUES (?, ?, ?, 'done', ?, ?)",
+                        (user, bay_key, payload, now, now),
+                    )
+                else:
+                    cursor = connection.execute(
+                        "INSERT INTO jobs (user, bay_key, payload, status, submitted) VALUES (?, ?, ?, 'queued', ?)",
+                        (user, bay_key, payload, now),
+                    )
+                job_ids.append(cursor.lastrowid)
+
+        return job_ids
+
+    def get_status(self, job_ids=None):
+        '''
+        Returns the status of jobs.
+
+        Parameters
+        ----------
+        job_ids : list, optional
+            ids of the jobs. Defaults to every job in the queue.
+
+        Returns
+        -------
+        status : pandas.DataFrame
+            DataFrame indexed by job id with the user, status, and submitted,
+            started, and finished times of each job
+        '''
+        import pandas as pd
+
+        query = 'SELECT id, user, status, submitted, started, finished FROM jobs'
+        with self._connect() as connection:
+            if job_ids is None:
+                rows = connection.execute(query+' ORDER BY id').fetchall()
+            else:
+                job_ids = list(job_ids)
+                rows = connection.execute(
+                    query+f" WHERE id IN ({', '.join('?'*len(job_ids))}) ORDER BY id", job_ids,
+                ).fetchall()
+
+        status = pd.DataFrame(rows, columns=['Job', 'User', 'Status', 'Submitted', 'Started', 'Finished'])
+        for column in ['Submitted', 'Started', 'Finished']:
+            status[column] = pd.to_datetime(status[column], unit='s')
+
+        return status.set_index('Job')
+
+    def _get_job_rows(self, connection, job_ids, columns):
+        '''
+        Returns the requested columns of jobs, keyed by job id.
+        '''
+        rows = connection.execute(
+            f"SELECT id, {columns} FROM jobs WHERE id IN ({', '.join('?'*len(job_ids))})", job_ids,
+        ).fetchall()
+        return {row[0]:row[1:] for row in rows}
+
+    def wait(self, job_ids, timeout=None, poll_interval=0.5):
+        '''
+        Waits for jobs to finish, fail, or be cancelled.
+
+        Parameters
+        ----------
+        job_ids : list
+            ids of the jobs
+        timeout : float, optional
+            maximum number of seconds to wait
+        poll_interval : float, optional
+            number of seconds between checks of the queue
+
+        Returns
+        -------
+        done : bool
+            indicates whether every job finished before the timeout
+        '''
+        job_ids = list(job_ids)
+        start = time.monotonic()
+        while True:
+            with self._connect() as connection:
+                statuses = self._get_job_rows(connection, job_ids, 'status')
+            if all(status in ('done', 'failed', 'cancelled') for status, in statuses.values()):
+                return True
+            if timeout is not None and time.monotonic()-start >= timeout:
+                return False
+            time.sleep(poll_interval)
+
+    def get_results(self, job_ids, wait=True, timeout=None):
+        '''
+        Returns the compact results of jobs.
+
+        Parameters
+        ----------
+        job_ids : list
+            ids of the jobs, e.g. as returned by submit
+        wait : bool, optional
+            indicates whether to wait for the jobs to finish
+        timeout : float, optional
+            maximum number of seconds to wait
+
+        Returns
+        -------
+        results : RoofBayResults
+            compact results of each job, in the order of job_ids. Jobs that
+            have not finished, failed, or were cancelled are None.
+        '''
+        job_ids = list(job_ids)
+        if wait and not self.wait(job_ids, timeout=timeout):
+            print(TextColor.YELLOW+TextColor.BOLD+'Not every job finished before the timeout. Unfinished jobs are left as None.'+TextColor.END)
+
+        with self._connect() as connection:
+            jobs = self._get_job_rows(connection, job_ids, 'status, bay_key')
+            bay_keys = {bay_key for status, bay_key in jobs.values() if status == 'done'}
+            data = {}
+            for bay_key in bay_keys:
+                row = connection.execute('SELECT data FROM results WHERE bay_key = ?', (bay_key,)).fetchone()
+                if row is not None:
+                    data[bay_key] = row[0]
+
+        bay_results = {bay_key:_results_from_bytes(bay_data)[0].to_dict() for bay_key, bay_data in data.items()}
+        models = [
+            bay_results.get(jobs[job_id][1]) if job_id in jobs else None
+            for job_id in job_ids
+        ]
+
+        return RoofBayResults.from_models(models)
+
+    def get_errors(self, job_ids):
+        '''
+        Returns the error messages of failed jobs.
+
+        Parameters
+        ----------
+        job_ids : list
+            ids of the jobs
+
+        Returns
+        -------
+        errors : dict
+            error message of each failed job, keyed by job id
+        '''
+        job_ids = list(job_ids)
+        with self._connect() as connection:
+            jobs = self._get_job_rows(connection, job_ids, 'status, error')
+
+        return {job_id:error for job_id, (status, error) in jobs.items() if status == 'failed'}
+
+    def cancel(self, job_ids):
+        '''
+        Cancels jobs that have not started yet.
+
+        Parameters
+        ----------
+        job_ids : list
+            ids of the jobs
+
+        Returns
+        -------
+        n_cancelled : int
+            number of jobs that were cancelled
+        '''
+        job_ids = list(job_ids)
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET status = 'cancelled', finished = ? WHERE status = 'queued' AND id IN ({', '.join('?'*len(job_ids))})",
+                [time.time()]+job_ids,
+            )
+
+        return cursor.rowcount
+
+    def requeue_running(self):
+        '''
+        Returns the jobs left running by a job service that stopped to the
+        queue. Called when a job service starts.
+        '''
+        with self._transaction() as connection:
+            connection.execute("UPDATE jobs SET status = 'queued', started = NULL WHERE status = 'running'")
+
+    def claim_next(self):
+        '''
+        Claims the next roof bay to analyze for the job service. The job is
+        taken from the user with the fewest running jobs, oldest first, and
+        every queued job with the same roof bay input is claimed with it.
+
+        Returns
+        -------
+        job : tuple
+            (bay key, payload) pair of the claimed roof bay, or None if no
+            job is queued
+        '''
+        with self._transaction() as connection:
+            row = connection.execute('''
+                SELECT bay_key, payload FROM jobs AS job
+                WHERE status = 'queued'
+                AND bay_key NOT IN (SELECT bay_key FROM jobs WHERE status = 'running')
+                ORDER BY (SELECT COUNT(*) FROM jobs WHERE user = job.user AND status = 'running'), id
+                LIMIT 1
+            ''').fetchone()
+            if row is None:
+                return None
+
+            bay_key, payload = row
+            connection.execute(
+                "UPDATE jobs SET status = 'running', started = ? WHERE bay_key = ? AND status = 'queued'",
+                (time.time(), bay_key),
+            )
+
+        return bay_key, payload
+
+    def store_result(self, bay_key, data):
+        '''
+        Stores the result of a roof bay and completes every running or
+        queued job with the same roof bay input.
+        '''
+        with self._transaction() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO results (bay_key, pondpy_version, data, created) VALUES (?, ?, ?, ?)',
+                (bay_key, PONDPY_VERSION, data, time.time()),
+            )
+            connection.execute(
+                "UPDATE jobs SET status = 'done', finished = ? WHERE bay_key = ? AND status IN ('queued', 'running')",
+                (time.time(), bay_key),
+            )
+
+    def store_failure(self, bay_key, error):
+        '''
+        Marks the running jobs of a roof bay as failed.
+        '''
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, error = ? WHERE bay_key = ? AND status = 'running'",
+                (time.time(), error, bay_key),
+            )
+
+def run_job_service(path=None, workers=None, poll_interval=0.5, idle_timeout=None):
+    '''
+    Runs the job service that analyzes the roof bays submitted to a job
+    queue. Only one job service should run per queue; it analyzes at most
+    workers roof bays at a time, however many users submit jobs.
+
+    Parameters
+    ----------
+    path : str, optional
+        path of the job queue database. See JobQueue.
+    workers : int, optional
+        number of worker processes. Defaults to the number of CPUs.
+    poll_interval : float, optional
+        number of seconds between checks for new jobs
+    idle_timeout : float, optional
+        number of seconds without any queued or running job after which the
+        service stops. If None, the service runs until it is interrupted.
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not isinstance(workers, int) or workers < 1:
+        raise TypeError('workers must be a positive integer or None')
+
+    queue = JobQueue(path)
+    queue.requeue_running()
+    print(TextColor.DARKCYAN+TextColor.BOLD+f"Job service started on {queue.path} with {workers} workers."+TextColor.END)
+
+    running = {}
+    idle_since = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                # Keep every worker busy while there are queued jobs
+                while len(running) < workers:
+                    job = queue.claim_next()
+                    if job is None:
+                        break
+                    bay_key, payload = job
+                    running[executor.submit(run_job, payload)] = bay_key
+
+                if not running:
+                    if idle_timeout is not None and time.monotonic()-idle_since >= idle_timeout:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    bay_key = running.pop(future)
+                    try:
+                        queue.store_result(bay_key, future.result())
+                    except Exception as e:
+                        queue.store_failure(bay_key, repr(e))
+                idle_since = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Jobs that did not finish are picked up by the next job service
+            for future in running:
+                future.cancel()
+            queue.requeue_running()
+
+    print(TextColor.DARKCYAN+TextColor.BOLD+'Job service stopped.'+TextColor.END)
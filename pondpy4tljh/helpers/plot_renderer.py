@@ -0,0 +1,267 @@
+import io
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .rain_depth import (
+    RAIN_PLOT_KINDS,
+    draw_rain_depth,
+)
+from .result_helpers import get_member_diagrams
+from .result_store import BayResults
+
+DEFAULT_PLOT_CACHE_SIZE = 128
+PLOT_TYPES = [
+    'Deflection',
+    'Shear Force',
+    'Bending Moment',
+]
+PLOT_LABELS = {
+    'Deflection':'Deflection (in) - Scale=1:1',
+    'Shear Force':'Shear Force (k)',
+    'Bending Moment':'Bending Moment (k-ft)',
+}
+
+def get_diagram_xy(diagrams, length, type_plot):
+    '''
+    Returns the points of a member diagram plot, with the location as a
+    fraction of the member length.
+
+    Parameters
+    ----------
+    diagrams : dict
+        dictionary of member diagrams created by the get_member_diagrams
+        helper function
+    length : float
+        length of the member in inches
+    type_plot : str
+        'Deflection', 'Shear Force', or 'Bending Moment'
+
+    Returns
+    -------
+    x, y : numpy.ndarray
+        locations and values of the diagram
+    '''
+    x_nodes = np.asarray(diagrams['Nodes'])/length
+
+    # The moment and shear are stepped at each node, so each location is
+    # repeated for the values at the left and right side of the node
+    if type_plot == 'Deflection':
+        return x_nodes, np.asarray(diagrams['Deflection'])
+    elif type_plot == 'Shear Force':
+        return np.repeat(x_nodes, 2), np.asarray(diagrams['Shear'])
+    elif type_plot == 'Bending Moment':
+        return np.repeat(x_nodes, 2), np.asarray(diagrams['Moment'])
+    else:
+        raise ValueError(f'type_plot must be one of {PLOT_TYPES}')
+
+class PlotRenderer(ABC):
+    '''
+    Renders plots to PNG images on a single figure that is reused for every
+    plot, keeping the most recently used images in a bounded LRU cache. The
+    figure is not managed by pyplot, so no figures accumulate in the kernel.
+
+    Subclasses list the keys of their plots in get_keys() and draw a plot on
+    the figure in _draw(key).
+
+    Parameters
+    ----------
+    models : list
+        list of analyzed pondpy.PondPyModel or BayResults objects, indexed by
+        roof bay. Roof bays that failed to analyze are None.
+    cache_size : int, optional
+        maximum number of rendered images kept in the cache
+    projection : str, optional
+        projection of the axes, e.g. '3d'
+    '''
+    def __init__(self, models, cache_size=DEFAULT_PLOT_CACHE_SIZE, projection=None):
+        if not isinstance(cache_size, int) or cache_size < 1:
+            raise TypeError('cache_size must be a positive integer')
+
+        self.models = models
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        # The figure is shared by the widget callbacks and the prerender
+        # thread, so each render holds the lock
+        self.lock = threading.RLock()
+        self.figure = Figure()
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(111, projection=projection)
+        self.prerender_thread = None
+
+    def get(self, key):
+        '''
+        Returns the PNG image of a plot, rendering it if it is not cached.
+        '''
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return self.cache[key]
+
+            self.misses += 1
+            self._draw(key)
+            buffer = io.BytesIO()
+            self.figure.savefig(buffer, format='png')
+            image = buffer.getvalue()
+
+            self.cache[key] = image
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+            return image
+
+    @abstractmethod
+    def get_keys(self):
+        '''
+        Returns the keys of every plot that can be rendered.
+        '''
+
+    def prerender(self, keys=None, background=True):
+        '''
+        Renders plots into the cache ahead of time. Only as many plots as fit
+        in the cache are rendered.
+
+        Parameters
+        ----------
+        keys : list, optional
+            keys of the plots to render. Defaults to every plot.
+        background : bool, optional
+            indicates whether the plots are rendered in a background thread
+
+        Returns
+        -------
+        thread : threading.Thread
+            thread rendering the plots, or None if background is False
+        '''
+        if keys is None:
+            keys = self.get_keys()
+        keys = list(keys)[:self.cache_size]
+
+        def render_all():
+            for key in keys:
+                self.get(key)
+
+        if not background:
+            render_all()
+            return None
+
+        self.prerender_thread = threading.Thread(target=render_all, daemon=True)
+        self.prerender_thread.start()
+
+        return self.prerender_thread
+
+    @abstractmethod
+    def _draw(self, key):
+        '''
+        Draws the plot with the given key on the figure.
+        '''
+
+class MemberPlotRenderer(PlotRenderer):
+    '''
+    Renders the deflected shape, shear force diagram, and bending moment
+    diagram of the members of analyzed roof bays. Plots are keyed by
+    (roof bay index, member type, member index, plot type).
+    '''
+    def __init__(self, models, cache_size=DEFAULT_PLOT_CACHE_SIZE):
+        super().__init__(models, cache_size=cache_size)
+
+        self.line, = self.ax.plot([], [], 'b-')
+        self.ax.set_xlabel('Unitary Length')
+        self.ax.grid()
+
+    def get_member_diagrams(self, i_bay, type_member, i_member):
+        '''
+        Returns the diagrams and length in inches of a member of a roof bay.
+        '''
+        model = self.models[i_bay]
+        if isinstance(model, BayResults):
+            return model.get_member_diagrams(type_member, i_member)
+
+        if type_member == 'P':
+            beam_model = model.roof_bay_model.primary_models[i_member]
+        elif type_member == 'S':
+            beam_model = model.roof_bay_model.secondary_models[i_member]
+
+        return get_member_diagrams(beam_model), beam_model.beam.length
+
+    def get_keys(self):
+        keys = []
+        for i_bay, model in enumerate(self.models):
+            if model is None:
+                continue
+            if isinstance(model, BayResults):
+                members = model.get_members()
+            else:
+                members = [f'P-{i+1}' for i in range(len(model.roof_bay_model.primary_models))]
+                members += [f'S-{i+1}' for i in range(len(model.roof_bay_model.secondary_models))]
+
+            for member in members:
+                type_member, number = member.split('-')
+                keys.extend((i_bay, type_member, int(number)-1, type_plot) for type_plot in PLOT_TYPES)
+
+        return keys
+
+    def _draw(self, key):
+        i_bay, type_member, i_member, type_plot = key
+        diagrams, length = self.get_member_diagrams(i_bay, type_member, i_member)
+
+        self.line.set_data(*get_diagram_xy(diagrams, length, type_plot))
+        self.ax.set_ylabel(PLOT_LABELS[type_plot])
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+class RainPlotRenderer(PlotRenderer):
+    '''
+    Renders the impounded rain depth of analyzed roof bays as heatmap,
+    filled contour, surface, or 3D scatter plots. Plots are keyed by roof
+    bay index.
+
+    Parameters
+    ----------
+    models : list
+        list of analyzed pondpy.PondPyModel or BayResults objects, indexed by
+        roof bay. Roof bays that failed to analyze are None.
+    cache_size : int, optional
+        maximum number of rendered images kept in the cache
+    kind : str, optional
+        'heatmap', 'contour', 'surface', or 'scatter'
+    decimate : int, optional
+        decimation step of the depth grid for very dense meshes
+    '''
+    def __init__(self, models, cache_size=DEFAULT_PLOT_CACHE_SIZE, kind='heatmap', decimate=None):
+        if kind not in RAIN_PLOT_KINDS:
+            raise ValueError(f'kind must be one of {RAIN_PLOT_KINDS}')
+        super().__init__(models, cache_size=cache_size, projection='3d' if kind in ['surface', 'scatter'] else None)
+
+        self.kind = kind
+        self.decimate = decimate
+        self.artist = None
+        self.colorbar = None
+        self.ax.set_title('Impounded Rain Depth (in)')
+        self.ax.set_xlabel('Ls (ft)')
+        self.ax.set_ylabel('Lp (ft)')
+
+    def get_keys(self):
+        return [i_bay for i_bay, model in enumerate(self.models) if model is not None]
+
+    def _draw(self, key):
+        # The grid size differs between roof bays, so the plotted artist is
+        # replaced while the figure, axes, and colorbar are kept
+        if self.artist is not None:
+            self.artist.remove()
+        self.artist = draw_rain_depth(self.ax, self.models[key], kind=self.kind, decimate=self.decimate)
+
+        if self.artist is None or self.kind == 'scatter':
+            return
+        if self.colorbar is None:
+            self.colorbar = self.figure.colorbar(self.artist, ax=self.ax, label='Depth (in)')
+        else:
+            self.colorbar.update_normal(self.artist)
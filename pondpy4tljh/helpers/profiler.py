@@ -0,0 +1,436 @@
+import cProfile
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+from .event_log import STAGES, EventLog
+from .text_colors import TextColor
+
+# Caps on the depth and number of lines of the collapsed stacks
+MAX_STACK_DEPTH = 64
+MAX_STACK_LINES = 20000
+
+class Profiler(EventLog):
+    '''
+    A class to represent an opt-in instrumentation of the analysis pipeline.
+
+    A Profiler is an EventLog that additionally records the number of
+    Python function calls and the peak traced memory of every stage, and
+    keeps a cProfile profile of everything run inside profiling(). The code
+    between stage boundaries is profiled in separate segments, so that the
+    call count of a stage is read once when its segments stop instead of
+    summing the whole profile at every boundary. The
+    profile can be written as a pstats dump or as a collapsed stack file
+    that flame graph tools (e.g. flamegraph.pl or speedscope) read directly.
+
+    ...
+
+    Attributes
+    ----------
+    trace_memory : bool
+        indicates whether the peak memory of each stage is traced with
+        tracemalloc
+    stage_stats : dict
+        pstats.Stats profile of the code run inside profiling(), keyed by
+        the tuple of stages that were open while it ran
+
+    Methods
+    -------
+    dump_stats(path):
+        Writes the profile as a pstats dump.
+    get_function_stats(n=20, sort='cumulative'):
+        Returns the most expensive functions in the profile.
+    get_stage_report():
+        Returns the wall time, call count, and peak memory of each stage.
+    print_report():
+        Prints the stage report.
+    profiling():
+        Context manager that enables the profile.
+    write_collapsed_stacks(path):
+        Writes the profile as a flame graph ready collapsed stack file.
+    '''
+    def __init__(self, progress=True, log_path=None, trace_memory=True):
+        '''
+        Constructs the required attributes for the Profiler object.
+
+        Parameters
+        ----------
+        progress : bool, optional
+            indicates whether a live progress bar is shown in notebooks
+        log_path : str, optional
+            path of a JSON lines file that each event is appended to
+        trace_memory : bool, optional
+            indicates whether the peak memory of each stage is traced with
+            tracemalloc. Tracing memory slows down the analysis noticeably.
+        '''
+        super().__init__(progress=progress, log_path=log_path)
+
+        if not isinstance(trace_memory, bool):
+            raise TypeError('trace_memory must be either True or False')
+
+        self.trace_memory = trace_memory
+        self.stage_stats = {}
+
+        self._profiling = 0
+        self._segment = None
+        self._started_tracemalloc = False
+        self._peak_stack = []
+        self._open_stages = []
+        self._stage_calls = []
+
+    def _start_segment(self):
+        '''
+        Starts profiling a new segment for the stages that are open.
+        '''
+        self._segment = cProfile.Profile()
+        self._segment.enable()
+
+    def _stop_segment(self):
+        '''
+        Stops the profile segment, adds it to the profile of the open stages,
+        and counts its function calls towards each open stage.
+        '''
+        if self._segment is None:
+            return
+        self._segment.disable()
+        stats = pstats.Stats(self._segment)
+        self._segment = None
+
+        calls = sum(entry[1] for entry in stats.stats.values())
+        for i_stage in range(len(self._stage_calls)):
+            self._stage_calls[i_stage] += calls
+
+        key = tuple(self._open_stages)
+        if key in self.stage_stats:
+            self.stage_stats[key].add(stats)
+        else:
+            self.stage_stats[key] = stats
+
+    def _get_peak_memory(self):
+        '''
+        Returns the peak traced memory since the last reset in bytes.
+        '''
+        if not tracemalloc.is_tracing():
+            return 0
+        return tracemalloc.get_traced_memory()[1]
+
+    @contextmanager
+    def profiling(self):
+        '''
+        Context manager that enables the profile and memory tracing for the
+        code run inside it. Nested and repeated uses accumulate into the same
+        profile.
+        '''
+        if self._profiling == 0:
+            if self.trace_memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            self._start_segment()
+        self._profiling += 1
+
+        try:
+            yield self
+        finally:
+            self._profiling -= 1
+            if self._profiling == 0:
+                self._stop_segment()
+                if self._started_tracemalloc:
+                    tracemalloc.stop()
+                    self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, stage, bay=None):
+        '''
+        Context manager that times a stage and records its start and end
+        along with its function call count and peak memory.
+
+        Parameters
+        ----------
+        stage : str
+            name of the stage
+        bay : int, optional
+            index of the roof bay the stage belongs to
+        '''
+        self.emit('stage_start', stage=stage, bay=bay)
+
+        # Carry the peak of any enclosing stage over before resetting it
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            if self._peak_stack:
+                self._peak_stack[-1] = max(self._peak_stack[-1], self._get_peak_memory())
+            start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            self._peak_stack.append(start_memory)
+
+        # The code of the stage is profiled in its own segments
+        if self._profiling:
+            self._stop_segment()
+        self._open_stages.append(stage)
+        self._stage_calls.append(0)
+        if self._profiling:
+            self._start_segment()
+
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.emit('stage_error', stage=stage, bay=bay, duration=time.perf_counter()-start, error=repr(e))
+            raise
+        finally:
+            duration = time.perf_counter()-start
+            if self._profiling:
+                self._stop_segment()
+            self._open_stages.pop()
+            calls = self._stage_calls.pop()
+            if self._profiling:
+                self._start_segment()
+            peak_memory = 0
+            if tracing and tracemalloc.is_tracing():
+                stage_peak = max(self._peak_stack.pop(), self._get_peak_memory())
+                peak_memory = stage_peak-start_memory
+                if self._peak_stack:
+                    self._peak_stack[-1] = max(self._peak_stack[-1], stage_peak)
+            elif tracing:
+                self._peak_stack.pop()
+
+        self.emit('stage_end', stage=stage, bay=bay, duration=duration, calls=calls, peak_memory=peak_memory)
+
+    def get_stage_report(self):
+        '''
+        Returns the wall time, function call count, and peak memory of each
+        stage for each roof bay.
+
+        Returns
+        -------
+        stage_report : pandas.DataFrame
+            DataFrame indexed by roof bay and stage. Stages that are not
+            specific to a roof bay are reported under 'All'. Stages timed in
+            worker processes only report their wall time.
+        '''
+        rows = [
+            (
+                event['bay']+1 if event.get('bay') is not None else 'All',
+                event['stage'],
+                event['duration'],
+                event.get('calls', 0),
+                event.get('peak_memory', 0)/2**20,
+            )
+            for event in self.events if event['event'] == 'stage_end'
+        ]
+        columns = ['Roof Bay', 'Stage', 'Wall Time (s)', 'Calls', 'Peak Memory (MiB)']
+        report = pd.DataFrame(rows, columns=columns)
+        report['Stage'] = pd.Categorical(
+            report['Stage'],
+            categories=STAGES+[stage for stage in report['Stage'].unique() if stage not in STAGES],
+        )
+
+        return report.groupby(['Roof Bay', 'Stage'], sort=False, observed=True).agg({
+            'Wall Time (s)':'sum',
+            'Calls':'sum',
+            'Peak Memory (MiB)':'max',
+        })
+
+    def print_report(self):
+        '''
+        Prints the stage report and the total wall time of each stage.
+        '''
+        stage_report = self.get_stage_report()
+        totals = stage_report.groupby(level='Stage', observed=True).agg({
+            'Wall Time (s)':'sum',
+            'Calls':'sum',
+            'Peak Memory (MiB)':'max',
+        })
+
+        print(TextColor.DARKCYAN+TextColor.BOLD+"Stage totals:"+TextColor.END)
+        print(totals.round(4).to_string())
+        print(TextColor.DARKCYAN+TextColor.BOLD+"Stages by roof bay:"+TextColor.END)
+        print(stage_report.round(4).to_string())
+
+    def _get_stats(self):
+        '''
+        Returns the profile as a pstats.Stats object.
+        '''
+        if self._profiling:
+            raise RuntimeError('the profile cannot be read while profiling is in progress')
+        if not self.stage_stats:
+            raise RuntimeError('the profile is empty; run the analysis inside profiling() first')
+
+        stats = pstats.Stats()
+        stats.add(*self.stage_stats.values())
+
+        return stats
+
+    def dump_stats(self, path):
+        '''
+        Writes the profile as a pstats dump that can be read with
+        pstats.Stats or tools such as snakeviz.
+
+        Parameters
+        ----------
+        path : str
+            path of the pstats dump file
+        '''
+        self._get_stats().dump_stats(path)
+
+    def get_function_stats(self, n=20, sort='cumulative'):
+        '''
+        Returns the most expensive functions in the profile.
+
+        Parameters
+        ----------
+        n : int, optional
+            number of functions returned
+        sort : str, optional
+            column the functions are ranked by, either 'cumulative', 'total',
+            or 'calls'
+
+        Returns
+        -------
+        function_stats : pandas.DataFrame
+            DataFrame with one row per function
+        '''
+        sort_columns = {
+            'cumulative':'Cumulative Time (s)',
+            'total':'Total Time (s)',
+            'calls':'Calls',
+        }
+        if sort not in sort_columns:
+            raise ValueError(f'sort must be one of {list(sort_columns)}')
+
+        rows = [
+            (_format_function(func), nc, tt, ct)
+            for func, (cc, nc, tt, ct, callers) in self._get_stats().stats.items()
+        ]
+        columns = ['Function', 'Calls', 'Total Time (s)', 'Cumulative Time (s)']
+        function_stats = pd.DataFrame(rows, columns=columns)
+
+        return function_stats.sort_values(sort_columns[sort], ascending=False).head(n).reset_index(drop=True)
+
+    def write_collapsed_stacks(self, path):
+        '''
+        Writes the profile as a collapsed stack file ('a;b;c <microseconds>'
+        per line), with the stages that were open as the outermost frames.
+
+        The stacks are rebuilt from the caller/callee edges of the profile in
+        a single pass: the self time of each function is split between its
+        callers in proportion to the time spent in it from each caller, and
+        each caller is placed on the stack of its most expensive caller. The
+        number of lines therefore grows with the number of edges instead of
+        the number of call paths. Only the MAX_STACK_LINES most expensive
+        lines are written.
+
+        Parameters
+        ----------
+        path : str
+            path of the collapsed stack file
+        '''
+        self._get_stats()
+
+        stacks = {}
+        for stages, stage_stats in self.stage_stats.items():
+            for key, seconds in _get_collapsed_stacks(stage_stats.stats).items():
+                key = ';'.join(list(stages)+[key])
+                stacks[key] = stacks.get(key, 0)+seconds
+
+        lines = sorted(stacks.items(), key=lambda item: item[1], reverse=True)[:MAX_STACK_LINES]
+        with open(path, 'w') as f:
+            for key, seconds in lines:
+                microseconds = int(round(seconds*1e6))
+                if microseconds > 0:
+                    f.write(f'{key} {microseconds}\n')
+
+def _get_collapsed_stacks(stats):
+    '''
+    Builds the collapsed stacks of a pstats stats dictionary, keyed by the
+    ';' separated frames of each stack, with the self time in seconds.
+    '''
+    # Each function is placed on the stack of its most expensive caller
+    main_caller = {}
+    for func, (cc, nc, tt, ct, callers) in stats.items():
+        callers = [(edge[3], caller) for caller, edge in callers.items() if caller != func and caller in stats]
+        if callers:
+            main_caller[func] = max(callers)[1]
+
+    frames = {}
+
+    def get_frames(func):
+        # Follows the main callers up to a function with known frames, a
+        # root, a cycle, or the depth cap, then fills in the frames downwards
+        chain = []
+        seen = set()
+        cur = func
+        while cur is not None and cur not in frames and cur not in seen and len(chain) < MAX_STACK_DEPTH:
+            seen.add(cur)
+            chain.append(cur)
+            cur = main_caller.get(cur)
+
+        prefix = frames.get(cur, ())
+        for cur in reversed(chain):
+            prefix = (prefix+(_format_function(cur),))[-MAX_STACK_DEPTH:]
+            frames[cur] = prefix
+
+        return frames[func]
+
+    stacks = {}
+    for func, (cc, nc, tt, ct, callers) in stats.items():
+        if tt <= 0:
+            continue
+
+        callers = {caller:edge[3] for caller, edge in callers.items() if caller in stats}
+        total = sum(callers.values())
+        if total <= 0:
+            keys = [(get_frames(func), 1.0)]
+        else:
+            name = _format_function(func)
+            keys = [
+                ((get_frames(caller)+(name,))[-MAX_STACK_DEPTH:], edge_time/total)
+                for caller, edge_time in callers.items()
+            ]
+
+        for key, share in keys:
+            key = ';'.join(key)
+            stacks[key] = stacks.get(key, 0)+tt*share
+
+    return stacks
+
+def _format_function(func):
+    '''
+    Formats a pstats function key as a single frame name.
+    '''
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f'{name} ({filename.rsplit("/", 1)[-1]}:{line})'
+
+def get_profiler(profile, progress=True, log_path=None):
+    '''
+    Resolves the profile option of the analysis functions.
+
+    Parameters
+    ----------
+    profile : Profiler or bool
+        Profiler used to instrument the run, True to instrument the run with
+        a new Profiler, or None/False to run without instrumentation
+    progress : bool, optional
+        indicates whether a live progress bar is shown in notebooks by a new
+        Profiler
+    log_path : str, optional
+        path of a JSON lines file that each event of a new Profiler is
+        appended to
+
+    Returns
+    -------
+    profiler : Profiler
+        Profiler used to instrument the run, or None
+    '''
+    if profile is None or profile is False:
+        return None
+    elif profile is True:
+        return Profiler(progress=progress, log_path=log_path)
+    elif isinstance(profile, Profiler):
+        return profile
+    else:
+        raise TypeError('profile must be a Profiler, True, False, or None')
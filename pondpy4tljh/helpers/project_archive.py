@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import zipfile
+from importlib.metadata import version
+
+import numpy as np
+
+from .project_io import normalize_project_input
+from .result_store import (
+    RoofBayResults,
+    load_npz_arrays,
+)
+from .text_colors import TextColor
+
+PROJECT_ARCHIVE_FORMAT = 1
+PROJECT_FILE = 'project.json'
+RESULTS_PREFIX = 'results/'
+
+def _create_analysis_summary(user_input, results):
+    '''
+    Creates the analysis summary from compact results, as reported by the
+    show_analysis_summary function.
+    '''
+    from .helpers import get_bay_description
+    from .result_helpers import create_summary_table
+
+    bays = [bay for bay, bay_results in enumerate(results) if bay_results is not None]
+
+    return create_summary_table(
+        [results[bay].summarize() for bay in bays],
+        [get_bay_description(user_input, bay) for bay in bays],
+    )
+
+def save_project_archive(path, user_input, models, analysis_summary=None, dtype='float64'):
+    '''
+    Saves a whole project run (the user input, the results of each roof bay,
+    the analysis summary, and the pondpy version) to a single archive file.
+    The archive is an uncompressed .npz file, so that the result arrays can
+    be memory-mapped when it is loaded.
+
+    Parameters
+    ----------
+    path : str
+        path of the archive file, e.g. 'project.npz'
+    user_input : dict
+        dictionary containing the user input created by the package_input
+        helper function
+    models : list or RoofBayResults
+        list of analyzed pondpy.PondPyModel objects, or their compact
+        results, returned by analyze_roof_bays
+    analysis_summary : pandas.DataFrame, optional
+        analysis summary returned by show_analysis_summary. Created from the
+        results if not provided.
+    dtype : str or numpy.dtype, optional
+        floating point type of the result arrays if models is a list
+    '''
+    if not isinstance(models, RoofBayResults):
+        models = RoofBayResults.from_models(models, dtype=dtype)
+    if analysis_summary is None:
+        analysis_summary = _create_analysis_summary(user_input, models)
+
+    project = {
+        'format':PROJECT_ARCHIVE_FORMAT,
+        'pondpy_version':version('pondpy'),
+        'user_input':user_input,
+        'summary':{
+            'columns':analysis_summary.columns.tolist(),
+            'data':analysis_summary.values.tolist(),
+        },
+    }
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+            archive.writestr(PROJECT_FILE, json.dumps(project))
+            for name, array in models.get_arrays().items():
+                with archive.open(f'{RESULTS_PREFIX}{name}.npy', 'w', force_zip64=True) as f:
+                    np.lib.format.write_array(f, np.asanyarray(array), allow_pickle=False)
+        os.chmod(tmp_path, 0o664)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_project_archive(path, mmap=True):
+    '''
+    Loads a project run saved with save_project_archive. The roof bay
+    results are memory-mapped from the archive file by default, so that
+    opening a large project is immediate and only the results of the roof
+    bays that are viewed are read from disk.
+
+    Parameters
+    ----------
+    path : str
+        path of the archive file
+    mmap : bool, optional
+        indicates whether the result arrays are memory-mapped instead of
+        being loaded into memory
+
+    Returns
+    -------
+    project : dict
+        dictionary containing the user input ('User Input'), the compact
+        RoofBayResults of each roof bay ('Results'), the analysis summary
+        ('Analysis Summary'), and the pondpy version the project was
+        analyzed with ('pondpy Version'). The results and analysis summary
+        can be passed directly to create_plot_widget and
+        create_rain_plot_widget.
+    '''
+    import pandas as pd
+
+    with zipfile.ZipFile(path) as archive:
+        try:
+            project = json.loads(archive.read(PROJECT_FILE))
+        except KeyError:
+            raise ValueError(f'{path} is not a project archive')
+
+    if project.get('format') != PROJECT_ARCHIVE_FORMAT:
+        raise ValueError(f'{path} was saved in an unsupported project archive format')
+
+    if project['pondpy_version'] != version('pondpy'):
+        print(TextColor.YELLOW+TextColor.BOLD+f"{path} was analyzed with pondpy {project['pondpy_version']}, but pondpy {version('pondpy')} is installed. Rerun the analysis to update the results."+TextColor.END)
+
+    results = RoofBayResults.from_arrays(
+        load_npz_arrays(path, mmap_mode='r' if mmap else None, prefix=RESULTS_PREFIX), path=path,
+    )
+    summary = project['summary']
+
+    return {
+        'User Input':normalize_project_input(project['user_input']),
+        'Results':results,
+        'Analysis Summary':pd.DataFrame(summary['data'], columns=summary['columns']),
+        'pondpy Version':project['pondpy_version'],
+    }
@@ -0,0 +1,144 @@
+import json
+import os
+
+# Per-bay input entries whose items are (a, b) pairs in the package_input
+# schema but are read back as lists from JSON, TOML, and YAML files
+PAIR_KEYS = [
+    'rain_load_input',
+    'roof_bay_mirrored',
+]
+SUPPORT_KEYS = [
+    'primary_members_support',
+    'secondary_members_support',
+]
+
+PROJECT_FILE_TYPES = {
+    '.json':'json',
+    '.toml':'toml',
+    '.yaml':'yaml',
+    '.yml':'yaml',
+    '.csv':'layout',
+    '.xlsx':'layout',
+    '.xlsm':'layout',
+}
+
+def _load_toml(f):
+    '''
+    Loads a TOML file with tomllib, or with tomli on Python 3.10.
+    '''
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ImportError('reading TOML project files on Python 3.10 requires the tomli package')
+
+    return tomllib.load(f)
+
+def _load_yaml(f):
+    '''
+    Loads a YAML file with PyYAML.
+    '''
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError('reading YAML project files requires the pyyaml package')
+
+    try:
+        return yaml.safe_load(f)
+    except yaml.YAMLError as e:
+        # Malformed files raise a ValueError, as for JSON and TOML files
+        raise ValueError(f'could not parse the YAML project file: {e}') from e
+
+def normalize_project_input(project):
+    '''
+    Converts a project read from a file into the package_input schema by
+    turning the (a, b) pairs that file formats store as lists back into
+    tuples.
+
+    Parameters
+    ----------
+    project : dict
+        dictionary of user input read from a project file
+
+    Returns
+    -------
+    user_input : dict
+        dictionary of user input in the package_input schema
+    '''
+    user_input = dict(project)
+
+    for key in PAIR_KEYS:
+        if isinstance(user_input.get(key), list):
+            user_input[key] = [tuple(pair) if isinstance(pair, list) else pair for pair in user_input[key]]
+
+    for key in SUPPORT_KEYS:
+        if isinstance(user_input.get(key), list):
+            user_input[key] = [
+                [
+                    [tuple(support) if isinstance(support, list) else support for support in mem]
+                    if isinstance(mem, list) else mem
+                    for mem in bay
+                ]
+                if isinstance(bay, list) else bay
+                for bay in user_input[key]
+            ]
+
+    return user_input
+
+def load_project_file(path):
+    '''
+    Reads a project file in the package_input schema. The file type is
+    determined by the file extension (.json, .toml, .yaml, or .yml). Roof
+    layout spreadsheets (.csv, .xlsx, or .xlsm) are read with
+    load_roof_layout.
+
+    Parameters
+    ----------
+    path : str
+        path of the project file
+
+    Returns
+    -------
+    user_input : dict
+        dictionary of user input in the package_input schema, which can be
+        passed as keyword arguments to analyze_roof_bays
+    '''
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in PROJECT_FILE_TYPES:
+        raise ValueError(f'{path} is not a supported project file; expected one of {list(PROJECT_FILE_TYPES)}')
+
+    file_type = PROJECT_FILE_TYPES[extension]
+    if file_type == 'layout':
+        from .roof_layout import load_roof_layout
+        return load_roof_layout(path)
+    elif file_type == 'json':
+        with open(path) as f:
+            project = json.load(f)
+    elif file_type == 'toml':
+        with open(path, 'rb') as f:
+            project = _load_toml(f)
+    elif file_type == 'yaml':
+        with open(path) as f:
+            project = _load_yaml(f)
+
+    if not isinstance(project, dict):
+        raise TypeError(f'{path} must contain a table of input keys and values')
+
+    return normalize_project_input(project)
+
+def save_project_file(user_input, path):
+    '''
+    Writes the user input to a JSON project file that can be read with
+    load_project_file.
+
+    Parameters
+    ----------
+    user_input : dict
+        dictionary of user input in the package_input schema
+    path : str
+        path of the JSON project file
+    '''
+    with open(path, 'w') as f:
+        json.dump(user_input, f, indent=4)
@@ -0,0 +1,343 @@
+import math
+
+import numpy as np
+
+from .result_store import BayResults
+
+RAIN_PLOT_KINDS = [
+    'heatmap',
+    'contour',
+    'surface',
+    'scatter',
+]
+RAIN_DEPTH_CMAP = 'Blues'
+
+def get_secondary_depths(model):
+    '''
+    Returns the node locations and impounded rain depths of the secondary
+    members of an analyzed roof bay.
+
+    Parameters
+    ----------
+    model : pondpy.PondPyModel or BayResults
+        analyzed roof bay, or its compact results
+
+    Returns
+    -------
+    nodes : list
+        list of node location arrays in inches, one per secondary member
+    depths : list
+        list of impounded rain depth arrays in inches, one per secondary
+        member
+    spacing : float
+        spacing of the secondary members in inches
+    '''
+    if isinstance(model, BayResults):
+        nodes, depths = model.get_secondary_depths()
+        return nodes, depths, model.secondary_spacing
+
+    s_models = model.roof_bay_model.secondary_models
+    nodes = [np.asarray(s_model.model_nodes, dtype=float) for s_model in s_models]
+    depths = [np.asarray(model.impounded_depth['Secondary'][i_smodel], dtype=float) for i_smodel in range(len(s_models))]
+
+    return nodes, depths, model.roof_bay.secondary_spacing
+
+def get_rain_depth(model):
+    '''
+    Returns the location in ft along (x) and across (y) the secondary members
+    and the impounded rain depth in inches (z) at each node of the secondary
+    members of an analyzed pondpy.PondPyModel or BayResults object.
+    '''
+    nodes, depths, spacing = get_secondary_depths(model)
+    if not nodes:
+        return np.empty(0), np.empty(0), np.empty(0)
+
+    counts = [len(cur_nodes) for cur_nodes in nodes]
+    x_values = np.concatenate(nodes)/12
+    y_values = np.repeat(np.arange(len(nodes))*spacing/12, counts)
+
+    return x_values, y_values, np.concatenate(depths)
+
+def _decimate_index(n, step):
+    '''
+    Returns every step-th index of an axis of length n, always keeping the
+    last index so that the grid still spans the whole roof bay.
+    '''
+    index = np.arange(0, n, step)
+    if n and index[-1] != n-1:
+        index = np.append(index, n-1)
+
+    return index
+
+def get_rain_depth_grid(model, decimate=None):
+    '''
+    Assembles the impounded rain depth of a roof bay into a 2D grid with one
+    row per secondary member. If the secondary members do not share the same
+    node locations, their depths are interpolated onto the union of the node
+    locations.
+
+    Parameters
+    ----------
+    model : pondpy.PondPyModel or BayResults
+        analyzed roof bay, or its compact results
+    decimate : int, optional
+        keeps every decimate-th node and secondary member (and the last
+        ones) to coarsen very dense meshes
+
+    Returns
+    -------
+    x : numpy.ndarray
+        locations along the secondary members in ft
+    y : numpy.ndarray
+        locations of the secondary members across the roof bay in ft
+    depth : numpy.ndarray
+        (len(y), len(x)) array of impounded rain depths in inches
+    '''
+    if decimate is not None and (not isinstance(decimate, int) or decimate < 1):
+        raise TypeError('decimate must be a positive integer or None')
+
+    nodes, depths, spacing = get_secondary_depths(model)
+    if not nodes:
+        return np.empty(0), np.empty(0), np.empty((0, 0))
+
+    if all(len(cur_nodes) == len(nodes[0]) and np.array_equal(cur_nodes, nodes[0]) for cur_nodes in nodes):
+        x = np.asarray(nodes[0], dtype=float)
+        depth = np.vstack(depths).astype(float)
+    else:
+        x = np.unique(np.concatenate(nodes))
+        depth = np.vstack([np.interp(x, cur_nodes, cur_depths) for cur_nodes, cur_depths in zip(nodes, depths)])
+
+    x = x/12
+    y = np.arange(len(nodes))*spacing/12
+
+    if decimate is not None and decimate > 1:
+        i_x = _decimate_index(len(x), decimate)
+        i_y = _decimate_index(len(y), decimate)
+        x, y, depth = x[i_x], y[i_y], depth[np.ix_(i_y, i_x)]
+
+    return x, y, depth
+
+def draw_rain_depth(ax, model, kind='heatmap', decimate=None, vmin=None, vmax=None):
+    '''
+    Draws the impounded rain depth of a roof bay on existing axes.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        axes to draw on. Must be 3D axes for the 'surface' and 'scatter'
+        kinds.
+    model : pondpy.PondPyModel or BayResults
+        analyzed roof bay, or its compact results
+    kind : str, optional
+        'heatmap', 'contour', 'surface', or 'scatter'
+    decimate : int, optional
+        decimation step of the grid, see get_rain_depth_grid
+    vmin, vmax : float, optional
+        limits of the color scale
+
+    Returns
+    -------
+    artist : matplotlib.artist.Artist
+        artist holding the plotted depths, which can be used for a colorbar,
+        or None if the roof bay has no secondary members
+    '''
+    if kind not in RAIN_PLOT_KINDS:
+        raise ValueError(f'kind must be one of {RAIN_PLOT_KINDS}')
+
+    if kind == 'scatter':
+        x_values, y_values, z_values = get_rain_depth(model)
+        if not len(x_values):
+            return None
+        artist = ax.scatter(x_values, y_values, z_values, c=z_values, cmap=RAIN_DEPTH_CMAP, vmin=vmin, vmax=vmax)
+        ax.auto_scale_xyz(x_values, y_values, z_values, had_data=False)
+        return artist
+
+    x, y, depth = get_rain_depth_grid(model, decimate=decimate)
+    if not depth.size:
+        return None
+
+    if kind == 'heatmap':
+        # The node spacing is not uniform, so each depth is drawn as the
+        # cell around its node
+        artist = ax.pcolormesh(x, y, depth, shading='nearest', cmap=RAIN_DEPTH_CMAP, vmin=vmin, vmax=vmax)
+    elif kind == 'contour':
+        if len(x) < 2 or len(y) < 2:
+            artist = ax.pcolormesh(x, y, depth, shading='nearest', cmap=RAIN_DEPTH_CMAP, vmin=vmin, vmax=vmax)
+        else:
+            artist = ax.contourf(x, y, depth, levels=12, cmap=RAIN_DEPTH_CMAP, vmin=vmin, vmax=vmax)
+    elif kind == 'surface':
+        x_grid, y_grid = np.meshgrid(x, y)
+        artist = ax.plot_surface(x_grid, y_grid, depth, cmap=RAIN_DEPTH_CMAP, vmin=vmin, vmax=vmax)
+        ax.auto_scale_xyz(x_grid, y_grid, depth, had_data=False)
+        return artist
+
+    if len(x) > 1:
+        ax.set_xlim(x[0], x[-1])
+    if len(y) > 1:
+        ax.set_ylim(y[0], y[-1])
+
+    return artist
+
+def plot_rain_depth_grid(model, kind='heatmap', decimate=None):
+    '''
+    Plots the impounded rain depth of a roof bay as a heatmap, filled
+    contour, or surface plot.
+
+    Parameters
+    ----------
+    model : pondpy.PondPyModel or BayResults
+        analyzed roof bay, or its compact results
+    kind : str, optional
+        'heatmap', 'contour', 'surface', or 'scatter'
+    decimate : int, optional
+        decimation step of the grid, see get_rain_depth_grid
+
+    Returns
+    -------
+    fig : matplotlib.figure.Figure
+        matplotlib.figure.Figure object containing the plot
+    '''
+    from matplotlib import pyplot as plt
+
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection='3d' if kind in ['surface', 'scatter'] else None)
+
+    artist = draw_rain_depth(ax, model, kind=kind, decimate=decimate)
+    if artist is not None and kind != 'scatter':
+        fig.colorbar(artist, ax=ax, label='Depth (in)')
+
+    ax.set_title('Impounded Rain Depth (in)')
+    ax.set_xlabel('Ls (ft)')
+    ax.set_ylabel('Lp (ft)')
+
+    plt.close()
+
+    return fig
+
+def _nearest_index(values, points):
+    '''
+    Returns the index of the nearest value in a sorted array for each point.
+    '''
+    index = np.clip(np.searchsorted(values, points), 1, len(values)-1)
+    left = values[index-1]
+    right = values[index]
+
+    return np.where(points-left <= right-points, index-1, index)
+
+def get_roof_mosaic(models, ncols=None, resolution=0.5):
+    '''
+    Stitches the impounded rain depth grids of all roof bays into a single
+    image. The roof bays are laid out in input order on a grid of equal
+    tiles sized to the largest roof bay, and each roof bay is sampled onto
+    pixels of the same size so that the bays are drawn to a common scale.
+
+    Parameters
+    ----------
+    models : list or RoofBayResults
+        list of analyzed roof bays, or their compact results. Roof bays that
+        failed to analyze (None) are left blank.
+    ncols : int, optional
+        number of roof bays per row of the mosaic. Defaults to a square
+        layout.
+    resolution : float, optional
+        size of each pixel in ft
+
+    Returns
+    -------
+    mosaic : numpy.ndarray
+        2D array of impounded rain depths in inches, NaN outside of the roof
+        bays. Row 0 is at the bottom of the mosaic.
+    tiles : list
+        list of (x, y, width, height) extents in ft of each roof bay in the
+        mosaic, or None for roof bays that are left blank
+    '''
+    if resolution <= 0:
+        raise ValueError('resolution must be positive')
+
+    grids = [None if model is None else get_rain_depth_grid(model) for model in models]
+    n_bays = len(grids)
+    if ncols is None:
+        ncols = max(1, math.ceil(math.sqrt(n_bays)))
+    nrows = max(1, math.ceil(n_bays/ncols))
+
+    sizes = [(grid[0][-1], grid[1][-1]) for grid in grids if grid is not None and grid[2].size]
+    tile_width = max([size[0] for size in sizes], default=0)
+    tile_height = max([size[1] for size in sizes], default=0)
+
+    # Each tile is followed by a blank pixel so that neighboring roof bays
+    # stay distinguishable
+    tile_nx = int(math.ceil(tile_width/resolution))+2
+    tile_ny = int(math.ceil(tile_height/resolution))+2
+    mosaic = np.full((nrows*tile_ny, ncols*tile_nx), np.nan)
+
+    tiles = []
+    for bay, grid in enumerate(grids):
+        if grid is None or not grid[2].size:
+            tiles.append(None)
+            continue
+        x, y, depth = grid
+
+        # Rows are laid out from the top of the mosaic down
+        row = nrows-1-bay//ncols
+        col = bay%ncols
+        px = np.arange(int(math.floor(x[-1]/resolution))+1)*resolution
+        py = np.arange(int(math.floor(y[-1]/resolution))+1)*resolution
+        i_x = _nearest_index(x, px) if len(x) > 1 else np.zeros(len(px), dtype=int)
+        i_y = _nearest_index(y, py) if len(y) > 1 else np.zeros(len(py), dtype=int)
+
+        row_start, col_start = row*tile_ny, col*tile_nx
+        mosaic[row_start:row_start+len(py), col_start:col_start+len(px)] = depth[np.ix_(i_y, i_x)]
+        tiles.append((col_start*resolution, row_start*resolution, x[-1], y[-1]))
+
+    return mosaic, tiles
+
+def plot_roof_mosaic(models, labels=None, ncols=None, resolution=0.5):
+    '''
+    Plots the impounded rain depth of all roof bays as a single heatmap with
+    a shared color scale.
+
+    Parameters
+    ----------
+    models : list or RoofBayResults
+        list of analyzed roof bays, or their compact results
+    labels : list, optional
+        label drawn on each roof bay, e.g. the roof bay descriptions.
+        Defaults to the roof bay numbers.
+    ncols : int, optional
+        number of roof bays per row of the mosaic
+    resolution : float, optional
+        size of each pixel in ft
+
+    Returns
+    -------
+    fig : matplotlib.figure.Figure
+        matplotlib.figure.Figure object containing the mosaic
+    '''
+    from matplotlib import pyplot as plt
+
+    mosaic, tiles = get_roof_mosaic(models, ncols=ncols, resolution=resolution)
+    if labels is None:
+        labels = [f'Roof Bay {bay+1}' for bay in range(len(tiles))]
+
+    # Blank areas are shaded so that dry parts of the roof bays stand out
+    # from the gaps between them
+    cmap = plt.get_cmap(RAIN_DEPTH_CMAP).copy()
+    cmap.set_bad('lightgray')
+
+    fig, ax = plt.subplots()
+    extent = (0, mosaic.shape[1]*resolution, 0, mosaic.shape[0]*resolution)
+    image = ax.imshow(mosaic, origin='lower', extent=extent, cmap=cmap, interpolation='nearest')
+    fig.colorbar(image, ax=ax, label='Depth (in)')
+
+    for label, tile in zip(labels, tiles):
+        if tile is not None:
+            x, y, width, height = tile
+            ax.text(x+width/2, y+height/2, label, ha='center', va='center', fontsize='small')
+
+    ax.set_title('Impounded Rain Depth (in)')
+    ax.set_xticks([])
+    ax.set_yticks([])
+
+    plt.close()
+
+    return fig
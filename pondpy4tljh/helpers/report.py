@@ -0,0 +1,331 @@
+import base64
+import datetime
+import html
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .plot_renderer import (
+    PLOT_LABELS,
+    PLOT_TYPES,
+    get_diagram_xy,
+)
+from .rain_depth import draw_rain_depth
+from .result_helpers import (
+    DEFAULT_L_OVER_D_LIMIT,
+    create_summary_table,
+    get_summary_rollup,
+)
+from .result_store import (
+    BayResults,
+    RoofBayResults,
+    compact_model,
+)
+
+REPORT_FORMATS = ['pdf', 'html']
+REPORT_COLUMNS = [
+    'Member',
+    'Member Size',
+    'Max Moment (k-ft)',
+    'Moment Capacity (k-ft)',
+    'Max Shear (k)',
+    'Shear Capacity (k)',
+    'Deflection (in)',
+    'L/d',
+    'Max D/C',
+    'Pass',
+]
+ROLLUP_COLUMNS = [
+    'Members',
+    'Failing Members',
+    'Member',
+    'Member Size',
+    'Max D/C',
+    'Pass',
+]
+PAGE_SIZE = (11, 8.5)
+LINES_PER_PAGE = 52
+
+def get_report_format(path):
+    '''
+    Returns the report format ('pdf' or 'html') from the extension of the
+    report path.
+    '''
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension == 'htm':
+        extension = 'html'
+    if extension not in REPORT_FORMATS:
+        raise ValueError(f'the report path must end in one of {[f".{f}" for f in REPORT_FORMATS]}')
+
+    return extension
+
+def _figure_to_png(figure, dpi):
+    '''
+    Renders a figure to PNG bytes.
+    '''
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', dpi=dpi)
+    return buffer.getvalue()
+
+def render_bay_figures(bay_results, title, kind='heatmap', members_per_page=6, dpi=150):
+    '''
+    Renders the member diagram pages and the impounded rain depth page of a
+    roof bay to PNG images. Defined at module level so that it can be sent
+    to worker processes. The figures are drawn with the Agg canvas directly,
+    so no interactive backend or pyplot state is used.
+
+    Parameters
+    ----------
+    bay_results : dict
+        results of the roof bay in the format of the compact_model helper
+        function
+    title : str
+        title drawn at the top of each page
+    kind : str, optional
+        kind of the impounded rain depth plot, see draw_rain_depth
+    members_per_page : int, optional
+        number of members drawn on each member diagram page
+    dpi : int, optional
+        resolution of the images
+
+    Returns
+    -------
+    figures : list
+        list of (caption, PNG bytes) pairs
+    '''
+    bay = RoofBayResults.from_models([bay_results])[0]
+    members = bay.get_members()
+    figures = []
+
+    # Each member is drawn as a row of its deflected shape, shear force
+    # diagram, and bending moment diagram
+    for start in range(0, len(members), members_per_page):
+        page_members = members[start:start+members_per_page]
+        figure = Figure(figsize=PAGE_SIZE)
+        FigureCanvasAgg(figure)
+        figure.suptitle(f'{title} - Member Diagrams')
+        axes = figure.subplots(members_per_page, len(PLOT_TYPES), squeeze=False)
+
+        for i_row, row in enumerate(axes):
+            if i_row >= len(page_members):
+                for ax in row:
+                    ax.set_visible(False)
+                continue
+
+            type_member, number = page_members[i_row].split('-')
+            diagrams, length = bay.get_member_diagrams(type_member, int(number)-1)
+            for ax, type_plot in zip(row, PLOT_TYPES):
+                ax.plot(*get_diagram_xy(diagrams, length, type_plot), 'b-', linewidth=1)
+                ax.grid(linewidth=0.5)
+                ax.tick_params(labelsize=6)
+                if i_row == 0:
+                    ax.set_title(PLOT_LABELS[type_plot], fontsize=8)
+            row[0].set_ylabel(page_members[i_row], fontsize=8)
+
+        # Fixed margins instead of tight_layout, which draws the page twice
+        figure.subplots_adjust(left=0.07, right=0.98, bottom=0.04, top=0.91, hspace=0.35, wspace=0.2)
+        figures.append((f"Member Diagrams ({', '.join(page_members)})", _figure_to_png(figure, dpi)))
+
+    figure = Figure(figsize=PAGE_SIZE)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111, projection='3d' if kind in ['surface', 'scatter'] else None)
+    artist = draw_rain_depth(ax, bay, kind=kind)
+    if artist is not None:
+        ax.set_title(f'{title} - Impounded Rain Depth (in)')
+        ax.set_xlabel('Ls (ft)')
+        ax.set_ylabel('Lp (ft)')
+        if kind != 'scatter':
+            figure.colorbar(artist, ax=ax, label='Depth (in)')
+        figures.append(('Impounded Rain Depth', _figure_to_png(figure, dpi)))
+
+    return figures
+
+def _iter_bay_figures(tasks, workers, **kwargs):
+    '''
+    Yields the rendered figures of each roof bay in order. With a process
+    pool, only a bounded number of roof bays are in flight at once, so the
+    memory used does not grow with the number of roof bays.
+    '''
+    if workers is None or workers == 1:
+        for bay_results, title in tasks:
+            yield render_bay_figures(bay_results, title, **kwargs)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for bay_results, title in tasks:
+            pending.append(executor.submit(render_bay_figures, bay_results, title, **kwargs))
+            if len(pending) >= 2*workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+class _PdfReport:
+    '''
+    Writes the report pages to a PDF file as they are created.
+    '''
+    def __init__(self, path):
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        self.pdf = PdfPages(path)
+
+    def add_text(self, title, lines):
+        for start in range(0, max(len(lines), 1), LINES_PER_PAGE):
+            figure = Figure(figsize=PAGE_SIZE)
+            FigureCanvasAgg(figure)
+            figure.text(0.05, 0.95, title, fontsize=14, weight='bold', va='top')
+            figure.text(0.05, 0.90, '\n'.join(lines[start:start+LINES_PER_PAGE]), fontsize=7, family='monospace', va='top')
+            self.pdf.savefig(figure)
+
+    def add_table(self, title, table, text=None):
+        lines = table.to_string(index=False).split('\n')
+        if text:
+            lines += [''] + text.expandtabs(8).split('\n')
+        self.add_text(title, lines)
+
+    def add_image(self, caption, image):
+        from matplotlib.image import imread
+
+        figure = Figure(figsize=PAGE_SIZE)
+        FigureCanvasAgg(figure)
+        ax = figure.add_axes([0, 0, 1, 1])
+        ax.imshow(imread(io.BytesIO(image), format='png'))
+        ax.set_axis_off()
+        self.pdf.savefig(figure)
+
+    def close(self):
+        self.pdf.close()
+
+class _HtmlReport:
+    '''
+    Writes the report sections to a self-contained HTML file as they are
+    created.
+    '''
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write(
+            '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>Roof Bay Analysis Report</title>\n'
+            '<style>body{font-family:sans-serif;margin:2em;} table{border-collapse:collapse;font-size:0.85em;} '
+            'th,td{border:1px solid #ccc;padding:2px 6px;text-align:right;} img{max-width:100%;} '
+            'section{page-break-before:always;}</style>\n</head>\n<body>\n'
+        )
+
+    def add_text(self, title, lines):
+        self.file.write(f'<section>\n<h2>{html.escape(title)}</h2>\n<pre>{html.escape(chr(10).join(lines))}</pre>\n</section>\n')
+
+    def add_table(self, title, table, text=None):
+        self.file.write(f'<section>\n<h2>{html.escape(title)}</h2>\n{table.to_html(index=False)}\n')
+        if text:
+            self.file.write(f'<pre>{html.escape(text)}</pre>\n')
+        self.file.write('</section>\n')
+
+    def add_image(self, caption, image):
+        self.file.write(
+            f'<figure><img src="data:image/png;base64,{base64.b64encode(image).decode()}" alt="{html.escape(caption)}">'
+            f'<figcaption>{html.escape(caption)}</figcaption></figure>\n'
+        )
+
+    def close(self):
+        self.file.write('</body>\n</html>\n')
+        self.file.close()
+
+def write_report(path, user_input, models, workers=None, kind='heatmap', members_per_page=6, dpi=150, l_over_d_limit=DEFAULT_L_OVER_D_LIMIT):
+    '''
+    Writes a calculation report of every analyzed roof bay to a PDF or HTML
+    file. The report starts with the governing member of each roof bay,
+    followed by the summary table, the ponding iteration log, the member
+    diagrams, and the impounded rain depth plot of each roof bay.
+
+    The report is written page by page as the roof bays are rendered, so
+    its memory use does not depend on the number of roof bays. With
+    workers, the plots are rendered to images in a pool of worker processes
+    and placed in the report in roof bay order.
+
+    Parameters
+    ----------
+    path : str
+        path of the report file, ending in .pdf or .html
+    user_input : dict
+        dictionary containing the user input created by the package_input
+        helper function
+    models : list or RoofBayResults
+        list of analyzed pondpy.PondPyModel objects, or their compact
+        results. Roof bays that failed to analyze (None) are skipped.
+    workers : int, optional
+        number of worker processes rendering the plots. If None or 1, the
+        plots are rendered in the current process.
+    kind : str, optional
+        kind of the impounded rain depth plots, see draw_rain_depth
+    members_per_page : int, optional
+        number of members drawn on each member diagram page
+    dpi : int, optional
+        resolution of the plot images
+    l_over_d_limit : int or float, optional
+        minimum span to deflection ratio for a member to pass
+
+    Returns
+    -------
+    analysis_summary : pandas.DataFrame
+        analysis summary of the roof bays in the report
+    '''
+    from .helpers import get_bay_description
+    from .result_helpers import summarize_model
+
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise TypeError('workers must be a positive integer or None')
+    report_format = get_report_format(path)
+
+    # The summary rows are small, so the whole summary is created first for
+    # the roof-wide rollup on the first page
+    bays = [bay for bay, model in enumerate(models) if model is not None]
+    descriptions = [get_bay_description(user_input, bay) for bay in bays]
+    bay_rows = [
+        models[bay].summarize() if isinstance(models[bay], BayResults) else summarize_model(models[bay])
+        for bay in bays
+    ]
+    analysis_summary = create_summary_table(bay_rows, descriptions, l_over_d_limit=l_over_d_limit)
+    offsets = np.cumsum([0]+[len(rows) for rows in bay_rows])
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    report = _PdfReport(path) if report_format == 'pdf' else _HtmlReport(path)
+    try:
+        n_failing = int((~analysis_summary['Pass']).sum())
+        header = [
+            f"Created: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}",
+            f"pondpy version: {version('pondpy')}",
+            f"Roof bays: {len(bays)} of {len(models)} analyzed",
+            f"Members: {len(analysis_summary)}, {n_failing} failing (L/d limit {l_over_d_limit})",
+            '',
+            'Governing member of each roof bay:',
+            '',
+        ]
+        rollup = analysis_summary.copy()
+        rollup['Description'] = [f'{bay+1}: {desc}' for bay, rows, desc in zip(bays, bay_rows, descriptions) for _ in rows]
+        rollup = get_summary_rollup(rollup)[ROLLUP_COLUMNS].reset_index()
+        report.add_text('Roof Bay Analysis Report', header+rollup.to_string(index=False).split('\n'))
+
+        # The results of each roof bay are extracted only when it is
+        # rendered, and only the arrays of that roof bay are sent to a
+        # worker, even if the results are memory-mapped from a project archive
+        tasks = (
+            (models[bay].to_dict() if isinstance(models[bay], BayResults) else compact_model(models[bay]), desc)
+            for bay, desc in zip(bays, descriptions)
+        )
+        figures = _iter_bay_figures(tasks, workers, kind=kind, members_per_page=members_per_page, dpi=dpi)
+        for i_bay, (bay, desc, bay_figures) in enumerate(zip(bays, descriptions, figures)):
+            table = analysis_summary.iloc[offsets[i_bay]:offsets[i_bay+1]][REPORT_COLUMNS]
+            report.add_table(f'Roof Bay {bay+1}: {desc}', table, text=getattr(models[bay], 'out_str', None))
+            for caption, image in bay_figures:
+                report.add_image(caption, image)
+    finally:
+        report.close()
+
+    return analysis_summary
@@ -0,0 +1,356 @@
+import hashlib
+import json
+import os
+import tempfile
+from importlib.metadata import version
+
+import numpy as np
+
+CACHE_DIR_ENV = 'PONDPY4TLJH_CACHE_DIR'
+# Bumped whenever the cached results change, so that stale entries are
+# never served
+CACHE_FORMAT = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pondpy4tljh')
+DEFAULT_MAX_BYTES = 2*1024**3
+# Number of stores after which the cache directory is rescanned for entries
+# written by other users
+RESCAN_INTERVAL = 100
+# Entries are evicted down to this fraction of max_bytes, so that the
+# directory is not scanned again on the next store
+EVICT_FRACTION = 0.9
+ENTRY_SUFFIX = '.npz'
+# Permissions of the shard directories and entries, so that every user of a
+# shared cache directory can add entries to shards created by another user
+SHARD_MODE = 0o2775
+ENTRY_MODE = 0o664
+PONDPY_VERSION = version('pondpy')
+
+def normalize_bay_input(bay_input):
+    '''
+    Normalizes the input for a single roof bay so that equivalent inputs
+    (e.g. 'w12x16' and 'W12X16', 20 and 20.0) produce the same cache key.
+
+    Parameters
+    ----------
+    bay_input : dict
+        dictionary containing the input for the roof bay created by the
+        get_bay_input helper function
+
+    Returns
+    -------
+    normalized_input : dict
+        dictionary containing the normalized input for the roof bay
+    '''
+    def normalize_supports(members_support):
+        return [
+            [[float(support[0]), support[1].upper()] for support in mem]
+            for mem in members_support
+        ]
+
+    return {
+        'primary_members_size':[size.upper() for size in bay_input['primary_members_size']],
+        'primary_members_length':[float(length) for length in bay_input['primary_members_length']],
+        'primary_members_support':normalize_supports(bay_input['primary_members_support']),
+        'secondary_members_size':[size.upper() for size in bay_input['secondary_members_size']],
+        'secondary_members_length':[float(length) for length in bay_input['secondary_members_length']],
+        'secondary_members_support':normalize_supports(bay_input['secondary_members_support']),
+        'roof_bay_mirrored':[bool(mirrored) for mirrored in bay_input['roof_bay_mirrored']],
+        'roof_slope':abs(float(bay_input['roof_slope'])),
+        'dead_load_input':float(bay_input['dead_load_input']),
+        'rain_load_input':[float(head) for head in bay_input['rain_load_input']],
+        'include_self_weight':bool(bay_input['include_self_weight']),
+    }
+
+def get_bay_key(bay_input):
+    '''
+    Computes the canonical hash of the input for a single roof bay.
+
+    Parameters
+    ----------
+    bay_input : dict
+        dictionary containing the input for the roof bay created by the
+        get_bay_input helper function
+
+    Returns
+    -------
+    bay_key : str
+        hex digest identifying the roof bay input and the pondpy version used
+        to analyze it
+    '''
+    payload = {
+        'format':CACHE_FORMAT,
+        'pondpy':PONDPY_VERSION,
+        'input':normalize_bay_input(bay_input),
+    }
+    serialized = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+def store_in_cache(cache, bay_key, model, event_log, bay=None):
+    '''
+    Stores an analyzed roof bay in the cache. A failure to write the entry
+    (e.g. a full disk or a shared cache directory that is not writable) is
+    recorded as a 'cache_store_failed' event instead of being raised, so
+    that the analyzed roof bay is still kept.
+
+    Parameters
+    ----------
+    cache : ResultCache
+        cache the roof bay is stored in
+    bay_key : str
+        key created by the get_bay_key helper function
+    model : pondpy.PondPyModel or BayResults
+        analyzed roof bay to be cached
+    event_log : EventLog
+        event log that records the duration of the store
+    bay : int, optional
+        index of the roof bay
+
+    Returns
+    -------
+    stored : bool
+        indicates whether the roof bay was stored
+    '''
+    try:
+        with event_log.stage('cache store', bay=bay):
+            cache.put(bay_key, model)
+    except Exception as e:
+        event_log.emit('cache_store_failed', bay=bay, error=repr(e))
+        return False
+
+    return True
+
+class ResultCache:
+    '''
+    A class to represent an on-disk cache of analyzed roof bays keyed by the
+    canonical hash of each roof bay's input.
+
+    Each roof bay is stored as the arrays of its compact RoofBayResults in a
+    .npz archive and loaded without pickle, so a cache directory shared by
+    all users of the hub (by pointing the PONDPY4TLJH_CACHE_DIR environment
+    variable at a group-writable directory) cannot be used to run code as
+    another user. Cached roof bays are returned as BayResults objects, whose
+    out_str attribute holds the iteration log rebuilt from the recorded
+    convergence diagnostics.
+
+    ...
+
+    Attributes
+    ----------
+    cache_dir : str
+        directory holding the cached results
+    max_bytes : int
+        maximum total size of the cached results in bytes. The least recently
+        used entries are evicted once the cap is exceeded.
+
+    Methods
+    -------
+    clear():
+        Removes all entries from the cache.
+    get(bay_key):
+        Returns the cached roof bay for the given key, or None on a miss.
+    put(bay_key, model):
+        Stores the model under the given key and evicts old entries.
+    size():
+        Returns the total size of the cached results in bytes.
+    '''
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        '''
+        Constructs the required attributes for the ResultCache object.
+
+        Parameters
+        ----------
+        cache_dir : str, optional
+            directory holding the cached results. Defaults to the
+            PONDPY4TLJH_CACHE_DIR environment variable if set, otherwise
+            ~/.cache/pondpy4tljh.
+        max_bytes : int, optional
+            maximum total size of the cached results in bytes
+        '''
+        if cache_dir is None:
+            cache_dir = os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+        if not isinstance(max_bytes, int) or max_bytes <= 0:
+            raise TypeError('max_bytes must be a positive integer')
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        # Running total of the cache size, only rescanned from disk every
+        # RESCAN_INTERVAL stores or when the cap is exceeded
+        self._total_bytes = None
+        self._puts_since_scan = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, bay_key):
+        '''
+        Returns the path of the cache entry for the given key.
+        '''
+        return os.path.join(self.cache_dir, bay_key[:2], bay_key+ENTRY_SUFFIX)
+
+    def _make_shard(self, shard_dir):
+        '''
+        Creates a shard directory that is writable by the group of the
+        cache directory.
+        '''
+        if os.path.isdir(shard_dir):
+            return
+        os.makedirs(shard_dir, exist_ok=True)
+        try:
+            # makedirs applies the umask, so the mode is set explicitly. Only
+            # the owner can change it, so a shard created concurrently by
+            # another user is left as is.
+            os.chmod(shard_dir, SHARD_MODE)
+        except OSError:
+            pass
+
+    def _remove(self, path):
+        '''
+        Removes a cache entry, ignoring entries already removed.
+        '''
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _entries(self):
+        '''
+        Returns a list of (last access time, size, path) tuples for every
+        entry in the cache.
+        '''
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                if not file.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        return entries
+
+    def _evict(self):
+        '''
+        Removes the least recently used entries until the cache is within
+        EVICT_FRACTION of max_bytes, and updates the running total.
+        '''
+        entries = sorted(self._entries())
+        total = sum(entry[1] for entry in entries)
+        if total > self.max_bytes:
+            for _, size, path in entries:
+                if total <= EVICT_FRACTION*self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+        self._total_bytes = total
+        self._puts_since_scan = 0
+
+    def clear(self):
+        '''
+        Removes all entries from the cache.
+        '''
+        for _, _, path in self._entries():
+            self._remove(path)
+        self._total_bytes = 0
+
+    def get(self, bay_key):
+        '''
+        Returns the cached roof bay for the given key.
+
+        Parameters
+        ----------
+        bay_key : str
+            key created by the get_bay_key helper function
+
+        Returns
+        -------
+        model : BayResults or None
+            compact results of the cached roof bay, or None if the key is not
+            in the cache
+        '''
+        from .result_store import (
+            RoofBayResults,
+            load_npz_arrays,
+        )
+
+        path = self._entry_path(bay_key)
+        if not os.path.exists(path):
+            return None
+        try:
+            model = RoofBayResults.from_arrays(load_npz_arrays(path), path=path)[0]
+            if model is None or model.bay_key != bay_key:
+                raise ValueError(f'{path} does not hold the roof bay {bay_key}')
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A truncated, corrupt, or incompatible entry is removed and
+            # treated as a miss
+            self._remove(path)
+            return None
+
+        # Mark the entry as recently used for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return model
+
+    def put(self, bay_key, model):
+        '''
+        Stores the compact results of an analyzed roof bay under the given
+        key. The least recently used entries are evicted once the cache
+        exceeds max_bytes; the cache directory is only scanned when the cap
+        is exceeded or every RESCAN_INTERVAL stores.
+
+        Parameters
+        ----------
+        bay_key : str
+            key created by the get_bay_key helper function
+        model : pondpy.PondPyModel or BayResults
+            analyzed roof bay to be cached
+        '''
+        from .result_store import (
+            BayResults,
+            RoofBayResults,
+            compact_model,
+        )
+
+        bay_results = model.to_dict() if isinstance(model, BayResults) else compact_model(model)
+        bay_results['Bay Key'] = bay_key
+        arrays = RoofBayResults.from_models([bay_results]).get_arrays()
+
+        path = self._entry_path(bay_key)
+        self._make_shard(os.path.dirname(path))
+
+        # Write to a temporary file first so that other users never read a
+        # partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.chmod(tmp_path, ENTRY_MODE)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+        self._puts_since_scan += 1
+        if self._total_bytes is not None:
+            self._total_bytes += os.path.getsize(path)
+        if (
+            self._total_bytes is None
+            or self._total_bytes > self.max_bytes
+            or self._puts_since_scan >= RESCAN_INTERVAL
+        ):
+            self._evict()
+
+    def size(self):
+        '''
+        Returns the total size of the cached results in bytes.
+        '''
+        return sum(entry[1] for entry in self._entries())
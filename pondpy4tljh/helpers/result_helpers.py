@@ -0,0 +1,395 @@
+import numpy as np
+
+from pondpy import AnalysisError
+
+from .capacity_helpers import get_member_capacity
+
+SUMMARY_COLUMNS = [
+    'Member',
+    'Member Size',
+    'Max Moment (k-ft)',
+    'Moment Capacity (k-ft)',
+    'Max Shear (k)',
+    'Shear Capacity (k)',
+    'Deflection (in)',
+    'L/d',
+]
+UTILIZATION_COLUMNS = [
+    'Moment D/C',
+    'Shear D/C',
+    'Deflection D/C',
+    'Max D/C',
+    'L/d OK',
+    'Pass',
+]
+# Decimals the summary values are displayed with. The summary rows hold the
+# unrounded values, so that the pass/fail check is not affected by rounding.
+SUMMARY_DECIMALS = {
+    'Max Moment (k-ft)':2,
+    'Moment Capacity (k-ft)':1,
+    'Max Shear (k)':2,
+    'Shear Capacity (k)':1,
+    'Deflection (in)':2,
+    'L/d':0,
+}
+DEFAULT_L_OVER_D_LIMIT = 240
+
+def get_member_diagrams(beam_model):
+    '''
+    Extracts the bending moment, shear force, and deflection diagrams of an
+    analyzed pondpy.BeamModel object directly from its solved arrays, without
+    creating any matplotlib figures. The values match the ones plotted by
+    plot_bmd(), plot_sfd(), and plot_deflected_shape().
+
+    Parameters
+    ----------
+    beam_model : pondpy.BeamModel
+        analyzed pondpy.BeamModel object for a primary or secondary member
+
+    Returns
+    -------
+    diagrams : dict
+        dictionary containing the model node locations in inches ('Nodes'),
+        the bending moment in k-ft ('Moment') and shear force in k ('Shear')
+        at the left and right side of each node, and the deflection in inches
+        at each node ('Deflection')
+    '''
+    if not beam_model.analysis_complete:
+        raise AnalysisError('Analysis must be performed prior to extracting results.')
+
+    nodes = np.asarray(beam_model.model_nodes, dtype=float)
+    element_forces = np.asarray(beam_model.element_forces, dtype=float)
+
+    # Each element contributes its left end moment to both sides of its i-node,
+    # and the last element's right end moment closes the diagram
+    moment = np.empty(2*len(nodes))
+    moment[:-2] = np.repeat(-element_forces[:, 2]/12, 2)
+    moment[-2:] = element_forces[-1, 5]/12
+
+    # The shear diagram starts and ends at zero with the left and right end
+    # shears of each element in between
+    shear = np.zeros(2*len(nodes))
+    shear[1:-1:2] = element_forces[:, 1]
+    shear[2:-1:2] = -element_forces[:, 4]
+
+    # Vertical displacement at each node, zero at restrained dofs
+    g_dof = np.asarray(beam_model.dof_num)[:, 1]
+    displacement = np.asarray(beam_model.global_displacement, dtype=float).reshape(-1)
+    deflection = np.where(g_dof != 0, displacement[g_dof-1], 0.0)
+
+    return {
+        'Nodes':nodes,
+        'Moment':moment,
+        'Shear':shear,
+        'Deflection':deflection,
+    }
+
+def get_diagram_results(diagrams, length, decimals=2):
+    '''
+    Finds the maximum bending moment, shear force, and deflection from member
+    diagrams created by the get_member_diagrams helper function.
+
+    Parameters
+    ----------
+    diagrams : dict
+        dictionary of member diagrams created by the get_member_diagrams
+        helper function
+    length : float
+        length of the member in inches
+    decimals : int, optional
+        number of decimals the values and locations are rounded to, or None
+        to leave them unrounded
+
+    Returns
+    -------
+    results : dict
+        dictionary containing the (maximum value, location in ft) pair for
+        the bending moment ('Moment'), shear force ('Shear') and deflection
+        ('Deflection'), rounded as by the pondpy plotting methods by default
+    '''
+    def round_value(value):
+        return value if decimals is None else round(value, decimals)
+
+    step_x = np.repeat(diagrams['Nodes']/length, 2)
+
+    def abs_max(values):
+        i_max = int(np.argmax(values))
+        i_min = int(np.argmin(values))
+        if abs(values[i_max]) > abs(values[i_min]):
+            i_abs = i_max
+        else:
+            i_abs = i_min
+
+        return (round_value(abs(float(values[i_abs]))), round_value(float(step_x[i_abs])*length/12))
+
+    deflection = diagrams['Deflection']
+    i_defl = int(np.argmin(deflection))
+    x_defl = float(diagrams['Nodes'][i_defl]/length)*length/12
+
+    return {
+        'Moment':abs_max(diagrams['Moment']),
+        'Shear':abs_max(diagrams['Shear']),
+        'Deflection':(round_value(float(deflection[i_defl])), round_value(x_defl)),
+    }
+
+def get_member_results(beam_model, decimals=2):
+    '''
+    Finds the maximum bending moment, shear force, and deflection of an
+    analyzed pondpy.BeamModel object in a single pass over its solved arrays.
+
+    Parameters
+    ----------
+    beam_model : pondpy.BeamModel
+        analyzed pondpy.BeamModel object for a primary or secondary member
+    decimals : int, optional
+        number of decimals the values and locations are rounded to, or None
+        to leave them unrounded
+
+    Returns
+    -------
+    results : dict
+        dictionary containing the (maximum value, location in ft) pair for
+        the bending moment ('Moment'), shear force ('Shear') and deflection
+        ('Deflection')
+    '''
+    return get_diagram_results(get_member_diagrams(beam_model), beam_model.beam.length, decimals=decimals)
+
+def get_model_results(model):
+    '''
+    Finds the maximum bending moment, shear force, and deflection of every
+    primary and secondary member in an analyzed pondpy.PondPyModel object.
+
+    Parameters
+    ----------
+    model : pondpy.PondPyModel
+        analyzed pondpy.PondPyModel object
+
+    Returns
+    -------
+    results : dict
+        dictionary containing lists of member results created by the
+        get_member_results helper function for the primary ('Primary') and
+        secondary ('Secondary') members
+    '''
+    return {
+        'Primary':[get_member_results(p_model) for p_model in model.roof_bay_model.primary_models],
+        'Secondary':[get_member_results(s_model) for s_model in model.roof_bay_model.secondary_models],
+    }
+
+def summarize_model(model):
+    '''
+    Creates the analysis/design summary rows for every primary and secondary
+    member in an analyzed pondpy.PondPyModel object. The values are not
+    rounded; round_summary_row rounds them for display.
+
+    Parameters
+    ----------
+    model : pondpy.PondPyModel
+        analyzed pondpy.PondPyModel object
+
+    Returns
+    -------
+    rows : list
+        list of tuples, one per member, holding the values for each column in
+        SUMMARY_COLUMNS
+    '''
+    rows = []
+    members = [('P', p_model) for p_model in model.roof_bay_model.primary_models]
+    members += [('S', s_model) for s_model in model.roof_bay_model.secondary_models]
+
+    i_member = {'P':0, 'S':0}
+    for type_member, beam_model in members:
+        i_member[type_member] += 1
+
+        cur_results = get_member_results(beam_model, decimals=None)
+        cur_capacity = get_member_capacity(beam_model)
+
+        cur_max_defl = cur_results['Deflection'][0]
+        cur_l_over_defl = abs(beam_model.beam.length/cur_max_defl)
+
+        rows.append((
+            f'{type_member}-{i_member[type_member]}',
+            beam_model.beam.size.name,
+            cur_results['Moment'][0],
+            float(cur_capacity['Moment']),
+            cur_results['Shear'][0],
+            float(cur_capacity['Shear']),
+            cur_max_defl,
+            cur_l_over_defl,
+        ))
+
+    return rows
+
+def round_summary_row(row):
+    '''
+    Rounds the values of a summary row created by the summarize_model helper
+    function to the decimals they are displayed with (SUMMARY_DECIMALS).
+    '''
+    rounded = list(row[:2])
+    for column, value in zip(SUMMARY_COLUMNS[2:], row[2:]):
+        decimals = SUMMARY_DECIMALS[column]
+        rounded.append(round(value, decimals) if decimals > 0 else int(round(value, 0)))
+
+    return tuple(rounded)
+
+def create_summary_table(bay_rows, descriptions, l_over_d_limit=DEFAULT_L_OVER_D_LIMIT):
+    '''
+    Creates the analysis/design summary DataFrame from the summary rows of
+    each roof bay. The columns are filled as typed NumPy arrays in a single
+    pass over the roof bays, and the utilization columns are computed from
+    them in one vectorized step. The pass/fail flags are computed before the
+    values are rounded for display.
+
+    Parameters
+    ----------
+    bay_rows : list
+        list of summary row lists, one per roof bay, created by the
+        summarize_model helper function or BayResults.summarize()
+    descriptions : list
+        description of each roof bay in bay_rows
+    l_over_d_limit : int or float, optional
+        minimum span to deflection ratio for a member to pass
+
+    Returns
+    -------
+    analysis_summary : pandas.DataFrame
+        DataFrame holding the Description and SUMMARY_COLUMNS columns
+        followed by the UTILIZATION_COLUMNS columns
+    '''
+    import pandas as pd
+
+    n_rows = sum(len(rows) for rows in bay_rows)
+    description = np.empty(n_rows, dtype=object)
+    member = np.empty(n_rows, dtype=object)
+    size = np.empty(n_rows, dtype=object)
+    values = np.empty((n_rows, 5), dtype=float)
+    l_over_d = np.empty(n_rows, dtype=float)
+
+    start = 0
+    for cur_desc, rows in zip(descriptions, bay_rows):
+        stop = start+len(rows)
+        description[start:stop] = cur_desc
+        for i_row, row in enumerate(rows, start=start):
+            member[i_row], size[i_row] = row[0], row[1]
+            values[i_row] = row[2:7]
+            l_over_d[i_row] = row[7]
+        start = stop
+
+    analysis_summary = pd.DataFrame({
+        'Description':description,
+        'Member':member,
+        'Member Size':size,
+        **{column:values[:, i_col] for i_col, column in enumerate(SUMMARY_COLUMNS[2:7])},
+        'L/d':l_over_d,
+    })
+
+    analysis_summary = add_utilization_columns(analysis_summary, l_over_d_limit=l_over_d_limit)
+    for column, decimals in SUMMARY_DECIMALS.items():
+        analysis_summary[column] = analysis_summary[column].round(decimals)
+    analysis_summary['L/d'] = analysis_summary['L/d'].astype(np.int64)
+
+    return analysis_summary
+
+def get_demand_ratios(max_moment, moment_capacity, max_shear, shear_capacity, l_over_d, l_over_d_limit=DEFAULT_L_OVER_D_LIMIT):
+    '''
+    Returns the moment, shear, and deflection demand/capacity ratios of one
+    or more members, rounded to three decimals. The deflection D/C is the
+    L/d limit divided by the member's L/d.
+    '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        moment_dc = np.round(np.divide(max_moment, moment_capacity, dtype=float), 3)
+        shear_dc = np.round(np.divide(max_shear, shear_capacity, dtype=float), 3)
+        deflection_dc = np.round(np.divide(l_over_d_limit, l_over_d, dtype=float), 3)
+
+    return moment_dc, shear_dc, deflection_dc
+
+def get_member_pass(max_moment, moment_capacity, max_shear, shear_capacity, l_over_d, l_over_d_limit=DEFAULT_L_OVER_D_LIMIT):
+    '''
+    Returns whether one or more members pass, i.e. their moment and shear
+    demands are at most their capacities and their L/d is at least the L/d
+    limit. The unrounded values are compared, so that no member passes
+    because of rounding. Used by both the analysis/design summary and
+    optimize_roof_bays so that a member passes in one exactly when it passes
+    in the other.
+    '''
+    return (
+        (np.asarray(max_moment, dtype=float) <= np.asarray(moment_capacity, dtype=float))
+        & (np.asarray(max_shear, dtype=float) <= np.asarray(shear_capacity, dtype=float))
+        & (np.asarray(l_over_d, dtype=float) >= l_over_d_limit)
+    )
+
+def add_utilization_columns(analysis_summary, l_over_d_limit=DEFAULT_L_OVER_D_LIMIT):
+    '''
+    Adds the demand/capacity ratios and pass/fail flags of each member to an
+    analysis/design summary. The deflection D/C is the L/d limit divided by
+    the member's L/d, so every ratio passes at 1.0 or less.
+
+    Parameters
+    ----------
+    analysis_summary : pandas.DataFrame
+        DataFrame holding at least the SUMMARY_COLUMNS columns
+    l_over_d_limit : int or float, optional
+        minimum span to deflection ratio for a member to pass
+
+    Returns
+    -------
+    analysis_summary : pandas.DataFrame
+        copy of the summary with the UTILIZATION_COLUMNS columns added
+    '''
+    analysis_summary = analysis_summary.copy()
+
+    moment = analysis_summary['Max Moment (k-ft)'].to_numpy(dtype=float)
+    moment_capacity = analysis_summary['Moment Capacity (k-ft)'].to_numpy(dtype=float)
+    shear = analysis_summary['Max Shear (k)'].to_numpy(dtype=float)
+    shear_capacity = analysis_summary['Shear Capacity (k)'].to_numpy(dtype=float)
+    l_over_d = analysis_summary['L/d'].to_numpy(dtype=float)
+
+    moment_dc, shear_dc, deflection_dc = get_demand_ratios(
+        moment, moment_capacity, shear, shear_capacity, l_over_d, l_over_d_limit=l_over_d_limit,
+    )
+    max_dc = np.fmax(np.fmax(moment_dc, shear_dc), deflection_dc)
+
+    analysis_summary['Moment D/C'] = moment_dc
+    analysis_summary['Shear D/C'] = shear_dc
+    analysis_summary['Deflection D/C'] = deflection_dc
+    analysis_summary['Max D/C'] = max_dc
+    analysis_summary['L/d OK'] = l_over_d >= l_over_d_limit
+    analysis_summary['Pass'] = get_member_pass(
+        moment, moment_capacity, shear, shear_capacity, l_over_d, l_over_d_limit=l_over_d_limit,
+    )
+
+    return analysis_summary
+
+def get_summary_rollup(analysis_summary, by='Description'):
+    '''
+    Rolls an analysis/design summary up to the governing (highest Max D/C)
+    member of each group, e.g. the worst member of each roof bay or of each
+    member size across the whole roof. The rollup is computed from the
+    summary, so the models are not needed.
+
+    Parameters
+    ----------
+    analysis_summary : pandas.DataFrame
+        summary returned by show_analysis_summary
+    by : str or list, optional
+        column(s) to group by, e.g. 'Description' for each roof bay or
+        'Member Size' for each size
+
+    Returns
+    -------
+    rollup : pandas.DataFrame
+        DataFrame indexed by group holding the row of the governing member,
+        the number of members ('Members') and the number of failing members
+        ('Failing Members') in the group
+    '''
+    if 'Max D/C' not in analysis_summary.columns:
+        analysis_summary = add_utilization_columns(analysis_summary)
+
+    groups = analysis_summary.groupby(by, sort=False)
+    n_members = groups.size()
+
+    governing = analysis_summary.loc[groups['Max D/C'].idxmax()].set_index(by)
+    governing.insert(0, 'Members', n_members)
+    governing.insert(1, 'Failing Members', n_members-groups['Pass'].sum().astype(int))
+
+    return governing
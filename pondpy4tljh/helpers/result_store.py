@@ -0,0 +1,613 @@
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+RESULT_STORE_FORMAT = 1
+MEMBER_TYPES = ['P', 'S']
+# Arrays of a RoofBayResults object, saved and loaded by name
+_RESULT_ARRAYS = [
+    'bay_analyzed',
+    'bay_keys',
+    'bay_member_offsets',
+    'secondary_spacing',
+    'member_type',
+    'member_size',
+    'member_length',
+    'moment_capacity',
+    'shear_capacity',
+    'node_offsets',
+    'nodes',
+    'moment',
+    'shear',
+    'deflection',
+    'impounded_depth',
+    'bay_converged',
+    'bay_warm_start',
+    'bay_solve_time',
+    'bay_static_head',
+    'bay_iteration_offsets',
+    'iteration_weight',
+    'iteration_time',
+]
+
+def compact_model(model):
+    '''
+    Extracts the results of an analyzed pondpy.PondPyModel object needed for
+    the analysis summary and the plot widgets, so that the model itself does
+    not need to be kept.
+
+    Parameters
+    ----------
+    model : pondpy.PondPyModel
+        analyzed pondpy.PondPyModel object
+
+    Returns
+    -------
+    bay_results : dict
+        dictionary containing the hash of the roof bay input ('Bay Key'),
+        the secondary member spacing in inches ('Secondary Spacing'), and a
+        list of member dictionaries ('Members')
+        holding the member type, size name, length in inches, moment and
+        shear capacity, and the member diagrams created by the
+        get_member_diagrams helper function, with the impounded rain depth
+        at each node of the secondary members, along with the convergence
+        diagnostics created by the get_convergence helper function
+        ('Convergence')
+    '''
+    from .capacity_helpers import get_member_capacity
+    from .convergence import get_convergence
+    from .result_helpers import get_member_diagrams
+
+    members = []
+    beam_models = [('P', p_model) for p_model in model.roof_bay_model.primary_models]
+    beam_models += [('S', s_model) for s_model in model.roof_bay_model.secondary_models]
+
+    i_secondary = 0
+    for type_member, beam_model in beam_models:
+        diagrams = get_member_diagrams(beam_model)
+        capacity = get_member_capacity(beam_model)
+
+        # The impounded rain depth is only tracked at the secondary members
+        if type_member == 'S':
+            depth = np.asarray(model.impounded_depth['Secondary'][i_secondary], dtype=float)
+            i_secondary += 1
+        else:
+            depth = np.full(len(diagrams['Nodes']), np.nan)
+
+        members.append({
+            'Type':type_member,
+            'Size':beam_model.beam.size.name,
+            'Length':float(beam_model.beam.length),
+            'Moment Capacity':float(capacity['Moment']),
+            'Shear Capacity':float(capacity['Shear']),
+            'Diagrams':diagrams,
+            'Impounded Depth':depth,
+        })
+
+    return {
+        'Bay Key':getattr(model, 'bay_key', None),
+        'Secondary Spacing':float(model.roof_bay.secondary_spacing),
+        'Members':members,
+        'Convergence':get_convergence(model),
+    }
+
+def _memmap_zip_member(path, info, mmap_mode):
+    '''
+    Memory-maps a .npy file stored uncompressed in a zip archive, or returns
+    None if it cannot be memory-mapped.
+    '''
+    with open(path, 'rb') as f:
+        # The data of a member follows its local file header, which holds
+        # the lengths of the file name and extra field at byte 26
+        f.seek(info.header_offset)
+        header = f.read(30)
+        if header[:4] != b'PK\x03\x04':
+            return None
+        name_length, extra_length = struct.unpack('<HH', header[26:30])
+        f.seek(info.header_offset+30+name_length+extra_length)
+
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    if dtype.hasobject or int(np.prod(shape)) == 0:
+        return None
+
+    return np.memmap(
+        path, dtype=dtype, mode=mmap_mode, offset=offset, shape=shape, order='F' if fortran_order else 'C',
+    )
+
+def load_npz_arrays(path, mmap_mode=None, prefix=''):
+    '''
+    Loads the arrays of a .npz archive. Unlike numpy.load, the arrays of an
+    uncompressed archive can be memory-mapped directly from the archive
+    file.
+
+    Parameters
+    ----------
+    path : str
+        path of the .npz archive
+    mmap_mode : str, optional
+        memory-map mode (e.g. 'r'). If None, the arrays are loaded into
+        memory.
+    prefix : str, optional
+        only the arrays whose names start with the prefix are loaded, keyed
+        by their name without the prefix
+
+    Returns
+    -------
+    arrays : dict
+        dictionary of arrays keyed by name
+    '''
+    arrays = {}
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if not info.filename.startswith(prefix) or not info.filename.endswith('.npy'):
+                continue
+            name = info.filename[len(prefix):-len('.npy')]
+
+            array = None
+            if mmap_mode is not None and info.compress_type == zipfile.ZIP_STORED:
+                array = _memmap_zip_member(path, info, mmap_mode)
+            if array is None:
+                with archive.open(info) as f:
+                    array = np.lib.format.read_array(f, allow_pickle=False)
+            arrays[name] = array
+
+    return arrays
+
+class RoofBayResults:
+    '''
+    Compact store of the analysis results of a set of roof bays. Only the
+    member sizes, lengths, and capacities, the node locations, the bending
+    moment, shear force, and deflection diagrams, and the impounded rain
+    depths are kept, each in a single contiguous NumPy array for all roof
+    bays, instead of the full pondpy.PondPyModel objects. The results of the
+    members of each roof bay and the nodes of each member are located with
+    offset arrays. The convergence diagnostics of each roof bay are kept in
+    double precision regardless of dtype.
+
+    The object can be used in place of the list of models in
+    show_analysis_summary and the plot widgets. Indexing it returns the
+    BayResults of a roof bay, or None for roof bays that failed to analyze.
+
+    Parameters
+    ----------
+    arrays : dict
+        dictionary of result arrays keyed by the names in _RESULT_ARRAYS
+    sizes : list
+        list of member size names indexed by the member_size array
+    '''
+    def __init__(self, arrays, sizes):
+        for name in _RESULT_ARRAYS:
+            setattr(self, name, arrays[name])
+        self.sizes = list(sizes)
+
+    @classmethod
+    def from_models(cls, models, dtype='float64'):
+        '''
+        Creates the compact results from analyzed roof bays.
+
+        Parameters
+        ----------
+        models : list
+            list of analyzed pondpy.PondPyModel objects, BayResults
+            objects, or bay results created by the compact_model helper
+            function. Roof bays that failed to analyze (None) are kept as
+            None.
+        dtype : str or numpy.dtype, optional
+            floating point type of the result arrays, e.g. 'float32' to halve
+            their memory
+
+        Returns
+        -------
+        results : RoofBayResults
+        '''
+        dtype = np.dtype(dtype)
+        if dtype.kind != 'f':
+            raise TypeError('dtype must be a floating point type')
+
+        sizes = {}
+        bay_analyzed = []
+        bay_keys = []
+        bay_member_offsets = [0]
+        secondary_spacing = []
+        member_columns = {name:[] for name in ['type', 'size', 'length', 'moment_capacity', 'shear_capacity']}
+        node_offsets = [0]
+        node_columns = {name:[] for name in ['nodes', 'moment', 'shear', 'deflection', 'impounded_depth']}
+        bay_columns = {name:[] for name in ['converged', 'warm_start', 'solve_time', 'static_head']}
+        bay_iteration_offsets = [0]
+        iteration_columns = {name:[] for name in ['weight', 'time']}
+
+        for model in models:
+            if isinstance(model, BayResults):
+                model = model.to_dict()
+            elif model is not None and not isinstance(model, dict):
+                model = compact_model(model)
+
+            bay_analyzed.append(model is not None)
+            convergence = model.get('Convergence') if model is not None else None
+            if convergence is None:
+                bay_columns['converged'].append(False)
+                bay_columns['warm_start'].append(False)
+                bay_columns['solve_time'].append(np.nan)
+                bay_columns['static_head'].append(np.nan)
+                bay_iteration_offsets.append(bay_iteration_offsets[-1])
+            else:
+                bay_columns['converged'].append(convergence['Converged'])
+                bay_columns['warm_start'].append(convergence['Warm Start'])
+                bay_columns['solve_time'].append(convergence['Time'])
+                bay_columns['static_head'].append(convergence['Static Head'])
+                bay_iteration_offsets.append(bay_iteration_offsets[-1]+len(convergence['Weight']))
+                iteration_columns['weight'].append(convergence['Weight'])
+                iteration_columns['time'].append(convergence['Iteration Time'])
+
+            if model is None:
+                bay_keys.append('')
+                bay_member_offsets.append(bay_member_offsets[-1])
+                secondary_spacing.append(np.nan)
+                continue
+
+            bay_keys.append(model.get('Bay Key') or '')
+            secondary_spacing.append(model['Secondary Spacing'])
+            for member in model['Members']:
+                member_columns['type'].append(MEMBER_TYPES.index(member['Type']))
+                member_columns['size'].append(sizes.setdefault(member['Size'], len(sizes)))
+                member_columns['length'].append(member['Length'])
+                member_columns['moment_capacity'].append(member['Moment Capacity'])
+                member_columns['shear_capacity'].append(member['Shear Capacity'])
+
+                diagrams = member['Diagrams']
+                node_offsets.append(node_offsets[-1]+len(diagrams['Nodes']))
+                node_columns['nodes'].append(diagrams['Nodes'])
+                node_columns['moment'].append(diagrams['Moment'])
+                node_columns['shear'].append(diagrams['Shear'])
+                node_columns['deflection'].append(diagrams['Deflection'])
+                node_columns['impounded_depth'].append(member['Impounded Depth'])
+            bay_member_offsets.append(len(member_columns['type']))
+
+        def concatenate(values):
+            return np.concatenate(values).astype(dtype) if values else np.empty(0, dtype=dtype)
+
+        arrays = {
+            'bay_analyzed':np.array(bay_analyzed, dtype=bool),
+            'bay_keys':np.array(bay_keys, dtype=str),
+            'bay_member_offsets':np.array(bay_member_offsets, dtype=np.int64),
+            'secondary_spacing':np.array(secondary_spacing, dtype=dtype),
+            'member_type':np.array(member_columns['type'], dtype=np.int8),
+            'member_size':np.array(member_columns['size'], dtype=np.int32),
+            'member_length':np.array(member_columns['length'], dtype=dtype),
+            'moment_capacity':np.array(member_columns['moment_capacity'], dtype=dtype),
+            'shear_capacity':np.array(member_columns['shear_capacity'], dtype=dtype),
+            'node_offsets':np.array(node_offsets, dtype=np.int64),
+            'bay_converged':np.array(bay_columns['converged'], dtype=bool),
+            'bay_warm_start':np.array(bay_columns['warm_start'], dtype=bool),
+            'bay_solve_time':np.array(bay_columns['solve_time'], dtype=np.float64),
+            'bay_static_head':np.array(bay_columns['static_head'], dtype=np.float64),
+            'bay_iteration_offsets':np.array(bay_iteration_offsets, dtype=np.int64),
+        }
+        arrays.update({name:concatenate(values) for name, values in node_columns.items()})
+        arrays.update({
+            f'iteration_{name}':np.concatenate(values).astype(np.float64) if values else np.empty(0)
+            for name, values in iteration_columns.items()
+        })
+
+        return cls(arrays, sizes)
+
+    def __len__(self):
+        return len(self.bay_analyzed)
+
+    def __getitem__(self, bay):
+        if not -len(self) <= bay < len(self):
+            raise IndexError('roof bay index out of range')
+        bay %= len(self)
+        if not self.bay_analyzed[bay]:
+            return None
+        return BayResults(self, bay)
+
+    def __iter__(self):
+        for bay in range(len(self)):
+            yield self[bay]
+
+    @property
+    def nbytes(self):
+        '''
+        Total size of the result arrays in bytes.
+        '''
+        return sum(getattr(self, name).nbytes for name in _RESULT_ARRAYS)
+
+    def get_arrays(self):
+        '''
+        Returns the result arrays keyed by name, along with the member size
+        names ('sizes') and the format version ('format'), as saved to disk.
+        '''
+        arrays = {name:getattr(self, name) for name in _RESULT_ARRAYS}
+        arrays['sizes'] = np.array(self.sizes, dtype=str)
+        arrays['format'] = np.array(RESULT_STORE_FORMAT)
+
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, path='results'):
+        '''
+        Creates the results from arrays returned by the get_arrays method,
+        e.g. after loading them from disk.
+        '''
+        if 'format' not in arrays or int(arrays['format']) != RESULT_STORE_FORMAT:
+            raise ValueError(f'{path} was saved in an unsupported results format')
+
+        return cls(arrays, arrays['sizes'].tolist())
+
+    def save(self, path, compressed=False):
+        '''
+        Saves the results. A path ending in .npz is written as a single NumPy
+        archive with numpy.savez; any other path is written as a directory of
+        .npy files. Both can be memory-mapped when loaded, unless the archive
+        is compressed.
+
+        Parameters
+        ----------
+        path : str
+            path of the .npz archive or of the directory
+        compressed : bool, optional
+            indicates whether a .npz archive is compressed
+        '''
+        arrays = self.get_arrays()
+
+        if path.endswith('.npz'):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            (np.savez_compressed if compressed else np.savez)(path, **arrays)
+            return
+
+        os.makedirs(path, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f'{name}.npy'), array)
+        with open(os.path.join(path, 'results.json'), 'w') as f:
+            json.dump({'format':RESULT_STORE_FORMAT, 'arrays':list(arrays)}, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        '''
+        Loads results saved with the save method.
+
+        Parameters
+        ----------
+        path : str
+            path of the .npz archive or of the directory
+        mmap_mode : str, optional
+            memory-map mode (e.g. 'r'). The arrays are then read from disk
+            on access instead of being loaded into memory. Arrays in a
+            compressed .npz archive are always loaded into memory.
+
+        Returns
+        -------
+        results : RoofBayResults
+        '''
+        if os.path.isdir(path):
+            with open(os.path.join(path, 'results.json')) as f:
+                names = json.load(f)['arrays']
+            arrays = {
+                name:np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+                for name in names
+            }
+        else:
+            arrays = load_npz_arrays(path, mmap_mode=mmap_mode)
+
+        return cls.from_arrays(arrays, path=path)
+
+class BayResults:
+    '''
+    View of the results of a single roof bay in a RoofBayResults object.
+
+    Parameters
+    ----------
+    results : RoofBayResults
+        compact results holding the roof bay
+    bay : int
+        index of the roof bay
+    '''
+    def __init__(self, results, bay):
+        self.results = results
+        self.bay = bay
+        self.member_slice = slice(
+            int(results.bay_member_offsets[bay]), int(results.bay_member_offsets[bay+1])
+        )
+
+    @property
+    def bay_key(self):
+        '''
+        Hash of the input of the roof bay, or None if it is not known.
+        '''
+        return str(self.results.bay_keys[self.bay]) or None
+
+    @property
+    def secondary_spacing(self):
+        '''
+        Spacing of the secondary members in inches.
+        '''
+        return float(self.results.secondary_spacing[self.bay])
+
+    def to_dict(self):
+        '''
+        Copies the results of the roof bay into the format of the
+        compact_model helper function, e.g. to combine them with the results
+        of another run.
+        '''
+        results = self.results
+        members = []
+        for i_mem in range(self.member_slice.start, self.member_slice.stop):
+            start, end = int(results.node_offsets[i_mem]), int(results.node_offsets[i_mem+1])
+            members.append({
+                'Type':MEMBER_TYPES[int(results.member_type[i_mem])],
+                'Size':results.sizes[int(results.member_size[i_mem])],
+                'Length':float(results.member_length[i_mem]),
+                'Moment Capacity':float(results.moment_capacity[i_mem]),
+                'Shear Capacity':float(results.shear_capacity[i_mem]),
+                'Diagrams':{name:np.array(diagram) for name, diagram in self._get_diagrams(i_mem).items()},
+                'Impounded Depth':np.array(results.impounded_depth[start:end]),
+            })
+
+        return {
+            'Bay Key':self.bay_key,
+            'Secondary Spacing':self.secondary_spacing,
+            'Members':members,
+            'Convergence':self.get_convergence(),
+        }
+
+    def get_members(self):
+        '''
+        Returns the labels of the members of the roof bay (e.g. 'P-1', 'S-3').
+        '''
+        labels = []
+        counts = {type_member:0 for type_member in MEMBER_TYPES}
+        for i_type in self.results.member_type[self.member_slice]:
+            type_member = MEMBER_TYPES[i_type]
+            counts[type_member] += 1
+            labels.append(f'{type_member}-{counts[type_member]}')
+
+        return labels
+
+    def _get_member_index(self, type_member, i_member):
+        '''
+        Returns the index of a member in the member arrays of the results.
+        '''
+        i_type = MEMBER_TYPES.index(type_member)
+        members = np.flatnonzero(self.results.member_type[self.member_slice] == i_type)
+        if not 0 <= i_member < len(members):
+            raise IndexError(f'roof bay {self.bay+1} has no member {type_member}-{i_member+1}')
+
+        return self.member_slice.start+int(members[i_member])
+
+    def get_member_diagrams(self, type_member, i_member):
+        '''
+        Returns the diagrams of a member in the format of the
+        get_member_diagrams helper function, along with its length.
+
+        Parameters
+        ----------
+        type_member : str
+            member type, either 'P' or 'S'
+        i_member : int
+            index of the member among the members of its type
+
+        Returns
+        -------
+        diagrams : dict
+            dictionary of member diagrams
+        length : float
+            length of the member in inches
+        '''
+        i_mem = self._get_member_index(type_member, i_member)
+
+        return self._get_diagrams(i_mem), float(self.results.member_length[i_mem])
+
+    def _get_diagrams(self, i_mem):
+        '''
+        Returns the diagrams of a member by its index in the member arrays.
+        The diagrams are views of the result arrays.
+        '''
+        results = self.results
+        start, end = int(results.node_offsets[i_mem]), int(results.node_offsets[i_mem+1])
+
+        return {
+            'Nodes':results.nodes[start:end],
+            'Moment':results.moment[2*start:2*end],
+            'Shear':results.shear[2*start:2*end],
+            'Deflection':results.deflection[start:end],
+        }
+
+    def get_secondary_depths(self):
+        '''
+        Returns the node locations in inches and the impounded rain depth in
+        inches at each node of the secondary members, as lists of array
+        views with one array per secondary member.
+        '''
+        results = self.results
+        i_secondary = np.flatnonzero(results.member_type[self.member_slice] == MEMBER_TYPES.index('S'))
+        i_secondary += self.member_slice.start
+
+        nodes, depths = [], []
+        for i_mem in i_secondary:
+            start, end = int(results.node_offsets[i_mem]), int(results.node_offsets[i_mem+1])
+            nodes.append(results.nodes[start:end])
+            depths.append(results.impounded_depth[start:end])
+
+        return nodes, depths
+
+    def get_convergence(self):
+        '''
+        Returns the convergence diagnostics of the roof bay in the format of
+        the get_convergence helper function, or None if they were not
+        recorded.
+        '''
+        from .convergence import get_residuals
+
+        results = self.results
+        start, end = int(results.bay_iteration_offsets[self.bay]), int(results.bay_iteration_offsets[self.bay+1])
+        if start == end:
+            return None
+
+        weight = np.array(results.iteration_weight[start:end])
+
+        return {
+            'Iterations':end-start-1,
+            'Converged':bool(results.bay_converged[self.bay]),
+            'Warm Start':bool(results.bay_warm_start[self.bay]),
+            'Time':float(results.bay_solve_time[self.bay]),
+            'Static Head':float(results.bay_static_head[self.bay]),
+            'Weight':weight,
+            'Residual':get_residuals(weight),
+            'Iteration Time':np.array(results.iteration_time[start:end]),
+        }
+
+    @property
+    def out_str(self):
+        '''
+        Iteration log of the roof bay in the format of the out_str attribute
+        of pondpy.PondPyModel, rebuilt from the convergence diagnostics, or
+        None if they were not recorded.
+        '''
+        from .convergence import format_iteration_log
+
+        convergence = self.get_convergence()
+        if convergence is None:
+            return None
+
+        return format_iteration_log(convergence['Weight'], convergence['Time'])
+
+    def summarize(self):
+        '''
+        Creates the analysis/design summary rows of the roof bay in the
+        format of the summarize_model helper function.
+        '''
+        from .result_helpers import get_diagram_results
+
+        results = self.results
+        rows = []
+        for i_mem, label in enumerate(self.get_members(), start=self.member_slice.start):
+            length = float(results.member_length[i_mem])
+
+            cur_results = get_diagram_results(self._get_diagrams(i_mem), length, decimals=None)
+            cur_max_defl = cur_results['Deflection'][0]
+            cur_l_over_defl = abs(length/cur_max_defl)
+
+            rows.append((
+                label,
+                results.sizes[int(results.member_size[i_mem])],
+                cur_results['Moment'][0],
+                float(results.moment_capacity[i_mem]),
+                cur_results['Shear'][0],
+                float(results.shear_capacity[i_mem]),
+                cur_max_defl,
+                cur_l_over_defl,
+            ))
+
+        return rows
@@ -0,0 +1,476 @@
+import itertools
+import os
+
+import numpy as np
+
+from .section_index import (
+    lookup_section,
+    normalize_designation,
+)
+
+LAYOUT_FORMATS = {
+    '.csv':'csv',
+    '.xlsx':'excel',
+    '.xlsm':'excel',
+}
+MEMBER_COLUMNS = [
+    'Bay',
+    'Type',
+    'Size',
+    'Length',
+]
+BAY_COLUMNS = [
+    'Description',
+    'Dead Load',
+    'Static Head',
+    'Hydraulic Head',
+    'Roof Slope',
+    'Mirrored Left',
+    'Mirrored Right',
+]
+# Bay columns that may be left out of the sheets, with their default values
+BAY_DEFAULTS = {
+    'Description':'',
+    'Roof Slope':0.25,
+    'Mirrored Left':False,
+    'Mirrored Right':False,
+}
+MEMBER_TYPES = {
+    'P':'primary',
+    'S':'secondary',
+}
+MEMBERS_SHEET = 'Members'
+BAYS_SHEET = 'Bays'
+DEFAULT_CHUNKSIZE = 10000
+# Number of rows listed in the error messages of the importer
+_MAX_ERROR_ROWS = 10
+
+def get_layout_format(path):
+    '''
+    Returns the format of a roof layout file from its extension.
+
+    Parameters
+    ----------
+    path : str
+        path of the roof layout file
+
+    Returns
+    -------
+    layout_format : str
+        'csv' or 'excel'
+    '''
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in LAYOUT_FORMATS:
+        raise ValueError(f'{path} is not a supported roof layout file; expected one of {list(LAYOUT_FORMATS)}')
+
+    return LAYOUT_FORMATS[extension]
+
+def _format_rows(rows):
+    '''
+    Formats the spreadsheet row numbers of invalid rows for an error message.
+    '''
+    formatted = [str(row) for row in rows[:_MAX_ERROR_ROWS]]
+    if len(rows) > _MAX_ERROR_ROWS:
+        formatted.append('...')
+
+    return ', '.join(formatted)
+
+def _load_workbook(path):
+    '''
+    Opens an Excel workbook in read-only mode with openpyxl.
+    '''
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError('reading Excel roof layout files requires the openpyxl package')
+
+    return openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+def _read_sheet_chunks(path, sheet_name, chunksize):
+    '''
+    Reads a CSV file or an Excel worksheet in chunks of rows. The index of
+    each chunk is the spreadsheet row number of each row, counting the header
+    as row 1.
+    '''
+    import pandas as pd
+
+    if get_layout_format(path) == 'csv':
+        for chunk in pd.read_csv(path, chunksize=chunksize, skipinitialspace=True):
+            chunk.index += 2
+            yield chunk
+        return
+
+    # The workbook is read in read-only mode, so rows are streamed from the
+    # file instead of being loaded all at once
+    workbook = _load_workbook(path)
+    try:
+        if sheet_name is None:
+            worksheet = workbook.worksheets[0]
+        elif sheet_name in workbook.sheetnames:
+            worksheet = workbook[sheet_name]
+        else:
+            raise ValueError(f'{path} has no {sheet_name!r} sheet')
+
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(column) if column is not None else '' for column in header]
+
+        first_row = 2
+        while True:
+            block = list(itertools.islice(rows, chunksize))
+            if not block:
+                break
+            chunk = pd.DataFrame(block, columns=columns, index=pd.RangeIndex(first_row, first_row+len(block)))
+            first_row += len(block)
+            yield chunk.dropna(how='all')
+    finally:
+        workbook.close()
+
+def _get_sheet_name(path, sheet_name):
+    '''
+    Returns the sheet name to read from an Excel workbook, or None to read
+    the first sheet. CSV files have no sheets.
+    '''
+    if get_layout_format(path) == 'csv':
+        return None
+
+    workbook = _load_workbook(path)
+    try:
+        return sheet_name if sheet_name in workbook.sheetnames else None
+    finally:
+        workbook.close()
+
+def _prepare_member_chunk(chunk, path):
+    '''
+    Normalizes the columns of a chunk of member rows and checks the values
+    that every member requires.
+    '''
+    import pandas as pd
+
+    chunk.columns = [str(column).strip() for column in chunk.columns]
+    missing = [column for column in MEMBER_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f'{path} is missing the member columns {missing}')
+
+    members = pd.DataFrame(index=chunk.index)
+    members['Bay'] = chunk['Bay']
+    members['Type'] = chunk['Type'].astype(str).str.strip().str[:1].str.upper()
+    members['Size'] = chunk['Size'].astype(str).str.strip()
+    members['Length'] = pd.to_numeric(chunk['Length'], errors='coerce')
+    if 'Member' in chunk.columns:
+        members['Member'] = pd.to_numeric(chunk['Member'], errors='coerce')
+    if 'Supports' in chunk.columns:
+        members['Supports'] = chunk['Supports'].where(chunk['Supports'].notna(), None)
+    for column in BAY_COLUMNS:
+        if column in chunk.columns:
+            members[column] = chunk[column]
+
+    invalid_rows = chunk.index[chunk['Bay'].isna().to_numpy()].tolist()
+    if invalid_rows:
+        raise ValueError(f'{path}: the roof bay of rows {_format_rows(invalid_rows)} is missing')
+    invalid_rows = chunk.index[~members['Type'].isin(list(MEMBER_TYPES)).to_numpy()].tolist()
+    if invalid_rows:
+        raise ValueError(f"{path}: the member type of rows {_format_rows(invalid_rows)} must be 'Primary' or 'Secondary' (or 'P' or 'S')")
+    invalid_rows = chunk.index[(chunk['Size'].isna() | (members['Size'] == '')).to_numpy()].tolist()
+    if invalid_rows:
+        raise ValueError(f'{path}: the member size of rows {_format_rows(invalid_rows)} is missing')
+    invalid_rows = chunk.index[~(members['Length'] > 0).to_numpy()].tolist()
+    if invalid_rows:
+        raise ValueError(f'{path}: the member length of rows {_format_rows(invalid_rows)} must be a positive number')
+
+    members['Bay'] = members['Bay'].astype(str).str.strip()
+
+    return members
+
+def _read_members(path, sheet_name, chunksize):
+    '''
+    Reads the member rows of a roof layout file in chunks and concatenates
+    the normalized chunks.
+    '''
+    import pandas as pd
+
+    chunks = [_prepare_member_chunk(chunk, path) for chunk in _read_sheet_chunks(path, sheet_name, chunksize)]
+    if not chunks:
+        raise ValueError(f'{path} has no member rows')
+
+    members = pd.concat(chunks)
+    members.index.name = 'Row'
+
+    return members
+
+def _read_bays(path, sheet_name, chunksize):
+    '''
+    Reads the roof bay rows of a roof layout file, indexed by roof bay.
+    '''
+    import pandas as pd
+
+    chunks = list(_read_sheet_chunks(path, sheet_name, chunksize))
+    if not chunks:
+        raise ValueError(f'{path} has no roof bay rows')
+
+    bays = pd.concat(chunks)
+    bays.columns = [str(column).strip() for column in bays.columns]
+    if 'Bay' not in bays.columns:
+        raise ValueError(f"{path} is missing the 'Bay' column of the roof bays")
+
+    bays['Bay'] = bays['Bay'].astype(str).str.strip()
+    duplicated = bays.index[bays['Bay'].duplicated().to_numpy()].tolist()
+    if duplicated:
+        raise ValueError(f'{path}: rows {_format_rows(duplicated)} repeat a roof bay')
+
+    return bays.set_index('Bay')
+
+def _get_bay_table(members, bays, bay_order, path):
+    '''
+    Creates the table of roof bay values in roof bay order, either from the
+    roof bay rows or from the roof bay columns of the member rows.
+    '''
+    import pandas as pd
+
+    bay_columns = [column for column in BAY_COLUMNS if column in members.columns]
+    if bays is None and not bay_columns:
+        bays = pd.DataFrame(index=pd.Index(bay_order, name='Bay'))
+    elif bays is None:
+        grouped = members.groupby('Bay', sort=False)[bay_columns]
+
+        # Every member row of a roof bay must repeat the same roof bay values
+        conflicting = grouped.nunique() > 1
+        if conflicting.any(axis=None):
+            bay, column = conflicting.stack().loc[lambda x: x].index[0]
+            raise ValueError(f'{path}: the member rows of roof bay {bay} have conflicting {column!r} values')
+
+        bays = grouped.first()
+
+    missing = [bay for bay in bay_order if bay not in bays.index]
+    if missing:
+        raise ValueError(f'{path}: roof bays {missing[:_MAX_ERROR_ROWS]} have members but no roof bay values')
+
+    bays = bays.reindex(bay_order)
+    for column in BAY_COLUMNS:
+        if column not in bays.columns:
+            if column not in BAY_DEFAULTS:
+                raise ValueError(f'{path} is missing the roof bay column {column!r}')
+            bays[column] = BAY_DEFAULTS[column]
+        elif column in BAY_DEFAULTS:
+            bays[column] = bays[column].where(bays[column].notna(), BAY_DEFAULTS[column])
+
+    for column in ['Dead Load', 'Static Head', 'Hydraulic Head', 'Roof Slope']:
+        values = pd.to_numeric(bays[column], errors='coerce')
+        invalid = values.index[values.isna().to_numpy()].tolist()
+        if invalid:
+            raise ValueError(f'{path}: the {column!r} of roof bays {invalid[:_MAX_ERROR_ROWS]} must be a number')
+        bays[column] = values
+
+    for column in ['Mirrored Left', 'Mirrored Right']:
+        values = bays[column].astype(str).str.strip().str.lower()
+        bays[column] = values.isin(['true', 'yes', 'y', '1', '1.0'])
+
+    bays['Description'] = bays['Description'].astype(str).str.strip()
+
+    return bays
+
+def _get_member_supports(members, path):
+    '''
+    Creates the (location, support type) pairs of every member from the
+    'Supports' column, e.g. '0:pinned; 20:pinned'. Members without supports
+    are pinned at both ends.
+    '''
+    import pandas as pd
+
+    default = '0:pinned;' + members['Length'].astype(str) + ':pinned'
+    if 'Supports' in members.columns:
+        supports = members['Supports'].astype('string').str.strip()
+        supports = supports.where(supports.notna() & (supports != ''), default)
+    else:
+        supports = default
+
+    # Every support becomes a row, located by the position of its member
+    supports = supports.str.split(';').explode().str.strip()
+    supports = supports[supports != '']
+    parts = supports.str.split(':', n=1, expand=True).reindex(columns=[0, 1])
+    locations = pd.to_numeric(parts[0], errors='coerce')
+    types = parts[1].str.strip().str.lower()
+
+    invalid = (locations.isna() | types.isna() | (types == '')).to_numpy()
+    if invalid.any():
+        rows = sorted(set(supports.index[invalid]))
+        raise ValueError(f"{path}: the supports of rows {_format_rows(rows)} must be 'location:type' pairs separated by ';'")
+
+    positions = pd.Series(np.arange(len(members)), index=members.index).loc[supports.index].to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(positions, minlength=len(members)))])
+    order = np.argsort(positions, kind='stable')
+
+    pairs = list(zip(locations.to_numpy()[order].tolist(), types.to_numpy()[order].tolist()))
+
+    return [pairs[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+def _split_sizes(sizes):
+    '''
+    Splits the member sizes into beam and joist sizes. Sizes that are not in
+    the section index are assigned by their designation, so that validation
+    reports them with suggestions.
+    '''
+    beam_sizes, joist_sizes = [], []
+    for size in sizes:
+        section = lookup_section(size)
+        if section is not None:
+            is_beam = section['type'] == 'AISC'
+        else:
+            is_beam = normalize_designation(size).startswith('W')
+        (beam_sizes if is_beam else joist_sizes).append(size)
+
+    return beam_sizes, joist_sizes
+
+def load_roof_layout(path, bays_path=None, chunksize=DEFAULT_CHUNKSIZE, project_name='', project_number='', include_self_weight=True):
+    '''
+    Reads a whole-building roof layout from one-row-per-member CSV or Excel
+    sheets and converts it into the package_input schema.
+
+    The member rows have the columns 'Bay' (roof bay label), 'Type'
+    ('Primary' or 'Secondary'), 'Size', and 'Length' (ft), and optionally
+    'Member' (order of the member in the roof bay, in row order if omitted)
+    and 'Supports' ('location:type' pairs in ft separated by ';', pinned at
+    both ends if omitted). The roof bay values 'Dead Load' (psf), 'Static
+    Head' and 'Hydraulic Head' (in), and optionally 'Description', 'Roof
+    Slope' (in/ft, 0.25 if omitted), 'Mirrored Left', and 'Mirrored Right'
+    are either repeated on the member rows or entered once per roof bay in a
+    separate sheet with a 'Bay' column: the 'Bays' sheet of an Excel
+    workbook, or the bays_path file.
+
+    The rows are read in chunks and grouped into roof bays with pandas, so
+    layouts with tens of thousands of members are converted without
+    creating an object for each member. The roof bays are numbered in the
+    order they first appear in the member rows.
+
+    Parameters
+    ----------
+    path : str
+        path of the .csv, .xlsx, or .xlsm file of member rows. The 'Members'
+        sheet of a workbook is read, or its first sheet if there is none.
+    bays_path : str, optional
+        path of a .csv, .xlsx, or .xlsm file of roof bay rows
+    chunksize : int, optional
+        number of rows read at a time
+    project_name : str, optional
+        name of the project
+    project_number : str, optional
+        number of the project
+    include_self_weight : bool, optional
+        indicates whether the member self-weight is included
+
+    Returns
+    -------
+    user_input : dict
+        dictionary of user input in the package_input schema, which can be
+        passed as keyword arguments to analyze_roof_bays
+    '''
+    if not isinstance(chunksize, int) or chunksize < 1:
+        raise TypeError('chunksize must be a positive integer')
+
+    members = _read_members(path, _get_sheet_name(path, MEMBERS_SHEET), chunksize)
+
+    bays = None
+    if bays_path is not None:
+        bays = _read_bays(bays_path, _get_sheet_name(bays_path, BAYS_SHEET), chunksize)
+    elif get_layout_format(path) == 'excel' and _get_sheet_name(path, BAYS_SHEET) is not None:
+        bays = _read_bays(path, BAYS_SHEET, chunksize)
+
+    bay_order = members['Bay'].unique().tolist()
+    bays = _get_bay_table(members, bays, bay_order, path)
+
+    # Sort the members by roof bay, type, and member order, keeping the row
+    # order of members without a member number
+    members['Bay Index'] = members['Bay'].map({bay:i_bay for i_bay, bay in enumerate(bay_order)})
+    sort_columns = ['Bay Index', 'Type'] + (['Member'] if 'Member' in members.columns else [])
+    members = members.sort_values(sort_columns, kind='stable')
+
+    member_supports = _get_member_supports(members, path)
+    member_sizes = members['Size'].tolist()
+    member_lengths = members['Length'].tolist()
+
+    # Each (roof bay, type) group is a contiguous slice of the sorted members
+    n_roof_bays = len(bay_order)
+    group_codes = 2*members['Bay Index'].to_numpy() + (members['Type'] == 'S').to_numpy()
+    group_offsets = np.searchsorted(group_codes, np.arange(2*n_roof_bays+1)).tolist()
+
+    user_input = {
+        'project_name':project_name,
+        'project_number':project_number,
+        'calc_description':bays['Description'].tolist(),
+        'n_roof_bays':n_roof_bays,
+        'include_self_weight':include_self_weight,
+    }
+    for i_type, member_type in enumerate(MEMBER_TYPES.values()):
+        slices = [slice(group_offsets[2*bay+i_type], group_offsets[2*bay+i_type+1]) for bay in range(n_roof_bays)]
+        user_input[f'{member_type}_members_size'] = [member_sizes[s] for s in slices]
+        user_input[f'{member_type}_members_length'] = [member_lengths[s] for s in slices]
+        user_input[f'{member_type}_members_support'] = [member_supports[s] for s in slices]
+
+    user_input['beam_sizes'], user_input['joist_sizes'] = _split_sizes(members['Size'].unique().tolist())
+    user_input['roof_bay_mirrored'] = list(zip(bays['Mirrored Left'].tolist(), bays['Mirrored Right'].tolist()))
+    user_input['roof_slope'] = bays['Roof Slope'].tolist()
+    user_input['dead_load_input'] = bays['Dead Load'].tolist()
+    user_input['rain_load_input'] = list(zip(bays['Static Head'].tolist(), bays['Hydraulic Head'].tolist()))
+
+    return user_input
+
+def save_roof_layout(user_input, path):
+    '''
+    Writes the user input as a roof layout that can be read with
+    load_roof_layout, e.g. to convert a project entered in the notebook into
+    a spreadsheet. A CSV file repeats the roof bay values on each member row;
+    an Excel workbook has a 'Members' and a 'Bays' sheet.
+
+    Parameters
+    ----------
+    user_input : dict
+        dictionary of user input in the package_input schema
+    path : str
+        path of the .csv, .xlsx, or .xlsm file
+    '''
+    import pandas as pd
+
+    layout_format = get_layout_format(path)
+    n_roof_bays = user_input['n_roof_bays']
+
+    rows = []
+    for bay in range(n_roof_bays):
+        for member_type, name in MEMBER_TYPES.items():
+            for i_mem, (size, length, supports) in enumerate(zip(
+                user_input[f'{name}_members_size'][bay],
+                user_input[f'{name}_members_length'][bay],
+                user_input[f'{name}_members_support'][bay],
+            )):
+                supports = '; '.join(f'{location}:{support}' for location, support in supports)
+                rows.append((bay+1, name.title(), i_mem+1, size, length, supports))
+    members = pd.DataFrame(rows, columns=MEMBER_COLUMNS[:2]+['Member']+MEMBER_COLUMNS[2:]+['Supports'])
+
+    descriptions = list(user_input['calc_description'])
+    descriptions += ['']*(n_roof_bays - len(descriptions))
+    bays = pd.DataFrame({
+        'Bay':range(1, n_roof_bays+1),
+        'Description':descriptions[:n_roof_bays],
+        'Dead Load':user_input['dead_load_input'],
+        'Static Head':[rain_load[0] for rain_load in user_input['rain_load_input']],
+        'Hydraulic Head':[rain_load[1] for rain_load in user_input['rain_load_input']],
+        'Roof Slope':user_input['roof_slope'],
+        'Mirrored Left':[mirrored[0] for mirrored in user_input['roof_bay_mirrored']],
+        'Mirrored Right':[mirrored[1] for mirrored in user_input['roof_bay_mirrored']],
+    })
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if layout_format == 'csv':
+        members.merge(bays, on='Bay', how='left').to_csv(path, index=False)
+        return
+
+    try:
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            members.to_excel(writer, sheet_name=MEMBERS_SHEET, index=False)
+            bays.to_excel(writer, sheet_name=BAYS_SHEET, index=False)
+    except ImportError:
+        raise ImportError('writing Excel roof layout files requires the openpyxl package')
@@ -0,0 +1,274 @@
+import difflib
+import json
+import os
+import re
+import tempfile
+from importlib.metadata import version
+
+from .result_cache import (
+    CACHE_DIR_ENV,
+    DEFAULT_CACHE_DIR,
+)
+
+SECTION_INDEX_FORMAT = 1
+SECTION_INDEX_FILE = 'section_index.json'
+JOIST_SERIES = ['K', 'KCS']
+
+# Nominal designations, e.g. 'W12X16' (depth, weight) and '14K1' (depth,
+# series, chord size)
+_BEAM_PATTERN = re.compile(r'^W(\d+)X(\d+(?:_\d+)?)$')
+_JOIST_PATTERN = re.compile(r'^(\d+)(KCS|K)(\d+)$')
+
+# Section index of the session, loaded on first use
+_SECTION_INDEX = {}
+
+def normalize_designation(size):
+    '''
+    Normalizes a member size to its canonical designation by removing
+    whitespace, converting it to upper case, and writing decimal points as
+    underscores like the steelpy tables (e.g. ' w6x8.5' to 'W6X8_5').
+
+    Parameters
+    ----------
+    size : str
+        member size entered by the user
+
+    Returns
+    -------
+    designation : str
+        canonical designation of the member size
+    '''
+    return ''.join(size.split()).upper().replace('.', '_')
+
+def _get_table_versions():
+    '''
+    Returns the versions of the packages that provide the section tables.
+    '''
+    return {'steelpy':version('steelpy'), 'joistpy':version('joistpy')}
+
+def build_section_index():
+    '''
+    Builds the section index from the steelpy AISC W-shape table and the
+    joistpy K-series and KCS-series tables.
+
+    Returns
+    -------
+    section_index : dict
+        dictionary keyed by canonical designation (e.g. 'W12X16' or '14K1')
+        holding the section type ('AISC' or 'SJI'), family ('W', 'K', or
+        'KCS'), table key, weight in plf, and depth in inches of each
+        section
+    '''
+    from joistpy import sji
+    from steelpy import aisc
+
+    section_index = {}
+    for name, section in aisc.W_shapes.sections.items():
+        section_index[name] = {
+            'type':'AISC',
+            'family':'W',
+            'table_key':name,
+            'weight':float(section.properties['weight']),
+            'depth':float(section.properties['d']),
+        }
+
+    for series in JOIST_SERIES:
+        for table_key, designation in sji.joist_type[f'{series}_Series'].designations.items():
+            # The joistpy tables include placeholder designations without any
+            # load table data (e.g. 'KCS_Unnamed: 41'), so only designations
+            # with a weight are kept
+            if 'weight' not in designation.properties:
+                continue
+            name = table_key.split('_', 1)[1]
+            section_index[name] = {
+                'type':'SJI',
+                'family':series,
+                'table_key':table_key,
+                'weight':float(designation.properties['weight']),
+                'depth':float(name.split(series)[0]),
+            }
+
+    return section_index
+
+def get_section_index_path(cache_dir=None):
+    '''
+    Returns the path of the section index cache file. The file is kept in
+    the result cache directory.
+    '''
+    if cache_dir is None:
+        cache_dir = os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+
+    return os.path.join(cache_dir, SECTION_INDEX_FILE)
+
+def save_section_index(section_index, path):
+    '''
+    Writes the section index to a JSON cache file, tagged with the versions of
+    the section tables it was built from.
+
+    Parameters
+    ----------
+    section_index : dict
+        section index created by the build_section_index helper function
+    path : str
+        path of the cache file
+    '''
+    payload = {
+        'format':SECTION_INDEX_FORMAT,
+        'versions':_get_table_versions(),
+        'sections':section_index,
+    }
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        os.chmod(tmp_path, 0o664)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_section_index(path):
+    '''
+    Reads the section index from a JSON cache file.
+
+    Returns
+    -------
+    section_index : dict
+        section index, or None if the file is missing, unreadable, or was
+        built from other versions of the section tables
+    '''
+    try:
+        with open(path) as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(payload, dict):
+        return None
+    if payload.get('format') != SECTION_INDEX_FORMAT or payload.get('versions') != _get_table_versions():
+        return None
+
+    return payload.get('sections')
+
+def get_section_index(cache_dir=None, rebuild=False):
+    '''
+    Returns the section index of the session. On first use it is read from
+    the cache file, or built from the section tables and written to the
+    cache file if there is no valid cache file.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        directory of the cache file. Defaults to the result cache directory.
+    rebuild : bool, optional
+        indicates whether the index is rebuilt from the section tables even
+        if it is already loaded or cached
+
+    Returns
+    -------
+    section_index : dict
+        section index created by the build_section_index helper function
+    '''
+    if _SECTION_INDEX and not rebuild:
+        return _SECTION_INDEX
+
+    path = get_section_index_path(cache_dir)
+    section_index = None if rebuild else load_section_index(path)
+    if section_index is None:
+        section_index = build_section_index()
+        try:
+            save_section_index(section_index, path)
+        except OSError:
+            # The cache is only an optimization, e.g. the home directory may
+            # be read-only
+            pass
+
+    _SECTION_INDEX.clear()
+    _SECTION_INDEX.update(section_index)
+
+    return _SECTION_INDEX
+
+def lookup_section(size, section_type=None):
+    '''
+    Looks up a member size in the section index.
+
+    Parameters
+    ----------
+    size : str
+        member size entered by the user (e.g. 'w12x16' or '14k1')
+    section_type : str, optional
+        required section type, either 'AISC' or 'SJI'
+
+    Returns
+    -------
+    section : dict
+        section index entry of the member size, or None if the size does not
+        exist or is not of the required section type
+    '''
+    section = get_section_index().get(normalize_designation(size))
+    if section is None or (section_type is not None and section['type'] != section_type):
+        return None
+
+    return section
+
+def _parse_designation(designation):
+    '''
+    Splits a nominal designation into its family, nominal depth, and size
+    number (nominal weight of a W-shape or chord size of a joist).
+    '''
+    match = _BEAM_PATTERN.match(designation)
+    if match:
+        return 'W', float(match.group(1)), float(match.group(2).replace('_', '.'))
+
+    match = _JOIST_PATTERN.match(designation)
+    if match:
+        return match.group(2), float(match.group(1)), float(match.group(3))
+
+    return None
+
+def suggest_sections(size, section_type=None, n=3):
+    '''
+    Finds the designations in the section index closest to a member size
+    that does not exist, for "did you mean" hints. Sizes that follow the
+    nominal designation pattern are matched to the sizes of the same family
+    and nominal depth with the closest weight or chord size; other sizes are
+    matched by spelling.
+
+    Parameters
+    ----------
+    size : str
+        member size entered by the user
+    section_type : str, optional
+        section type of the suggestions, either 'AISC' or 'SJI'
+    n : int, optional
+        maximum number of suggestions
+
+    Returns
+    -------
+    suggestions : list
+        list of up to n designations, closest first
+    '''
+    designation = normalize_designation(size)
+    candidates = [
+        name for name, section in get_section_index().items()
+        if section_type is None or section['type'] == section_type
+    ]
+
+    parsed = _parse_designation(designation)
+    if parsed is not None:
+        family, depth, number = parsed
+        nearby = []
+        for name in candidates:
+            cur_parsed = _parse_designation(name)
+            if cur_parsed is not None and cur_parsed[1] == depth:
+                # Sizes of another joist series of the same depth rank after
+                # the sizes of the entered series
+                nearby.append((cur_parsed[0] != family, abs(cur_parsed[2]-number), name))
+        if nearby:
+            return [name for *_, name in sorted(nearby)[:n]]
+
+    return difflib.get_close_matches(designation, candidates, n=n, cutoff=0.6)
@@ -0,0 +1,415 @@
+import numpy as np
+import pandas as pd
+
+from .exceptions import InputValidationError
+from .helpers import VALID_SUPPORTS
+from .section_index import (
+    lookup_section,
+    suggest_sections,
+)
+
+ERROR_COLUMNS = [
+    'Key',
+    'Roof Bay',
+    'Member',
+    'Message',
+]
+REQUIRED_KEYS = [
+    'project_name',
+    'project_number',
+    'calc_description',
+    'beam_sizes',
+    'joist_sizes',
+    'n_roof_bays',
+    'primary_members_size',
+    'primary_members_length',
+    'primary_members_support',
+    'secondary_members_size',
+    'secondary_members_length',
+    'secondary_members_support',
+    'roof_bay_mirrored',
+    'roof_slope',
+    'dead_load_input',
+    'rain_load_input',
+    'include_self_weight',
+]
+LOAD_KEYS = [
+    'dead_load_input',
+    'rain_load_input',
+]
+MEMBER_PREFIXES = {
+    'primary':'P',
+    'secondary':'S',
+}
+
+def _is_number(value):
+    '''
+    Determines whether a value is an int or float (bools are not numbers).
+    '''
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+def _to_float(value):
+    '''
+    Converts a number to a float, or to NaN if it is not a number.
+    '''
+    return float(value) if _is_number(value) else np.nan
+
+def _add_error(errors, key, message, bay=None, member=None):
+    '''
+    Appends an error with its input key and roof bay/member coordinates.
+    '''
+    errors.append({
+        'Key':key,
+        'Roof Bay':bay+1 if bay is not None else None,
+        'Member':member,
+        'Message':message,
+    })
+
+def _add_mask_errors(errors, table, mask, key, message):
+    '''
+    Appends an error for every row of a flattened table selected by a mask.
+    The message is formatted with the columns of the row.
+    '''
+    for row in table[mask].itertuples(index=False):
+        row = row._asdict()
+        _add_error(errors, key, message.format(**row), bay=row['bay'], member=row.get('member'))
+
+def _get_per_bay_list(user_input, key, n_roof_bays, errors):
+    '''
+    Returns a per-bay input list, or None after recording an error if it is
+    not a list with one entry per roof bay.
+    '''
+    value = user_input[key]
+    if not isinstance(value, list):
+        _add_error(errors, key, f'{key} must be a list')
+        return None
+    if n_roof_bays is not None and len(value) != n_roof_bays:
+        _add_error(errors, key, f'{key} has {len(value)} entries but n_roof_bays is {n_roof_bays}')
+        return None
+
+    return value
+
+def _flatten_members(user_input, member_type, n_roof_bays, errors):
+    '''
+    Flattens the nested per-bay member size, length, and support lists of one
+    member type into a member table and a support table.
+    '''
+    size_key = f'{member_type}_members_size'
+    length_key = f'{member_type}_members_length'
+    support_key = f'{member_type}_members_support'
+    prefix = MEMBER_PREFIXES[member_type]
+
+    sizes = _get_per_bay_list(user_input, size_key, n_roof_bays, errors)
+    lengths = _get_per_bay_list(user_input, length_key, n_roof_bays, errors)
+    supports = _get_per_bay_list(user_input, support_key, n_roof_bays, errors)
+
+    members = []
+    member_supports = []
+    if sizes is None or lengths is None or supports is None:
+        return pd.DataFrame(members, columns=['bay', 'member', 'size', 'length']), \
+            pd.DataFrame(member_supports, columns=['bay', 'member', 'position', 'support', 'length'])
+
+    for bay, (bay_sizes, bay_lengths, bay_supports) in enumerate(zip(sizes, lengths, supports)):
+        if not all(isinstance(value, list) for value in (bay_sizes, bay_lengths, bay_supports)):
+            _add_error(errors, size_key, f'the {member_type} member sizes, lengths, and supports of each roof bay must be lists', bay=bay)
+            continue
+        if not len(bay_sizes) == len(bay_lengths) == len(bay_supports):
+            _add_error(
+                errors, size_key,
+                f'{len(bay_sizes)} {member_type} member sizes, {len(bay_lengths)} lengths, and {len(bay_supports)} support lists were entered',
+                bay=bay,
+            )
+            continue
+
+        for i_mem, (size, length, mem_supports) in enumerate(zip(bay_sizes, bay_lengths, bay_supports)):
+            member = f'{prefix}-{i_mem+1}'
+            members.append((bay, member, size, _to_float(length)))
+
+            if not isinstance(mem_supports, (list, tuple)):
+                _add_error(errors, support_key, 'the supports of each member must be a list of (location, support type) pairs', bay=bay, member=member)
+                continue
+            for support in mem_supports:
+                if not isinstance(support, (list, tuple)) or len(support) != 2:
+                    _add_error(errors, support_key, f'support {support!r} must be a (location, support type) pair', bay=bay, member=member)
+                    continue
+                member_supports.append((bay, member, _to_float(support[0]), support[1], _to_float(length)))
+
+    return pd.DataFrame(members, columns=['bay', 'member', 'size', 'length']), \
+        pd.DataFrame(member_supports, columns=['bay', 'member', 'position', 'support', 'length'])
+
+def _check_members(user_input, member_type, n_roof_bays, active_sizes, errors):
+    '''
+    Checks the sizes, lengths, and supports of every member of one member type
+    in bulk.
+    '''
+    members, supports = _flatten_members(user_input, member_type, n_roof_bays, errors)
+    size_key = f'{member_type}_members_size'
+    length_key = f'{member_type}_members_length'
+    support_key = f'{member_type}_members_support'
+
+    if not members.empty:
+        is_str = members['size'].map(lambda size: isinstance(size, str)).to_numpy(dtype=bool)
+        _add_mask_errors(errors, members, ~is_str, size_key, 'member size {size!r} must be a string')
+
+        # Member sizes are looked up in the active sizes by their upper case
+        # name when the framing is created
+        names = members['size'].where(is_str, '').str.upper()
+        undeclared = is_str & ~names.isin(active_sizes).to_numpy()
+        _add_mask_errors(
+            errors, members, undeclared, size_key,
+            'member size {size} is not listed in beam_sizes or joist_sizes',
+        )
+
+        lengths = members['length'].to_numpy(dtype=float)
+        _add_mask_errors(errors, members, ~(lengths > 0), length_key, 'member length {length} must be a positive int or float')
+
+    if not supports.empty:
+        positions = supports['position'].to_numpy(dtype=float)
+        lengths = supports['length'].to_numpy(dtype=float)
+        _add_mask_errors(errors, supports, np.isnan(positions), support_key, 'support location must be an int or float')
+
+        outside = ~np.isnan(positions) & (lengths > 0) & ((positions < 0) | (positions > lengths))
+        _add_mask_errors(errors, supports, outside, support_key, 'support location {position} is outside of the member length {length}')
+
+        types = supports['support'].map(lambda support: support.upper() if isinstance(support, str) else None)
+        invalid = ~types.isin(list(VALID_SUPPORTS)).to_numpy()
+        _add_mask_errors(errors, supports, invalid, support_key, '{support!r} is not a valid support type')
+
+def _check_sizes(user_input, errors):
+    '''
+    Checks the beam and joist sizes available to the members.
+
+    Returns
+    -------
+    active_sizes : set
+        set of upper case names of the valid beam and joist sizes
+    '''
+    active_sizes = set()
+    for key, section_type, description in (('beam_sizes', 'AISC', 'Beam'), ('joist_sizes', 'SJI', 'Joist')):
+        active_sizes |= _check_size_list(user_input[key], key, section_type, description, errors)
+
+    return active_sizes
+
+def _check_size_list(sizes, key, section_type, description, errors):
+    '''
+    Checks a list of beam or joist size names against the section index.
+
+    Returns
+    -------
+    valid_sizes : set
+        set of upper case names of the valid sizes in the list
+    '''
+    valid_sizes = set()
+    if not isinstance(sizes, list):
+        _add_error(errors, key, f'{key} must be a list')
+        return valid_sizes
+
+    for size in sizes:
+        if not isinstance(size, str):
+            _add_error(errors, key, f'each size in {key} must be a string, not {size!r}')
+            continue
+        if lookup_section(size, section_type=section_type) is None:
+            message = f'{description} size {size} is not a valid size. It is either not yet available, or does not exist.'
+            suggestions = suggest_sections(size, section_type=section_type)
+            if suggestions:
+                message += f" Did you mean {', '.join(suggestions)}?"
+            _add_error(errors, key, message)
+            continue
+        valid_sizes.add(size.upper())
+
+    return valid_sizes
+
+def _check_pairs(values, key, errors, check_value, message):
+    '''
+    Checks a per-bay list of pairs (e.g. the rain load heads) in bulk.
+    '''
+    is_pair = np.array([isinstance(value, (list, tuple)) and len(value) == 2 for value in values], dtype=bool)
+    for bay in np.flatnonzero(~is_pair):
+        _add_error(errors, key, f'{values[bay]!r} must be entered as a pair', bay=int(bay))
+
+    for bay in np.flatnonzero(is_pair):
+        if not all(check_value(value) for value in values[bay]):
+            _add_error(errors, key, message, bay=int(bay))
+
+def collect_load_errors(user_input, n_roof_bays=None):
+    '''
+    Checks the dead and rain load input in bulk and returns every error.
+
+    Parameters
+    ----------
+    user_input : dict
+        dictionary of all user input to be validated
+    n_roof_bays : int, optional
+        number of roof bays each load list must have an entry for
+
+    Returns
+    -------
+    errors : list
+        list of error dictionaries with the keys in ERROR_COLUMNS
+    '''
+    errors = []
+    for key in LOAD_KEYS:
+        if key not in user_input:
+            _add_error(errors, key, f'expected {key} as input key but did not receive it')
+    if errors:
+        return errors
+
+    dead_loads = _get_per_bay_list(user_input, 'dead_load_input', n_roof_bays, errors)
+    if dead_loads is not None:
+        values = np.array([_to_float(dl) for dl in dead_loads], dtype=float)
+        for bay in np.flatnonzero(np.isnan(values)):
+            _add_error(errors, 'dead_load_input', 'the surface dead load must be an int or float', bay=int(bay))
+
+    rain_loads = _get_per_bay_list(user_input, 'rain_load_input', n_roof_bays, errors)
+    if rain_loads is not None:
+        _check_pairs(
+            rain_loads, 'rain_load_input', errors,
+            check_value=lambda rl: _is_number(rl) and rl >= 0,
+            message='the static and hydraulic head must be non-negative int or float',
+        )
+
+    return errors
+
+def collect_input_errors(user_input):
+    '''
+    Checks all of the user input in bulk and returns every error instead of
+    stopping at the first one. The nested per-bay member lists are flattened
+    into member and support tables once and each constraint is checked over
+    the whole table.
+
+    Parameters
+    ----------
+    user_input : dict
+        dictionary of all user input to be validated
+
+    Returns
+    -------
+    errors : list
+        list of error dictionaries with the input key, roof bay number,
+        member label (e.g. 'S-3'), and message of each error
+    '''
+    errors = []
+
+    missing = [key for key in REQUIRED_KEYS if key not in user_input]
+    for key in missing:
+        _add_error(errors, key, f'expected {key} as input key but did not receive it')
+    if missing:
+        return errors
+
+    # Scalar input
+    for key in ('project_name', 'project_number'):
+        if not isinstance(user_input[key], str):
+            _add_error(errors, key, f'{key} must be a string')
+    if not isinstance(user_input['include_self_weight'], bool):
+        _add_error(errors, 'include_self_weight', 'include_self_weight must be either True or False')
+
+    n_roof_bays = user_input['n_roof_bays']
+    if not isinstance(n_roof_bays, int) or isinstance(n_roof_bays, bool) or n_roof_bays < 0:
+        _add_error(errors, 'n_roof_bays', 'n_roof_bays must be a non-negative integer')
+        n_roof_bays = None
+
+    calc_description = user_input['calc_description']
+    if not isinstance(calc_description, list):
+        _add_error(errors, 'calc_description', 'calc_description must be a list')
+    else:
+        for bay, desc in enumerate(calc_description):
+            if not isinstance(desc, str):
+                _add_error(errors, 'calc_description', 'each description in calc_description must be a string', bay=bay)
+
+    # Member sizes, lengths, and supports
+    active_sizes = _check_sizes(user_input, errors)
+    for member_type in MEMBER_PREFIXES:
+        _check_members(user_input, member_type, n_roof_bays, active_sizes, errors)
+
+    # Per-bay roof geometry
+    mirrored = _get_per_bay_list(user_input, 'roof_bay_mirrored', n_roof_bays, errors)
+    if mirrored is not None:
+        _check_pairs(
+            mirrored, 'roof_bay_mirrored', errors,
+            check_value=lambda value: isinstance(value, (bool, np.bool_)),
+            message='the left and right mirrored flags must be either True or False',
+        )
+
+    slopes = _get_per_bay_list(user_input, 'roof_slope', n_roof_bays, errors)
+    if slopes is not None:
+        values = np.array([_to_float(slope) for slope in slopes], dtype=float)
+        # The sign of the slope only gives its direction, so negative slopes
+        # are accepted and analyzed by their magnitude
+        for bay in np.flatnonzero(~np.isfinite(values)):
+            _add_error(errors, 'roof_slope', 'the roof slope must be an int or float', bay=int(bay))
+
+    errors.extend(collect_load_errors(user_input, n_roof_bays=n_roof_bays))
+
+    return errors
+
+def validate_input(user_input):
+    '''
+    Validates the input from the user and raises an InputValidationError
+    listing every error if it is not valid.
+
+    Parameters
+    ----------
+    user_input : dict
+        dictionary of all user input to be validated
+
+    Returns
+    -------
+    input_valid : bool
+        bool indicating whether or not the user input is valid
+    '''
+    errors = collect_input_errors(user_input)
+    if errors:
+        raise InputValidationError(errors)
+
+    return True
+
+def validate_load_input(user_input):
+    '''
+    Validates the dead and rain load input from the user and raises an
+    InputValidationError listing every error if it is not valid.
+
+    Parameters
+    ----------
+    user_input : dict
+        dictionary of all user input to be validated
+
+    Returns
+    -------
+    input_valid : bool
+        bool indicating whether or not the load input is valid
+    '''
+    n_roof_bays = user_input.get('n_roof_bays')
+    if not isinstance(n_roof_bays, int) or isinstance(n_roof_bays, bool):
+        n_roof_bays = None
+
+    errors = collect_load_errors(user_input, n_roof_bays=n_roof_bays)
+    if errors:
+        raise InputValidationError(errors)
+
+    return True
+
+def validate_candidate_sizes(candidate_beams, candidate_joists):
+    '''
+    Validates the candidate beam and joist sizes of optimize_roof_bays and
+    raises an InputValidationError listing every size that is not in the
+    section index.
+
+    Parameters
+    ----------
+    candidate_beams : list
+        list of W-shape names
+    candidate_joists : list
+        list of joist designations
+
+    Returns
+    -------
+    input_valid : bool
+        bool indicating whether or not the candidate sizes are valid
+    '''
+    errors = []
+    _check_size_list(candidate_beams, 'candidate_beams', 'AISC', 'Beam', errors)
+    _check_size_list(candidate_joists, 'candidate_joists', 'SJI', 'Joist', errors)
+    if errors:
+        raise InputValidationError(errors)
+
+    return True
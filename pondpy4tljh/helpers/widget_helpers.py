@@ -2,12 +2,20 @@ from ipywidgets import (
     Button,
     Dropdown,
     HBox,
-    Output,
+    Image,
+    Label,
     VBox,
 )
 
 from matplotlib import pyplot as plt
-from matplotlib.figure import Figure
+
+from .plot_renderer import (
+    DEFAULT_PLOT_CACHE_SIZE,
+    PLOT_TYPES,
+    MemberPlotRenderer,
+    RainPlotRenderer,
+)
+from .rain_depth import get_rain_depth
 
 def get_model_index(options, value):
     '''
@@ -24,9 +32,9 @@ def plot_rain_depth(model):
 
     Parameters
     ----------
-    model : pondpy.PondPyModel
-        pondpy.PondPyModel object for which the impounded rain depth is to be
-        plotted
+    model : pondpy.PondPyModel or BayResults
+        pondpy.PondPyModel object, or its compact results, for which the
+        impounded rain depth is to be plotted
 
     Returns
     -------
@@ -34,20 +42,7 @@ def plot_rain_depth(model):
         matplotlib.figure.Figure object containing the 3D scatter plot of the
         impounded rain depth for the selected plot
     '''
-    x_values = []
-    y_values = []
-    z_values = []
-
-    secondary_spacing = model.roof_bay.secondary_spacing/12
-
-    for i_smodel, s_model in enumerate(model.roof_bay_model.secondary_models):
-        cur_x_values = [x/12 for x in s_model.model_nodes]
-        cur_y_values = [i_smodel*secondary_spacing]*len(cur_x_values)
-        cur_z_values = [z for z in model.impounded_depth['Secondary'][i_smodel]]
-
-        x_values.extend(cur_x_values)
-        y_values.extend(cur_y_values)
-        z_values.extend(cur_z_values)
+    x_values, y_values, z_values = get_rain_depth(model)
 
     fig = plt.figure()
 
@@ -63,108 +58,172 @@ def plot_rain_depth(model):
 
     return fig
 
+def get_analyzed_bays(models):
+    '''
+    Returns the indices of the roof bays that were analyzed. Roof bays that
+    failed to analyze (None) are not in the analysis summary, so the n-th
+    roof bay in the analysis summary is the n-th analyzed roof bay.
+    '''
+    return [bay for bay, model in enumerate(models) if model is not None]
 
-def create_plot_widget(analysis_summary, models):
+def create_plot_widget(analysis_summary, models, cache_size=DEFAULT_PLOT_CACHE_SIZE, prerender=False):
     '''
-    Creates the widget for creating the plots selected by the user.
+    Creates the widget for creating the plots selected by the user. The plots
+    are drawn on a single reused figure and the rendered images are cached,
+    so flipping between members only renders each plot once.
+
+    The widget's update(analysis_summary, models) function replaces the
+    roof bays shown in the widget, e.g. as the roof bays of a background
+    analysis complete.
 
     Parameters
     ----------
     analysis_summary : pd.DataFrame
         pandas DataFrame holding the analysis summary created by the
         show_analysis_summary() function
-    models : list
-        list of analyzed pondpy.PondPyModel objects
+    models : list or RoofBayResults
+        list of analyzed pondpy.PondPyModel objects, or their compact results
+    cache_size : int, optional
+        maximum number of rendered plots kept in the cache
+    prerender : bool, optional
+        indicates whether every plot (up to cache_size) is rendered into the
+        cache in a background thread when the widget is created
     '''
+    renderer = MemberPlotRenderer(list(models), cache_size=cache_size)
+    state = {
+        'summary':analysis_summary,
+        'bays':get_analyzed_bays(renderer.models),
+    }
+
     roof_bayW = Dropdown(options=analysis_summary['Description'].unique().tolist())
     memberW = Dropdown(options=analysis_summary[analysis_summary['Description'] == roof_bayW.value]['Member'].to_list())
-    plot_selectW = Dropdown(options=[
-        'Deflection',
-        'Shear Force',
-        'Bending Moment',
-    ])
+    plot_selectW = Dropdown(options=PLOT_TYPES)
     plot_buttonW = Button(description='Create Plot')
-    outputW = Output()
+    titleW = Label()
+    imageW = Image(format='png')
 
     def get_member_options(*args):
         '''
         Updates the member options for the memberW dropdown based on the
         roof_bayW dropdown value
         '''
-        memberW.options = analysis_summary[analysis_summary['Description'] == roof_bayW.value]['Member'].to_list()
+        summary = state['summary']
+        memberW.options = summary[summary['Description'] == roof_bayW.value]['Member'].to_list()
 
     def plot_buttonW_callback(button):
         '''
-        Prints the selected plot when the button is clicked.
+        Shows the selected plot when the button is clicked.
         '''
+        if roof_bayW.value is None or memberW.value is None:
+            return
+
         # Get the parameters for creating the plot selected by the user
-        i_bay = get_model_index(options=roof_bayW.options, value=roof_bayW.value)
+        i_bay = state['bays'][get_model_index(options=roof_bayW.options, value=roof_bayW.value)]
         type_member = memberW.value.split('-')[0]
         i_member = int(memberW.value.split('-')[1])-1
         type_plot = plot_selectW.value
 
-        # Clear the output widget
-        outputW.clear_output()
+        titleW.value = f'Roof Bay: {roof_bayW.value}, Member: {memberW.value}, Plot: {plot_selectW.value}'
+        imageW.value = renderer.get((i_bay, type_member, i_member, type_plot))
 
-        # Get the selected model
-        if type_member == 'P':
-            model = models[i_bay].roof_bay_model.primary_models[i_member]
-        elif type_member == 'S':
-            model = models[i_bay].roof_bay_model.secondary_models[i_member]
+    def update(analysis_summary, models):
+        '''
+        Replaces the roof bays shown in the widget, keeping the selected roof
+        bay and the cached plots.
+        '''
+        renderer.models = list(models)
+        state['summary'] = analysis_summary
+        state['bays'] = get_analyzed_bays(renderer.models)
 
-        # Create the selected plot
-        if type_plot == 'Deflection':
-            selected_plot, _ = model.plot_deflected_shape()
-        elif type_plot == 'Shear Force':
-            selected_plot, _ = model.plot_sfd()
-        elif type_plot == 'Bending Moment':
-            selected_plot, _ = model.plot_bmd()
+        selected = roof_bayW.value
+        roof_bayW.options = analysis_summary['Description'].unique().tolist()
+        if selected in roof_bayW.options:
+            roof_bayW.value = selected
+        get_member_options()
 
-        with outputW:
-            print(f'Roof Bay: {roof_bayW.value}, Member: {memberW.value}, Plot: {plot_selectW.value}')
+    roof_bayW.observe(get_member_options, names='value')
+    plot_buttonW.on_click(plot_buttonW_callback)
 
-            plt.figure(selected_plot)
-            plt.show()
+    if prerender:
+        renderer.prerender()
 
-    roof_bayW.observe(get_member_options)
-    plot_buttonW.on_click(plot_buttonW_callback)
+    widget = VBox([HBox([roof_bayW, memberW, plot_selectW, plot_buttonW]), titleW, imageW])
+    widget.renderer = renderer
+    widget.update = update
 
-    return VBox([HBox([roof_bayW, memberW, plot_selectW, plot_buttonW]), outputW])
+    return widget
 
-def create_rain_plot_widget(analysis_summary, models):
+def create_rain_plot_widget(analysis_summary, models, cache_size=DEFAULT_PLOT_CACHE_SIZE, prerender=False, kind='heatmap', decimate=None):
     '''
-    Creates the widget for creating the plots selected by the user.
+    Creates the widget for creating the plots selected by the user. The plots
+    are drawn on a single reused figure and the rendered images are cached.
+
+    The widget's update(analysis_summary, models) function replaces the
+    roof bays shown in the widget, e.g. as the roof bays of a background
+    analysis complete.
 
     Parameters
     ----------
     analysis_summary : pd.DataFrame
         pandas DataFrame holding the analysis summary created by the
         show_analysis_summary() function
-    models : list
-        list of analyzed pondpy.PondPyModel objects    
+    models : list or RoofBayResults
+        list of analyzed pondpy.PondPyModel objects, or their compact results
+    cache_size : int, optional
+        maximum number of rendered plots kept in the cache
+    prerender : bool, optional
+        indicates whether the plot of every roof bay (up to cache_size) is
+        rendered into the cache in a background thread when the widget is
+        created
+    kind : str, optional
+        'heatmap', 'contour', 'surface', or 'scatter'
+    decimate : int, optional
+        keeps every decimate-th node and secondary member to coarsen very
+        dense meshes
     '''
+    renderer = RainPlotRenderer(list(models), cache_size=cache_size, kind=kind, decimate=decimate)
+    state = {
+        'bays':get_analyzed_bays(renderer.models),
+    }
+
     roof_bayW = Dropdown(options=analysis_summary['Description'].unique().tolist())
     plot_buttonW = Button(description='Create Plot')
-    outputW = Output()
+    titleW = Label()
+    imageW = Image(format='png')
 
     def plot_buttonW_callback(button):
         '''
-        Prints the selected plot when the button is clicked.
+        Shows the selected plot when the button is clicked.
         '''
+        if roof_bayW.value is None:
+            return
+
         # Get the parameters for creating the plot selected by the user
-        i_bay = get_model_index(options=roof_bayW.options, value=roof_bayW.value)
+        i_bay = state['bays'][get_model_index(options=roof_bayW.options, value=roof_bayW.value)]
 
-        selected_plot = plot_rain_depth(models[i_bay])
+        titleW.value = f'Impounded Rain Depth For: {roof_bayW.value}'
+        imageW.value = renderer.get(i_bay)
 
-        # Clear the output widget
-        outputW.clear_output()
+    def update(analysis_summary, models):
+        '''
+        Replaces the roof bays shown in the widget, keeping the selected roof
+        bay and the cached plots.
+        '''
+        renderer.models = list(models)
+        state['bays'] = get_analyzed_bays(renderer.models)
 
-        with outputW:
-            print(f'Impounded Rain Depth For: {roof_bayW.value}')
+        selected = roof_bayW.value
+        roof_bayW.options = analysis_summary['Description'].unique().tolist()
+        if selected in roof_bayW.options:
+            roof_bayW.value = selected
 
-            plt.figure(selected_plot)
-            plt.show()
-    
     plot_buttonW.on_click(plot_buttonW_callback)
 
-    return VBox([HBox([roof_bayW, plot_buttonW]), outputW])
+    if prerender:
+        renderer.prerender()
+
+    widget = VBox([HBox([roof_bayW, plot_buttonW]), titleW, imageW])
+    widget.renderer = renderer
+    widget.update = update
+
+    return widget
@@ -0,0 +1,357 @@
+import copy
+
+import pandas as pd
+
+from pondpy4tljh import (
+    DEFAULT_L_OVER_D_LIMIT,
+    EventLog,
+    InputValidationError,
+    TextColor,
+    analyze_bay,
+    create_active_sizes,
+    get_available_beams,
+    get_available_joists,
+    get_bay_input,
+    get_bay_key,
+    get_capacity,
+    get_convergence,
+    get_member_pass,
+    package_input,
+    print_validation_error,
+    summarize_model,
+    validate_candidate_sizes,
+    validate_input,
+)
+
+MEMBER_KEYS = {
+    'Primary':('primary_members_size', 'primary_members_length'),
+    'Secondary':('secondary_members_size', 'secondary_members_length'),
+}
+
+def _get_size_properties(size):
+    '''
+    Returns the weight in plf and the moment of inertia function of a
+    pondpy.SteelBeamSize or pondpy.SteelJoistSize object.
+    '''
+    if size.section_type == 'AISC':
+        return size.properties.weight, lambda span: size.properties.Ix
+    else:
+        return size.properties.weight, lambda span: size.properties.get_mom_inertia(span=span/12)
+
+def _get_member_groups(user_input):
+    '''
+    Groups the members of all roof bays by member type and input size.
+
+    Returns
+    -------
+    member_groups : dict
+        dictionary keyed by (member type, size) holding a list of
+        (bay, member index) locations
+    '''
+    member_groups = {}
+    for type_member in ('Secondary', 'Primary'):
+        size_key, _ = MEMBER_KEYS[type_member]
+        for bay in range(user_input['n_roof_bays']):
+            for i_mem, size in enumerate(user_input[size_key][bay]):
+                member_groups.setdefault((type_member, size.upper()), []).append((bay, i_mem))
+
+    return member_groups
+
+def _check_bay(model, l_over_d_limit):
+    '''
+    Checks every member of an analyzed roof bay against its capacity and
+    records whether the ponding iteration converged.
+
+    Returns
+    -------
+    bay_check : dict
+        dictionary holding the summary rows ('Rows'), a pass/fail flag for
+        each member keyed by member label ('Pass') and the convergence flag
+        ('Converged')
+    '''
+    rows = summarize_model(model)
+    _, _, max_moment, cap_moment, max_shear, cap_shear, _, l_over_d = zip(*rows)
+    member_pass = dict(zip(
+        (row[0] for row in rows),
+        get_member_pass(max_moment, cap_moment, max_shear, cap_shear, l_over_d, l_over_d_limit=l_over_d_limit).tolist(),
+    ))
+
+    return {
+        'Rows':rows,
+        'Pass':member_pass,
+        'Converged':get_convergence(model)['Converged'],
+    }
+
+def optimize_roof_bays(candidate_beams=None, candidate_joists=None, l_over_d_limit=DEFAULT_L_OVER_D_LIMIT, progress=True, log_path=None, event_log=None, **kwargs):
+    '''
+    Searches for the lightest passing size for each group of members in the
+    roof bays specified by the user.
+
+    Members are grouped by member type (primary or secondary) and input size,
+    and each group is resized within its own family: W-shapes are replaced by
+    W-shapes from candidate_beams and joists by joists from candidate_joists.
+    Groups are optimized one at a time, secondary groups first. For each
+    group the candidates are tried from lightest to heaviest and the first
+    one that passes is kept; if the input size already passes, only
+    candidates lighter than it are tried, so a passing group never gets
+    heavier. A candidate passes when the ponding iteration converges, every
+    member of the group passes as in the Pass column of the analysis/design
+    summary (moment and shear D/C of at most 1.0 and L/d of at least
+    l_over_d_limit), and no other member that passed before now fails.
+
+    Candidates that are no stiffer than the current size and whose capacity
+    is below the current demand of a member in the group are pruned without
+    being analyzed, since a more flexible member attracts at least as much
+    ponding load. Analyzed roof bays are memoized by the hash of their input
+    so that bays not affected by a candidate are never reanalyzed.
+
+    Parameters
+    ----------
+    candidate_beams : list, optional
+        list of W-shape names that beam groups may be resized to. Defaults to
+        all available W-shapes.
+    candidate_joists : list, optional
+        list of joist designations that joist groups may be resized to.
+        Defaults to all available K and KCS joists.
+    l_over_d_limit : int or float, optional
+        minimum span to deflection ratio for a member to pass
+    progress : bool, optional
+        indicates whether a live progress bar is shown in notebooks
+    log_path : str, optional
+        path of a JSON lines file that each optimization event is appended to
+    event_log : EventLog, optional
+        event log that records the events and per-stage durations of the
+        optimization (packaging, validation, and the analysis of each roof
+        bay). The outcome of each member group is recorded as a
+        'group_resized' or 'group_kept' event. If provided, progress and
+        log_path are ignored.
+    kwargs : key, value pair
+        key, value pair to be entered into the dictionary, as for
+        analyze_roof_bays
+
+    Returns
+    -------
+    optimization : dict
+        dictionary holding the size selected for each member group
+        ('Sizes'), the user input updated with the selected sizes ('Input'),
+        the analyzed pondpy.PondPyModel objects for the selected sizes
+        ('Models'), and the number of full roof bay analyses performed
+        ('Analyses')
+    '''
+    if event_log is None:
+        event_log = EventLog(progress=progress, log_path=log_path)
+
+    # Package up input from the user using the package_input() helper function
+    with event_log.stage('packaging'):
+        user_input = package_input(**kwargs)
+
+    if candidate_beams is None:
+        candidate_beams = get_available_beams()
+    if candidate_joists is None:
+        candidate_joists = [joist.split('_', 1)[1] for joist in get_available_joists()]
+
+    # Validate the user input and the candidate sizes
+    try:
+        with event_log.stage('validation'):
+            validate_input(user_input)
+            validate_candidate_sizes(candidate_beams, candidate_joists)
+    except (InputValidationError, KeyError) as e:
+        print_validation_error(e)
+        return
+
+    # Create the sizes for the input and every candidate up front
+    user_input = copy.deepcopy(user_input)
+    for size_key, _ in MEMBER_KEYS.values():
+        # Copy each bay's size list so that bays sharing a list are resized
+        # independently
+        user_input[size_key] = [list(sizes) for sizes in user_input[size_key]]
+    candidate_sizes = create_active_sizes({
+        'beam_sizes':[beam.upper() for beam in candidate_beams],
+        'joist_sizes':[joist.upper() for joist in candidate_joists],
+    })
+    active_sizes = create_active_sizes(user_input) | candidate_sizes
+    beam_candidates = sorted(
+        (name for name, size in candidate_sizes.items() if size.section_type == 'AISC'),
+        key=lambda name: (candidate_sizes[name].properties.weight, name),
+    )
+    joist_candidates = sorted(
+        (name for name, size in candidate_sizes.items() if size.section_type == 'SJI'),
+        key=lambda name: (candidate_sizes[name].properties.weight, name),
+    )
+
+    n_roof_bays = user_input['n_roof_bays']
+    bay_memo = {}
+    n_analyses = 0
+
+    def evaluate_bay(bay):
+        '''
+        Analyzes and checks a roof bay for the current sizes in user_input,
+        reusing the result if the same bay input was analyzed before.
+        '''
+        nonlocal n_analyses
+        bay_input = get_bay_input(user_input, bay)
+        bay_key = get_bay_key(bay_input)
+        if bay_key not in bay_memo:
+            try:
+                with event_log.stage('analysis', bay=bay):
+                    model = analyze_bay(bay_input, active_sizes)
+                bay_memo[bay_key] = (model, _check_bay(model, l_over_d_limit))
+            except Exception:
+                # The candidate cannot be analyzed (e.g. invalid joist span)
+                bay_memo[bay_key] = (None, None)
+            n_analyses += 1
+
+        return bay_memo[bay_key]
+
+    # Analyze the design as input
+    current = [evaluate_bay(bay) for bay in range(n_roof_bays)]
+    if any(model is None for model, _ in current):
+        failed = [str(bay+1) for bay, (model, _) in enumerate(current) if model is None]
+        print(TextColor.RED+TextColor.BOLD+f"Optimization failed!\nThe input design could not be analyzed for roof bays {', '.join(failed)}."+TextColor.END)
+        return
+
+    member_groups = _get_member_groups(user_input)
+    event_log.start_progress(total=len(member_groups), description='Optimizing member groups')
+
+    size_rows = []
+    for (type_member, group_size), locations in member_groups.items():
+        size_key, length_key = MEMBER_KEYS[type_member]
+        prefix = type_member[0]
+        group_bays = sorted(set(bay for bay, _ in locations))
+        spans = [user_input[length_key][bay][i_mem]*12 for bay, i_mem in locations]
+
+        cur_size = active_sizes[group_size]
+        cur_weight, cur_inertia = _get_size_properties(cur_size)
+        if cur_size.section_type == 'AISC':
+            candidates = beam_candidates
+        else:
+            candidates = joist_candidates
+
+        # Current demand and status of each member in the group
+        group_labels = {}
+        demands = []
+        for bay, i_mem in locations:
+            label = f'{prefix}-{i_mem+1}'
+            group_labels.setdefault(bay, set()).add(label)
+            row = next(row for row in current[bay][1]['Rows'] if row[0] == label)
+            demands.append((row[2], row[4]))
+        group_passes = all(
+            current[bay][1]['Converged'] and all(current[bay][1]['Pass'][label] for label in labels)
+            for bay, labels in group_labels.items()
+        )
+
+        event_log.emit('group_start', member_type=type_member, size=group_size)
+
+        # Candidates are tried from lightest to heaviest. If the input size
+        # passes, only lighter candidates are tried and the input size is
+        # kept when none of them pass. The input size need not be one of the
+        # candidates, so the search stops at the first candidate that is not
+        # lighter.
+        selected = group_size
+        n_tried = 0
+        n_pruned = 0
+        for candidate in candidates:
+            size = active_sizes[candidate]
+            weight, inertia = _get_size_properties(size)
+            if group_passes and (candidate == group_size or weight >= cur_weight):
+                break
+            if candidate == group_size:
+                continue
+
+            # Prune candidates that cannot pass on capacity
+            pruned = False
+            for span, (max_moment, max_shear) in zip(spans, demands):
+                try:
+                    capacity = get_capacity(size, span)
+                    is_flexible = inertia(span) <= cur_inertia(span)
+                except (IndexError, ValueError):
+                    # Span exceeds the allowable span for the joist
+                    pruned = True
+                    break
+                # Only the strength is checked, with the same comparison as
+                # the pass check, so that no candidate that would pass is
+                # pruned
+                strength_ok = get_member_pass(
+                    max_moment, capacity['Moment'], max_shear, capacity['Shear'], l_over_d_limit, l_over_d_limit=l_over_d_limit,
+                )
+                if is_flexible and not strength_ok:
+                    pruned = True
+                    break
+            if pruned:
+                n_pruned += 1
+                continue
+
+            # Reanalyze the affected roof bays with the candidate size
+            for bay, i_mem in locations:
+                user_input[size_key][bay][i_mem] = candidate
+            trial = { bay:evaluate_bay(bay) for bay in group_bays }
+            n_tried += 1
+
+            passed = True
+            for bay in group_bays:
+                model, check = trial[bay]
+                if model is None or not check['Converged']:
+                    passed = False
+                    break
+                for label, cur_pass in check['Pass'].items():
+                    if not cur_pass and (label in group_labels[bay] or current[bay][1]['Pass'].get(label, False)):
+                        passed = False
+                        break
+                if not passed:
+                    break
+
+            if passed:
+                selected = candidate
+                for bay in group_bays:
+                    current[bay] = trial[bay]
+                break
+
+        # Restore the selected size for the group
+        for bay, i_mem in locations:
+            user_input[size_key][bay][i_mem] = selected
+
+        event_log.emit(
+            'group_resized' if selected != group_size else 'group_kept',
+            member_type=type_member, size=group_size, selected=selected, tried=n_tried, pruned=n_pruned,
+        )
+        event_log.advance()
+
+        size_rows.append((
+            type_member,
+            group_size,
+            selected,
+            len(locations),
+            cur_weight,
+            active_sizes[selected].properties.weight,
+            n_tried,
+            n_pruned,
+        ))
+
+    # Add the selected sizes to the size lists of the updated input
+    for name in set(size for _, _, size, *_ in size_rows):
+        if active_sizes[name].section_type == 'AISC':
+            size_list = user_input['beam_sizes']
+        else:
+            size_list = user_input['joist_sizes']
+        if name not in [size.upper() for size in size_list]:
+            size_list.append(name)
+
+    sizes = pd.DataFrame(size_rows, columns=[
+        'Member Type',
+        'Input Size',
+        'Optimized Size',
+        'Members',
+        'Input Weight (plf)',
+        'Optimized Weight (plf)',
+        'Candidates Analyzed',
+        'Candidates Pruned',
+    ])
+
+    event_log.emit('optimization_complete', analyses=n_analyses)
+
+    return {
+        'Sizes':sizes,
+        'Input':user_input,
+        'Models':[model for model, _ in current],
+        'Analyses':n_analyses,
+    }
@@ -1,28 +1,43 @@
-import pandas as pd
-
-from pondpy import (
-    SteelBeamDesign,
-    SteelJoistDesign,
-)
+from contextlib import nullcontext
 
 from pondpy4tljh import (
-    BeamSizeError,
-    JoistSizeError,
-    InvalidSupportError,
-    TextColor,
+    BayResults,
+    DEFAULT_L_OVER_D_LIMIT,
+    InputValidationError,
+    create_summary_table,
+    get_bay_description,
+    get_profiler,
     package_input,
+    print_validation_error,
+    summarize_model,
     validate_input,
 )
 
-def show_analysis_summary(models, **kwargs):
+def show_analysis_summary(models, event_log=None, profile=None, l_over_d_limit=DEFAULT_L_OVER_D_LIMIT, validate=False, **kwargs):
     '''
     Takes the analyzed pondpy.PondPyModel objects and reports the analysis/
     design summary in a pandas DataFrame object.
 
     Parameters
     ----------
-    models : list
-        list of analyzed pondpy.PondPyModel objects
+    models : list or RoofBayResults
+        list of analyzed pondpy.PondPyModel objects, or the RoofBayResults
+        returned by analyze_roof_bays with compact=True. Roof bays that
+        failed to analyze (None) are skipped.
+    event_log : EventLog, optional
+        event log that records the duration of the summary stage for each
+        roof bay
+    profile : Profiler or bool, optional
+        Profiler that records the wall time, function call count, and peak
+        memory of the summary of each roof bay and a cProfile profile of the
+        run. If True, a new Profiler is used and its timing report is printed
+        at the end of the run. When profiling, event_log is ignored.
+    l_over_d_limit : int or float, optional
+        minimum span to deflection ratio for a member to pass
+    validate : bool, optional
+        indicates whether the user input is validated. The input passed to
+        analyze_roof_bays was already validated, so by default only the roof
+        bay descriptions are read from it.
     user_input : dict
         dictionary containing the user input created by the package_input
         helper function
@@ -30,116 +45,55 @@ def show_analysis_summary(models, **kwargs):
     Returns
     -------
     analysis_summary : pandas.DataFrame
+        DataFrame holding the summary of each member, with its
+        demand/capacity ratios ('Moment D/C', 'Shear D/C', 'Deflection D/C',
+        'Max D/C') and pass/fail flags ('L/d OK', 'Pass'). Pass it to
+        get_summary_rollup for the governing member of each roof bay or
+        member size.
     '''
-    user_input = package_input(**kwargs)
-
-    try:
-        # Validate the user input using the validate_input() helper function
-        validate_input(user_input)
-
-        columns = [
-            'Description',
-            'Member',
-            'Member Size',
-            'Max Moment (k-ft)',
-            'Moment Capacity (k-ft)',
-            'Max Shear (k)',
-            'Shear Capacity (k)',
-            'Deflection (in)',
-            'L/d',
-        ]
-        calc_descs = []
-        members = []
-        member_size = []
-        max_moment = []
-        cap_moment = []
-        max_shear = []
-        cap_shear = []
-        max_defl = []
-        l_over_defl = []
-
-
-        for i_model, model in enumerate(models):
-            try:
-                if user_input['calc_description'][i_model] == '':
-                    cur_desc = f'Roof Bay {i_model+1}'
-                else:
-                    cur_desc = user_input['calc_description'][i_model]
-            except IndexError:
-                cur_desc = f'Roof Bay {i_model+1}'
+    profiler = get_profiler(profile, progress=False)
+    if profiler is not None:
+        event_log = profiler
 
-            for i_pmodel, p_model in enumerate(model.roof_bay_model.primary_models):
-                cur_max_moment = p_model.plot_bmd()[1][0]
-                cur_max_shear = p_model.plot_sfd()[1][0]
-                cur_max_defl = p_model.plot_deflected_shape()[1][0]
+    with profiler.profiling() if profiler is not None else nullcontext():
+        analysis_summary = _show_analysis_summary(
+            models, event_log=event_log, l_over_d_limit=l_over_d_limit, validate=validate, **kwargs,
+        )
 
-                cur_l_over_defl = int(round(abs(p_model.beam.length/cur_max_defl), 0))
+    if profile is True:
+        profiler.print_report()
 
-                if p_model.beam.size.section_type == 'AISC':
-                    cur_cap_moment = round(SteelBeamDesign(section=p_model.beam.size.properties, unbraced_length=0).get_moment_capacity(), 1)
-                    cur_cap_shear = round(SteelBeamDesign(section=p_model.beam.size.properties, unbraced_length=0).get_shear_capacity(), 1)
-                elif p_model.beam.size.section_type == 'SJI':
-                    cur_cap_moment = round(SteelJoistDesign(designation=p_model.beam.size.properties, span=p_model.beam.length).get_moment_capacity(), 1)
-                    cur_cap_shear = round(SteelJoistDesign(designation=p_model.beam.size.properties, span=p_model.beam.length).get_shear_capacity()[1], 1)
+    return analysis_summary
 
-                calc_descs.append(cur_desc)
-                members.append(f'P-{i_pmodel+1}')
-                member_size.append(p_model.beam.size.name)
-                max_moment.append(cur_max_moment)
-                cap_moment.append(cur_cap_moment)
-                max_shear.append(cur_max_shear)
-                cap_shear.append(cur_cap_shear)
-                max_defl.append(cur_max_defl)
-                l_over_defl.append(cur_l_over_defl)
-            
-            for i_smodel, s_model in enumerate(model.roof_bay_model.secondary_models):
-                cur_max_moment = s_model.plot_bmd()[1][0]
-                cur_max_shear = s_model.plot_sfd()[1][0]
-                cur_max_defl = s_model.plot_deflected_shape()[1][0]
+def _show_analysis_summary(models, event_log, l_over_d_limit, validate, **kwargs):
+    '''
+    Creates the analysis/design summary, validating the input if requested,
+    and records the summary of each roof bay in the event log.
+    '''
+    try:
+        # Validate the user input using the validate_input() helper function
+        if validate:
+            validate_input(package_input(**kwargs))
 
-                cur_l_over_defl = int(round(abs(s_model.beam.length/cur_max_defl), 0))
+        descriptions = []
+        bay_rows = []
 
-                if s_model.beam.size.section_type == 'AISC':
-                    cur_cap_moment = round(SteelBeamDesign(section=s_model.beam.size.properties, unbraced_length=0).get_moment_capacity(), 1)
-                    cur_cap_shear = round(SteelBeamDesign(section=s_model.beam.size.properties, unbraced_length=0).get_shear_capacity(), 1)
-                elif s_model.beam.size.section_type == 'SJI':
-                    cur_cap_moment = round(SteelJoistDesign(designation=s_model.beam.size.properties, span=s_model.beam.length).get_moment_capacity(), 1)
-                    cur_cap_shear = round(SteelJoistDesign(designation=s_model.beam.size.properties, span=s_model.beam.length).get_shear_capacity()[1], 1)
+        for i_model, model in enumerate(models):
+            # Skip roof bays that failed to analyze
+            if model is None:
+                continue
 
-                calc_descs.append(cur_desc)
-                members.append(f'S-{i_smodel+1}')
-                member_size.append(s_model.beam.size.name)
-                max_moment.append(cur_max_moment)
-                cap_moment.append(cur_cap_moment)
-                max_shear.append(cur_max_shear)
-                cap_shear.append(cur_cap_shear)
-                max_defl.append(cur_max_defl)
-                l_over_defl.append(cur_l_over_defl)
+            with event_log.stage('summary', bay=i_model) if event_log is not None else nullcontext():
+                if isinstance(model, BayResults):
+                    bay_rows.append(model.summarize())
+                else:
+                    bay_rows.append(summarize_model(model))
+            descriptions.append(get_bay_description(kwargs, i_model))
 
-        df_list = list(zip(
-            calc_descs,
-            members,
-            member_size,
-            max_moment,
-            cap_moment,
-            max_shear,
-            cap_shear,
-            max_defl,
-            l_over_defl,
-        ))
-        analysis_summary = pd.DataFrame(
-            df_list, columns=columns
-        )
+        # Assemble the typed summary columns and the utilization columns
+        analysis_summary = create_summary_table(bay_rows, descriptions, l_over_d_limit=l_over_d_limit)
 
         return analysis_summary
 
-    except KeyError as e:
-        print(TextColor.RED+TextColor.BOLD+f"Validation failed!\nExpected {e} as input key but did not receive it. Please check your inputs.")
-    #except TypeError as e:
-        #print(TextColor.RED+TextColor.BOLD+f"Validation failed!\nAn error occurred: {e}.\nPlease check your inputs."+TextColor.END)
-    except BeamSizeError as e:
-        print(TextColor.RED+TextColor.BOLD+f"Validation failed!\nBeam size {e} is not a valid size.\nIt is either not yet available, or does not exist."+TextColor.END)
-    except JoistSizeError as e:
-        print(TextColor.RED+TextColor.BOLD+f"Validation failed!\nJoist size {e} is not a valid size.\nIt is either not yet available, or does not exist."+TextColor.END)
-    except InvalidSupportError as e:
-        print(TextColor.RED+TextColor.BOLD+f"Validation failed!\n{e} is not a valid support type."+TextColor.END)   
\ No newline at end of file
+    except (InputValidationError, KeyError) as e:
+        print_validation_error(e)
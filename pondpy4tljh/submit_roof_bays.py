@@ -0,0 +1,60 @@
+from pondpy4tljh import (
+    InputValidationError,
+    JobQueue,
+    TextColor,
+    package_input,
+    print_validation_error,
+    validate_input,
+)
+
+def submit_roof_bays(queue=None, user=None, wait=False, timeout=None, **kwargs):
+    '''
+    Submits the analysis of all roof bays specified by the user to the shared
+    job queue of the hub instead of analyzing them in the notebook kernel.
+    The roof bays are analyzed by the hub's job service (started with
+    `pondpy4tljh serve`), which limits the number of roof bays analyzed at
+    once across all users.
+
+    Parameters
+    ----------
+    queue : JobQueue or str, optional
+        job queue, or the path of its database. Defaults to the hub's job
+        queue (see JobQueue).
+    user : str, optional
+        name of the user submitting the jobs. Defaults to the hub user.
+    wait : bool, optional
+        indicates whether to wait for the roof bays to be analyzed and
+        return their results instead of the job ids
+    timeout : float, optional
+        maximum number of seconds to wait if wait is True
+    kwargs : key, value pair
+        key, value pair to be entered into the dictionary
+
+    Returns
+    -------
+    job_ids : list or RoofBayResults
+        job id of each roof bay, in input order, which can be passed to
+        the get_results() function of the JobQueue to retrieve the compact
+        results of the roof bays. If wait is True, the compact results are
+        returned instead. None if the input failed validation.
+    '''
+    if queue is None or isinstance(queue, str):
+        queue = JobQueue(queue)
+
+    # Package up input from the user using the package_input() helper function
+    user_input = package_input(**kwargs)
+
+    # Validate the user input using the validate_input() helper function
+    try:
+        validate_input(user_input)
+
+        job_ids = queue.submit(user_input, user=user)
+        print(TextColor.DARKCYAN+TextColor.BOLD+f"Submitted {len(job_ids)} roof bays to the job queue (jobs {job_ids[0]}-{job_ids[-1]})."+TextColor.END)
+
+        if wait:
+            return queue.get_results(job_ids, timeout=timeout)
+
+        return job_ids
+
+    except (InputValidationError, KeyError) as e:
+        print_validation_error(e)
@@ -0,0 +1,248 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from pondpy4tljh import (
+    EventLog,
+    InputValidationError,
+    SUMMARY_COLUMNS,
+    TextColor,
+    create_active_sizes,
+    create_bay_framing,
+    create_pondpy_model,
+    get_bay_description,
+    get_bay_input,
+    package_input,
+    perform_shared_analysis,
+    print_validation_error,
+    reset_framing_loads,
+    round_summary_row,
+    summarize_model,
+    validate_input,
+    validate_load_input,
+)
+
+SWEEP_COLUMNS = [
+    'Scenario',
+    'Static Head (in)',
+    'Hydraulic Head (in)',
+    'Dead Load (psf)',
+    'Description',
+] + SUMMARY_COLUMNS + [
+    'Iterations',
+    'Impounded Weight (k)',
+]
+
+# Load-independent setup of the sweep in a worker process. Only set by the
+# initializer of the sweep worker processes, which exit with the sweep; a
+# sequential sweep passes its setup to each task instead.
+_WORKER_SETUP = {}
+
+def _init_sweep_worker(bay_inputs, framings):
+    '''
+    Stores the load-independent setup for the sweep in a worker process.
+    Used as the initializer of the sweep worker processes so that the framing
+    is only sent to each worker once.
+    '''
+    _WORKER_SETUP['bay_inputs'] = bay_inputs
+    _WORKER_SETUP['framings'] = framings
+
+def _analyze_scenario_bay(bay, dead_load_input, rain_load_input, setup=None):
+    '''
+    Analyzes a single roof bay for a single load scenario using the shared
+    load-independent setup, or the setup of the worker process if setup is
+    None.
+
+    Returns
+    -------
+    result : tuple
+        (summary rows, number of iterations, final impounded water weight)
+    '''
+    if setup is None:
+        setup = _WORKER_SETUP
+
+    bay_input = dict(setup['bay_inputs'][bay])
+    bay_input['dead_load_input'] = dead_load_input
+    bay_input['rain_load_input'] = rain_load_input
+
+    framing = setup['framings'][bay]
+    reset_framing_loads(framing)
+
+    model = create_pondpy_model(bay_input=bay_input, active_sizes=None, framing=framing)
+    perform_shared_analysis(model)
+
+    return summarize_model(model), model.iter_results['Iterations'], model.iter_results['Weight'][-1]
+
+def _expand_scenario_loads(load_input, n_roof_bays, is_per_bay):
+    '''
+    Expands a single sweep load value into a per-bay list. Values that are
+    already per-bay lists are returned unchanged.
+    '''
+    if is_per_bay(load_input):
+        return list(load_input)
+    else:
+        return [load_input]*n_roof_bays
+
+def sweep_roof_bays(rain_load_inputs, dead_load_inputs, workers=None, progress=True, log_path=None, event_log=None, **kwargs):
+    '''
+    Analyzes one roof framing definition for every combination of rain and
+    dead load in a grid of load scenarios.
+
+    The input packaging, validation, member sizes, and member framing are
+    created once and shared by all scenarios; only the loading and the
+    analysis are repeated for each scenario.
+
+    Parameters
+    ----------
+    rain_load_inputs : list
+        list of rain loads to sweep. Each entry is either a (static head,
+        hydraulic head) pair applied to every roof bay or a list of pairs with
+        one pair per roof bay.
+    dead_load_inputs : list
+        list of collateral dead loads in psf to sweep. Each entry is either a
+        single value applied to every roof bay or a list with one value per
+        roof bay.
+    workers : int, optional
+        number of worker processes used to analyze the scenarios in parallel.
+        If None or 1, the scenarios are analyzed sequentially.
+    progress : bool, optional
+        indicates whether a live progress bar is shown in notebooks
+    log_path : str, optional
+        path of a JSON lines file that each sweep event is appended to
+    event_log : EventLog, optional
+        event log that records the events and per-stage durations of the
+        sweep (packaging, validation, and framing). Each analyzed roof bay
+        scenario is recorded as a 'bay_complete' or 'bay_failed' event with
+        its scenario index. If provided, progress and log_path are ignored.
+    kwargs : key, value pair
+        key, value pair describing the roof framing, as for analyze_roof_bays.
+        rain_load_input and dead_load_input may be omitted.
+
+    Returns
+    -------
+    sweep_results : pandas.DataFrame
+        long-form DataFrame with one row per scenario and member
+    '''
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise TypeError('workers must be a positive integer or None')
+
+    if event_log is None:
+        event_log = EventLog(progress=progress, log_path=log_path)
+
+    # Package up input from the user using the package_input() helper function
+    with event_log.stage('packaging'):
+        user_input = package_input(**kwargs)
+    n_roof_bays = user_input.get('n_roof_bays', 0)
+
+    # Build the grid of load scenarios
+    scenarios = []
+    for rain_load_input in rain_load_inputs:
+        for dead_load_input in dead_load_inputs:
+            scenarios.append((
+                _expand_scenario_loads(rain_load_input, n_roof_bays, lambda rl: isinstance(rl, list)),
+                _expand_scenario_loads(dead_load_input, n_roof_bays, lambda dl: isinstance(dl, list)),
+            ))
+
+    if not scenarios:
+        raise ValueError('rain_load_inputs and dead_load_inputs must each contain at least one value')
+
+    # Validate the framing once and the loads of every scenario
+    try:
+        with event_log.stage('validation'):
+            user_input['rain_load_input'], user_input['dead_load_input'] = scenarios[0]
+            validate_input(user_input)
+            for rain_load_input, dead_load_input in scenarios:
+                user_input['rain_load_input'] = rain_load_input
+                user_input['dead_load_input'] = dead_load_input
+                validate_load_input(user_input)
+
+    except (InputValidationError, KeyError) as e:
+        print_validation_error(e)
+        return
+
+    # Create the load-independent setup once for all scenarios
+    with event_log.stage('framing'):
+        active_sizes = create_active_sizes(user_input)
+        bay_inputs = [get_bay_input(user_input, bay) for bay in range(n_roof_bays)]
+        framings = [create_bay_framing(bay_input, active_sizes) for bay_input in bay_inputs]
+
+    tasks = [
+        (i_scenario, bay)
+        for i_scenario in range(len(scenarios))
+        for bay in range(n_roof_bays)
+    ]
+    results = {}
+    failed_tasks = {}
+
+    def get_task_args(task):
+        i_scenario, bay = task
+        rain_load_input, dead_load_input = scenarios[i_scenario]
+        return bay, dead_load_input[bay], rain_load_input[bay]
+
+    def store_result(task, result):
+        results[task] = result
+        event_log.emit('bay_complete', bay=task[1], scenario=task[0])
+        event_log.advance()
+
+    def store_failure(task, e):
+        failed_tasks[task] = e
+        event_log.emit('bay_failed', bay=task[1], scenario=task[0], error=repr(e))
+        event_log.advance(failed=True)
+
+    event_log.start_progress(total=len(tasks), description=f'Analyzing {len(scenarios)} load scenarios')
+
+    if workers is None or workers == 1 or len(tasks) <= 1:
+        setup = {'bay_inputs':bay_inputs, 'framings':framings}
+        for task in tasks:
+            try:
+                with event_log.stage('analysis', bay=task[1]):
+                    result = _analyze_scenario_bay(*get_task_args(task), setup=setup)
+            except Exception as e:
+                store_failure(task, e)
+            else:
+                store_result(task, result)
+    else:
+        event_log.emit('pool_start', workers=workers, n_bays=len(tasks))
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker, initargs=(bay_inputs, framings)) as executor:
+            futures = {
+                executor.submit(_analyze_scenario_bay, *get_task_args(task)):task for task in tasks
+            }
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    store_failure(task, e)
+                else:
+                    store_result(task, result)
+
+    if failed_tasks:
+        print(TextColor.RED+TextColor.BOLD+f"{len(failed_tasks)} of {len(tasks)} roof bay scenarios failed to analyze:"+TextColor.END)
+        for i_scenario, bay in sorted(failed_tasks):
+            print(TextColor.RED+f"Roof bay {bay+1}, scenario {i_scenario+1}: {failed_tasks[(i_scenario, bay)]}"+TextColor.END)
+
+    # Assemble the long-form results in scenario and roof bay order
+    rows = []
+    for task in tasks:
+        if task not in results:
+            continue
+        i_scenario, bay = task
+        rain_load_input, dead_load_input = scenarios[i_scenario]
+        member_rows, n_iterations, impounded_weight = results[task]
+
+        cur_desc = get_bay_description(user_input, bay)
+
+        for row in member_rows:
+            rows.append((
+                i_scenario+1,
+                rain_load_input[bay][0],
+                rain_load_input[bay][1],
+                dead_load_input[bay],
+                cur_desc,
+                *round_summary_row(row),
+                n_iterations,
+                round(impounded_weight, 2),
+            ))
+
+    return pd.DataFrame(rows, columns=SWEEP_COLUMNS)
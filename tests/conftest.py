@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+# pondpy imports pyplot, so make sure no interactive backend is used
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+def make_template_input(n_roof_bays=1):
+    '''
+    Returns the keyword arguments of a passing project of identical roof
+    bays, each framed with two W16X26 girders and five secondary members
+    (W12X16 beams at the edges and 14K1 joists in between).
+    '''
+    return dict(
+        project_name='Test Project',
+        project_number='0000',
+        calc_description=['']*n_roof_bays,
+        beam_sizes=['w12x16', 'w16x26'],
+        joist_sizes=['14k1'],
+        n_roof_bays=n_roof_bays,
+        primary_members_size=[['w16x26', 'w16x26'] for _ in range(n_roof_bays)],
+        primary_members_length=[[20, 20] for _ in range(n_roof_bays)],
+        primary_members_support=[[[(0, 'pinned'), (20, 'pinned')] for _ in range(2)] for _ in range(n_roof_bays)],
+        secondary_members_size=[['w12x16', '14k1', '14k1', '14k1', 'w12x16'] for _ in range(n_roof_bays)],
+        secondary_members_length=[[20]*5 for _ in range(n_roof_bays)],
+        secondary_members_support=[[[(0, 'pinned'), (20, 'pinned')] for _ in range(5)] for _ in range(n_roof_bays)],
+        roof_bay_mirrored=[(False, False) for _ in range(n_roof_bays)],
+        roof_slope=[0.25]*n_roof_bays,
+        dead_load_input=[20]*n_roof_bays,
+        rain_load_input=[(2, 2.31) for _ in range(n_roof_bays)],
+        include_self_weight=True,
+    )
+
+@pytest.fixture
+def template_input():
+    return make_template_input
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path/'cache'
+    monkeypatch.setenv('PONDPY4TLJH_CACHE_DIR', str(cache_dir))
+    return cache_dir
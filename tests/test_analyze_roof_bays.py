@@ -0,0 +1,19 @@
+from pondpy4tljh import EventLog, analyze_roof_bays, summarize_model
+
+def test_only_edited_bays_are_reanalyzed(template_input, capsys):
+    user_input = template_input(3)
+    user_input['dead_load_input'] = [18, 19, 20]
+    previous_models = analyze_roof_bays(progress=False, **user_input)
+    capsys.readouterr()
+
+    user_input['dead_load_input'][1] = 25
+    event_log = EventLog(progress=True)
+    models = analyze_roof_bays(event_log=event_log, previous_models=previous_models, **user_input)
+
+    assert models[0] is previous_models[0]
+    assert models[2] is previous_models[2]
+    assert models[1] is not previous_models[1]
+    assert summarize_model(models[1]) != summarize_model(previous_models[1])
+    reanalyzed = [event for event in event_log.events if event['event'] == 'bays_reanalyzed']
+    assert [(event['reused'], event['bays']) for event in reanalyzed] == [(2, [1])]
+    assert 'Reused 2 of 3 roof bays from the previous run. Roof bays reanalyzed: 2' in capsys.readouterr().out
@@ -0,0 +1,22 @@
+import json
+
+from pondpy4tljh.cli import main
+
+def test_run_reports_bad_project_files_and_continues(tmp_path, capsys, template_input):
+    bad_yaml = tmp_path/'bad.yaml'
+    bad_yaml.write_text('project_name: [1, 2\n')
+    not_a_table = tmp_path/'list.json'
+    not_a_table.write_text('[1, 2]')
+    good = tmp_path/'good.json'
+    good.write_text(json.dumps(template_input()))
+    output_dir = tmp_path/'out'
+
+    exit_code = main(['run', str(bad_yaml), str(not_a_table), str(good), '-o', str(output_dir), '-w', '1'])
+
+    captured = capsys.readouterr()
+    assert exit_code == 1
+    assert (output_dir/'good_summary.csv').exists()
+    assert f'{bad_yaml}: could not parse the YAML project file' in captured.err
+    assert f'{not_a_table}: ' in captured.err
+    # Output that does not go to a terminal is not colored
+    assert '\033[' not in captured.out+captured.err
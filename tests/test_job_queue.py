@@ -0,0 +1,57 @@
+import json
+
+from pondpy4tljh import JobQueue, analyze_roof_bays, package_input, run_job_service, summarize_model
+from pondpy4tljh.helpers.job_queue import run_job
+
+def make_project(template_input, dead_loads):
+    user_input = template_input(len(dead_loads))
+    user_input['dead_load_input'] = list(dead_loads)
+    return package_input(**user_input)
+
+def test_identical_bays_share_one_analysis(template_input, tmp_path):
+    queue = JobQueue(str(tmp_path/'queue.db'))
+    job_ids = queue.submit(make_project(template_input, [20, 20]), user='a')
+    job_ids += queue.submit(make_project(template_input, [20]), user='b')
+
+    bay_key, payload = queue.claim_next()
+    assert queue.claim_next() is None
+    queue.store_result(bay_key, run_job(payload))
+
+    assert set(queue.get_status(job_ids)['Status']) == {'done'}
+    # Resubmitted roof bays are completed from the stored result
+    resubmitted = queue.submit(make_project(template_input, [20]), user='c')
+    assert set(queue.get_status(resubmitted)['Status']) == {'done'}
+
+def test_jobs_are_claimed_fairly_across_users(template_input, tmp_path):
+    queue = JobQueue(str(tmp_path/'queue.db'))
+    queue.submit(make_project(template_input, [18, 19]), user='a')
+    queue.submit(make_project(template_input, [20]), user='b')
+
+    claimed = [json.loads(queue.claim_next()[1])['bay_input']['dead_load_input'] for _ in range(3)]
+
+    # User b's roof bay is claimed before the second roof bay of user a,
+    # who already has a running job
+    assert claimed == [18, 20, 19]
+
+def test_failed_and_cancelled_jobs(template_input, tmp_path):
+    queue = JobQueue(str(tmp_path/'queue.db'))
+    job_ids = queue.submit(make_project(template_input, [18, 19]), user='a')
+
+    bay_key, _ = queue.claim_next()
+    queue.store_failure(bay_key, 'AnalysisError()')
+
+    assert queue.cancel(job_ids) == 1
+    assert queue.get_errors(job_ids) == {job_ids[0]:'AnalysisError()'}
+    assert list(queue.get_status(job_ids)['Status']) == ['failed', 'cancelled']
+    assert queue.get_results(job_ids, wait=False)[0] is None
+
+def test_job_service_analyzes_submitted_bays(template_input, tmp_path):
+    path = str(tmp_path/'queue.db')
+    user_input = make_project(template_input, [18, 22])
+    job_ids = JobQueue(path).submit(user_input, user='a')
+
+    run_job_service(path, workers=1, poll_interval=0.05, idle_timeout=0.2)
+
+    results = JobQueue(path).get_results(job_ids, timeout=0)
+    models = analyze_roof_bays(progress=False, **user_input)
+    assert [bay.summarize() for bay in results] == [summarize_model(model) for model in models]
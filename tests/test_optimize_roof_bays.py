@@ -0,0 +1,43 @@
+from pondpy4tljh import (
+    EventLog,
+    get_convergence,
+    optimize_roof_bays,
+    show_analysis_summary,
+)
+
+def test_passing_group_is_not_resized_to_heavier_candidates(template_input):
+    optimization = optimize_roof_bays(
+        candidate_beams=['W16X31', 'W18X35'], candidate_joists=['18K3', '20K4'], progress=False, **template_input(2),
+    )
+
+    sizes = optimization['Sizes']
+    assert (sizes['Optimized Size'] == sizes['Input Size']).all()
+    assert (sizes['Optimized Weight (plf)'] <= sizes['Input Weight (plf)']).all()
+
+def test_lighter_passing_sizes_are_selected(template_input):
+    event_log = EventLog(progress=False)
+    optimization = optimize_roof_bays(
+        candidate_beams=['W10X12', 'W12X14', 'W12X16'], candidate_joists=['10K1', '12K1', '14K1'],
+        event_log=event_log, **template_input(),
+    )
+
+    sizes = optimization['Sizes']
+    assert (sizes['Optimized Weight (plf)'] <= sizes['Input Weight (plf)']).all()
+    assert (sizes['Optimized Size'] != sizes['Input Size']).any()
+    resized = [event for event in event_log.events if event['event'] == 'group_resized']
+    assert len(resized) == (sizes['Optimized Size'] != sizes['Input Size']).sum()
+
+    # Every member of the selected design passes in the summary
+    summary = show_analysis_summary(optimization['Models'], **optimization['Input'])
+    assert summary['Pass'].all()
+    assert all(get_convergence(model)['Converged'] for model in optimization['Models'])
+
+def test_unknown_candidate_is_reported(template_input, capsys):
+    optimization = optimize_roof_bays(
+        candidate_beams=['W99X1', 'W12X16'], candidate_joists=['14K1'], progress=False, **template_input(),
+    )
+
+    assert optimization is None
+    out = capsys.readouterr().out
+    assert 'candidate_beams' in out
+    assert 'W99X1' in out
@@ -0,0 +1,74 @@
+import os
+import stat
+
+from pondpy4tljh import (
+    BayResults,
+    EventLog,
+    ResultCache,
+    analyze_roof_bays,
+    summarize_model,
+)
+from pondpy4tljh.helpers.helpers import (
+    get_bay_input,
+    package_input,
+)
+from pondpy4tljh.helpers.result_cache import (
+    SHARD_MODE,
+    get_bay_key,
+)
+
+class FullDiskCache(ResultCache):
+    def put(self, bay_key, model):
+        raise OSError(28, 'No space left on device')
+
+def test_cache_hit_returns_compact_results(template_input, cache_dir):
+    models = analyze_roof_bays(cache=True, progress=False, **template_input())
+    cached = analyze_roof_bays(cache=True, progress=False, **template_input())
+
+    assert isinstance(cached[0], BayResults)
+    assert cached[0].bay_key == get_bay_key(get_bay_input(package_input(**template_input()), 0))
+    assert cached[0].summarize() == summarize_model(models[0])
+    assert cached[0].out_str == models[0].out_str
+
+def test_cache_key_ignores_case_and_number_type(template_input):
+    user_input = package_input(**template_input())
+    bay_input = get_bay_input(user_input, 0)
+    edited = dict(bay_input)
+    edited['primary_members_size'] = [size.upper() for size in bay_input['primary_members_size']]
+    edited['dead_load_input'] = float(bay_input['dead_load_input'])
+
+    assert get_bay_key(edited) == get_bay_key(bay_input)
+
+def test_corrupt_entry_is_removed(cache_dir):
+    cache = ResultCache()
+    bay_key = 'ab'+'0'*62
+    path = cache._entry_path(bay_key)
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(b'not an archive')
+
+    assert cache.get(bay_key) is None
+    assert not os.path.exists(path)
+
+def test_shards_are_group_writable(template_input, cache_dir):
+    analyze_roof_bays(cache=True, progress=False, **template_input())
+
+    shards = [entry for entry in cache_dir.iterdir() if entry.is_dir()]
+    assert shards
+    for shard in shards:
+        assert stat.S_IMODE(shard.stat().st_mode) == SHARD_MODE
+
+def test_eviction_keeps_cache_within_cap(template_input, cache_dir):
+    models = analyze_roof_bays(progress=False, **template_input())
+    cache = ResultCache(max_bytes=1)
+    cache.put('cd'+'0'*62, models[0])
+
+    assert cache.size() == 0
+
+def test_cache_write_failure_keeps_model(template_input, tmp_path):
+    event_log = EventLog(progress=False)
+    models = analyze_roof_bays(cache=FullDiskCache(cache_dir=str(tmp_path)), event_log=event_log, **template_input(2))
+
+    assert all(model is not None for model in models)
+    failures = [event for event in event_log.events if event['event'] == 'cache_store_failed']
+    assert [event['bay'] for event in failures] == [0, 1]
@@ -0,0 +1,29 @@
+from pondpy4tljh import create_summary_table, get_member_pass, round_summary_row
+
+def make_row(max_moment=50.0, moment_capacity=100.0, max_shear=5.0, shear_capacity=10.0, l_over_d=480.0):
+    return ('S-1', 'W12X16', max_moment, moment_capacity, max_shear, shear_capacity, -0.5, l_over_d)
+
+def test_members_over_capacity_fail_before_rounding():
+    rows = [
+        make_row(max_moment=100.04),
+        make_row(max_shear=10.004),
+        make_row(l_over_d=239.6),
+        make_row(max_moment=100.0, max_shear=10.0, l_over_d=240.0),
+    ]
+
+    summary = create_summary_table([rows], ['Roof Bay 1'])
+
+    assert summary['Pass'].tolist() == [False, False, False, True]
+    # The displayed values are rounded, even where this hides the failure
+    assert summary['Moment D/C'].iloc[0] == 1.0
+    assert summary['Shear D/C'].iloc[1] == 1.0
+    assert summary['L/d'].iloc[2] == 240
+
+def test_member_pass_compares_unrounded_values():
+    assert not get_member_pass(100.04, 100.0, 5.0, 10.0, 480.0)
+    assert get_member_pass(100.0, 100.0, 5.0, 10.0, 240.0)
+
+def test_summary_rows_are_rounded_for_display():
+    row = make_row(max_moment=12.3456, moment_capacity=98.76, l_over_d=479.6)
+
+    assert round_summary_row(row) == ('S-1', 'W12X16', 12.35, 98.8, 5.0, 10.0, -0.5, 480)
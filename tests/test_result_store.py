@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from pondpy4tljh import (
+    RoofBayResults,
+    analyze_roof_bays,
+    load_project_archive,
+    package_input,
+    save_project_archive,
+    summarize_model,
+)
+
+@pytest.fixture
+def analyzed(template_input):
+    user_input = template_input(2)
+    models = analyze_roof_bays(progress=False, **user_input)
+    return package_input(**user_input), models
+
+@pytest.mark.parametrize('name, mmap_mode', [
+    ('results.npz', 'r'),
+    ('results', 'r'),
+    ('results', None),
+])
+def test_results_round_trip(analyzed, tmp_path, name, mmap_mode):
+    _, models = analyzed
+    results = RoofBayResults.from_models(models)
+    path = str(tmp_path/name)
+
+    results.save(path)
+    loaded = RoofBayResults.load(path, mmap_mode=mmap_mode)
+
+    assert len(loaded) == len(models)
+    for bay, model in enumerate(models):
+        assert loaded[bay].summarize() == summarize_model(model)
+        assert loaded[bay].get_convergence()['Converged'] == results[bay].get_convergence()['Converged']
+
+def test_unsupported_results_format_is_rejected(analyzed, tmp_path):
+    _, models = analyzed
+    path = tmp_path/'results'
+    RoofBayResults.from_models(models).save(str(path))
+    np.save(path/'format.npy', np.array(0))
+
+    with pytest.raises(ValueError, match='unsupported results format'):
+        RoofBayResults.load(str(path))
+
+def test_project_archive_round_trip(analyzed, tmp_path):
+    user_input, models = analyzed
+    path = str(tmp_path/'project.npz')
+
+    save_project_archive(path, user_input, models)
+    project = load_project_archive(path)
+
+    assert project['User Input'] == user_input
+    # One row per member: two primary and five secondary members per bay
+    assert len(project['Analysis Summary']) == 2*7
+    assert [bay.summarize() for bay in project['Results']] == [summarize_model(model) for model in models]
@@ -0,0 +1,49 @@
+import pytest
+
+from pondpy4tljh import collect_input_errors, load_roof_layout, package_input, save_roof_layout
+
+@pytest.mark.parametrize('name', ['layout.csv', 'layout.xlsx'])
+def test_layout_round_trip(template_input, tmp_path, name):
+    user_input = package_input(**template_input(2))
+    user_input['dead_load_input'] = [20, 25]
+    user_input['roof_bay_mirrored'][1] = (True, False)
+    path = str(tmp_path/name)
+
+    save_roof_layout(user_input, path)
+    # A small chunk size splits the members of a roof bay across chunks
+    loaded = load_roof_layout(
+        path, chunksize=3, project_name=user_input['project_name'], project_number=user_input['project_number'],
+    )
+
+    assert collect_input_errors(loaded) == []
+    assert sorted(loaded['beam_sizes']) == sorted(user_input['beam_sizes'])
+    for key in user_input:
+        if key != 'beam_sizes':
+            assert loaded[key] == user_input[key], key
+
+def test_bay_values_from_a_separate_sheet(tmp_path):
+    members = tmp_path/'members.csv'
+    members.write_text(
+        'Bay,Type,Size,Length\n'
+        'B,Secondary,14K1,20\n'
+        'A,Primary,W16X26,20\n'
+        'B,Primary,W16X26,20\n'
+        'A,Secondary,14K1,20\n'
+    )
+    bays = tmp_path/'bays.csv'
+    bays.write_text('Bay,Dead Load,Static Head,Hydraulic Head\nA,15,2,2.3\nB,20,1,1.5\n')
+
+    user_input = load_roof_layout(str(members), bays_path=str(bays))
+
+    # Roof bays are numbered in the order they first appear
+    assert user_input['dead_load_input'] == [20, 15]
+    assert user_input['rain_load_input'] == [(1, 1.5), (2, 2.3)]
+    assert user_input['roof_slope'] == [0.25, 0.25]
+    assert user_input['secondary_members_support'][0] == [[(0, 'pinned'), (20, 'pinned')]]
+
+def test_invalid_member_rows_are_reported(tmp_path):
+    members = tmp_path/'members.csv'
+    members.write_text('Bay,Type,Size,Length\nA,Girder,W16X26,20\n')
+
+    with pytest.raises(ValueError, match="member type of rows"):
+        load_roof_layout(str(members))
@@ -0,0 +1,27 @@
+import importlib
+
+from pondpy4tljh import (
+    EventLog,
+    sweep_roof_bays,
+)
+
+def test_sweep_reports_each_scenario_through_the_event_log(template_input):
+    kwargs = template_input(2)
+    del kwargs['rain_load_input'], kwargs['dead_load_input']
+    event_log = EventLog(progress=False)
+
+    sweep = sweep_roof_bays([(2, 2.31), (3, 3.5)], [15, 20], event_log=event_log, **kwargs)
+
+    assert sorted(sweep['Scenario'].unique()) == [1, 2, 3, 4]
+    completed = [(event['scenario'], event['bay']) for event in event_log.events if event['event'] == 'bay_complete']
+    assert sorted(completed) == [(scenario, bay) for scenario in range(4) for bay in range(2)]
+
+def test_sequential_sweep_keeps_no_setup_after_returning(template_input):
+    kwargs = template_input()
+    del kwargs['rain_load_input'], kwargs['dead_load_input']
+
+    sweep_roof_bays([(2, 2.31)], [20], progress=False, **kwargs)
+
+    # The submodule is shadowed by the function of the same name
+    sweep_module = importlib.import_module('pondpy4tljh.sweep_roof_bays')
+    assert sweep_module._WORKER_SETUP == {}
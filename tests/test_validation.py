@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from pondpy4tljh.helpers.exceptions import InputValidationError
+from pondpy4tljh.helpers.helpers import create_active_sizes, create_bay_framing, get_bay_input
+from pondpy4tljh.helpers.validation import collect_input_errors, validate_candidate_sizes, validate_input
+
+def test_template_input_is_valid(template_input):
+    assert collect_input_errors(template_input(2)) == []
+
+def test_every_error_is_reported_with_its_coordinates(template_input):
+    user_input = template_input(2)
+    user_input['secondary_members_size'][1][2] = 'w99x99'
+    user_input['primary_members_support'][0][1] = [(0, 'pinned'), (25, 'pinned')]
+    user_input['rain_load_input'][0] = (-1, 2.31)
+
+    with pytest.raises(InputValidationError) as excinfo:
+        validate_input(user_input)
+
+    locations = {(error['Key'], error['Roof Bay']) for error in excinfo.value.errors}
+    assert ('secondary_members_size', 2) in locations
+    assert ('primary_members_support', 1) in locations
+    assert ('rain_load_input', 1) in locations
+
+def test_negative_roof_slope_is_analyzed_by_its_magnitude(template_input):
+    user_input = template_input(2)
+    user_input['roof_slope'] = [-0.25, 'steep']
+
+    errors = collect_input_errors(user_input)
+
+    assert [(error['Key'], error['Roof Bay']) for error in errors] == [('roof_slope', 2)]
+    user_input['roof_slope'] = [-0.25, 0.25]
+    _, secondary_framing = create_bay_framing(get_bay_input(user_input, 0), create_active_sizes(user_input))
+    assert secondary_framing.slope == 0.25
+
+def test_numpy_bools_are_accepted_as_mirrored_flags(template_input):
+    user_input = template_input(1)
+    user_input['roof_bay_mirrored'] = [(np.bool_(True), np.bool_(False))]
+
+    assert collect_input_errors(user_input) == []
+
+def test_unknown_candidate_sizes_are_reported():
+    with pytest.raises(InputValidationError) as excinfo:
+        validate_candidate_sizes(['W16X31', 'W99X99'], ['18K3'])
+
+    assert [error['Key'] for error in excinfo.value.errors] == ['candidate_beams']